@@ -0,0 +1,155 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+"""
+Time taken by, and edge crossings of, Graph2CellDL layout methods.
+
+Layouts are found for the vessel networks bundled with ``graph2celldl``
+and for random binary trees, directed from their root, with a small
+fraction of extra edges joining random nodes. Crossings are counted between
+straight edges that don't share an endpoint.
+"""
+
+import csv
+from pathlib import Path
+import random
+import sys
+import time
+
+#===============================================================================
+
+ROOT = Path(__file__).absolute().parent.parent
+sys.path.insert(0, str(ROOT / 'celldltools'))
+
+import networkx as nx
+import numpy as np
+
+from graph2celldl import LAYOUT_METHODS
+
+#===============================================================================
+
+DATA_DIR = ROOT / 'celldltools' / 'graph2celldl' / 'data'
+
+VESSEL_NETWORKS = ['lung_ROM_vessel.csv', 'control_phys_vessel.csv']
+
+# Layout methods that need memory or time quadratic in the number of nodes
+
+QUADRATIC_METHODS = ['arf', 'kk', 'spring', 'force']
+
+#===============================================================================
+
+def vessel_network(csv_file: Path) -> nx.DiGraph:
+#================================================
+    G = nx.DiGraph()
+    with open(csv_file) as fp:
+        for row in csv.DictReader(fp):
+            node = row['name']
+            G.add_node(node, label=node)
+            for input in row['inp_vessels'].split():
+                G.add_edge(input, node)
+            for output in row['out_vessels'].split():
+                G.add_edge(node, output)
+    return G
+
+def random_tree(node_count: int, extra_edges: float=0.01, seed: int=0) -> nx.DiGraph:
+#====================================================================================
+    # Grow a binary tree by splitting random leaves
+    rng = random.Random(seed)
+    G = nx.DiGraph()
+    G.add_node(0)
+    leaves = [0]
+    while len(G) + 2 <= node_count:
+        leaf = leaves.pop(rng.randrange(len(leaves)))
+        for child in (len(G), len(G) + 1):
+            G.add_edge(leaf, child)
+            leaves.append(child)
+    for _ in range(int(extra_edges*node_count)):
+        G.add_edge(rng.randrange(len(G)), rng.randrange(len(G)))
+    return G
+
+#===============================================================================
+
+def edge_crossings(G: nx.DiGraph, positions: dict, chunk_size: int=1000) -> int:
+#===============================================================================
+    index = {node: n for n, node in enumerate(G)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.intp).reshape((-1, 2))
+    points = np.array([positions[node] for node in G], dtype=np.float64)
+    (p, r) = (points[edges[:, 0]], points[edges[:, 1]] - points[edges[:, 0]])
+    crossings = 0
+    for start in range(0, len(edges), chunk_size):
+        end = min(start + chunk_size, len(edges))
+        # Segments p + t*r and q + u*s intersect when 0 < t, u < 1
+        (q, s) = (p[start:end, None, :], r[start:end, None, :])
+        denominator = r[None, :, 0]*s[..., 1] - r[None, :, 1]*s[..., 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((q[..., 0] - p[None, :, 0])*s[..., 1] - (q[..., 1] - p[None, :, 1])*s[..., 0])/denominator
+            u = ((q[..., 0] - p[None, :, 0])*r[None, :, 1] - (q[..., 1] - p[None, :, 1])*r[None, :, 0])/denominator
+        shared = ((edges[start:end, None, 0] == edges[None, :, 0]) | (edges[start:end, None, 0] == edges[None, :, 1])
+                | (edges[start:end, None, 1] == edges[None, :, 0]) | (edges[start:end, None, 1] == edges[None, :, 1]))
+        crossing = (t > 0) & (t < 1) & (u > 0) & (u < 1) & ~shared
+        # Only count each pair of edges once
+        crossing &= np.arange(start, end)[:, None] < np.arange(len(edges))[None, :]
+        crossings += int(np.count_nonzero(crossing))
+    return crossings
+
+def benchmark(name: str, G: nx.DiGraph, methods: list[str]):
+#===========================================================
+    print(f'{name}: {len(G)} nodes, {G.number_of_edges()} edges')
+    for method in methods:
+        if method in QUADRATIC_METHODS and len(G) > 1000:
+            continue
+        layout_params = [G]
+        if method == 'bfs':
+            layout_params.append(list(G.nodes)[0])
+        start = time.perf_counter()
+        try:
+            positions = LAYOUT_METHODS[method](*layout_params)
+        except nx.NetworkXError as error:
+            print(f'    {method:8s} failed: {error}')
+            continue
+        elapsed = time.perf_counter() - start
+        print(f'    {method:8s} {elapsed:8.3f} s {edge_crossings(G, positions):8d} crossings')
+
+#===============================================================================
+
+def main():
+#==========
+    import argparse
+    parser = argparse.ArgumentParser(description='Compare Graph2CellDL layout methods.')
+    parser.add_argument('--methods', nargs='+', default=['bfs', 'kk', 'layered'],
+                        choices=list(LAYOUT_METHODS), help='Layout methods to compare')
+    parser.add_argument('--tree-nodes', type=int, default=10000, help='The number of nodes in each random tree')
+    parser.add_argument('--trees', type=int, default=3, help='The number of random trees')
+    parser.add_argument('--extra-edges', type=float, default=0.01,
+                        help='Extra edges, between random nodes, as a fraction of the number of tree nodes')
+    args = parser.parse_args()
+    for csv_file in VESSEL_NETWORKS:
+        benchmark(csv_file, vessel_network(DATA_DIR / csv_file), args.methods)
+    for seed in range(args.trees):
+        benchmark(f'random tree {seed}', random_tree(args.tree_nodes, extra_edges=0, seed=seed), args.methods)
+        benchmark(f'random tree {seed} with {args.extra_edges:.1%} extra edges',
+                  random_tree(args.tree_nodes, extra_edges=args.extra_edges, seed=seed), args.methods)
+
+#===============================================================================
+
+if __name__ == '__main__':
+    main()
+
+#===============================================================================
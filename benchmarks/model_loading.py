@@ -0,0 +1,93 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+"""
+Time taken to load a bondgraph model specification, with its structure
+found by ``SPECIFICATION_QUERY``, by walking the RDF graph's triples, and by
+streaming the specification's triples as they are parsed.
+
+The specification is a random tree of vascular segments, with values for
+each segment's quantities. Times include parsing the specification.
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+#===============================================================================
+
+ROOT = Path(__file__).absolute().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bondgraph.bondgraph import load_model
+from bondgraph.bondgraph.template import TemplateRegistry
+from tests.specifications import random_tree_specification
+
+#===============================================================================
+
+TEMPLATE_FILE = ROOT / 'data' / 'vascular-segment-template.ttl'
+
+LOADERS = {
+    'sparql': {'use_sparql': True},
+    'walk': {'use_sparql': False},
+    'streaming': {'streaming': True},
+}
+
+#===============================================================================
+
+def benchmark(spec_file: str, registry: TemplateRegistry, loaders: list[str], repeats: int):
+#===========================================================================================
+    for loader in loaders:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model = load_model(spec_file, registry, **LOADERS[loader])
+            times.append(time.perf_counter() - start)
+        if model is None:
+            raise ValueError(f'No model loaded from {spec_file}')
+        print(f'    {loader:10s} {min(times):8.3f} s  ({len(model.nodes)} nodes, {len(model.bonds)} bonds)')
+
+#===============================================================================
+
+def main():
+#==========
+    import argparse
+    parser = argparse.ArgumentParser(description='Compare the ways of loading a bondgraph model specification.')
+    parser.add_argument('--loaders', nargs='+', default=list(LOADERS), choices=list(LOADERS),
+                        help='Loaders to compare')
+    parser.add_argument('--segments', type=int, nargs='+', default=[300, 3000],
+                        help='The number of vascular segments in each random tree')
+    parser.add_argument('--repeats', type=int, default=3, help='Times are the fastest of this many loads')
+    args = parser.parse_args()
+    registry = TemplateRegistry(str(TEMPLATE_FILE))
+    with tempfile.TemporaryDirectory() as directory:
+        for segments in args.segments:
+            spec_file = Path(directory) / f'tree-{segments}.ttl'
+            spec_file.write_text(random_tree_specification(segments))
+            print(f'{segments} segments:')
+            benchmark(str(spec_file), registry, args.loaders, args.repeats)
+
+#===============================================================================
+
+if __name__ == '__main__':
+    main()
+
+#===============================================================================
@@ -0,0 +1,161 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+"""
+Memory used by the nodes and bonds of a bondgraph model.
+
+A chain of vascular segments is built by merging segment templates and
+giving values to their quantities. Additional bonds are then added between
+existing nodes to find the memory used by a bond, and the remaining memory
+is divided between the chain's nodes.
+
+Figures for an earlier version, such as a ``git worktree`` of a previous
+commit, can be shown alongside those for this one with ``--baseline``. For
+the version before nodes kept their values in the parameter table::
+
+    $ python benchmarks/node_memory.py --segments 10000 --baseline ../baseline
+    10000 segments:    before    after
+        bytes per node      1455      979
+        bytes per bond       340      276
+        bytes per segment   3590     2511
+
+The earlier version takes several minutes to build a chain of this length.
+"""
+
+import gc
+import os
+from pathlib import Path
+import random
+import subprocess
+import sys
+import tracemalloc
+
+#===============================================================================
+
+# The code being measured, which is set by ``--baseline`` when measuring
+# an earlier version
+
+ROOT = Path(os.environ.get('BONDGRAPH_ROOT', Path(__file__).absolute().parent.parent))
+sys.path.insert(0, str(ROOT))
+
+from rdflib import Literal, URIRef
+
+from bondgraph.bondgraph.bondgraph import BondgraphModel, BondgraphNode
+from bondgraph.bondgraph.namespaces import CDT, NamespaceMap
+from bondgraph.bondgraph.quantity import Quantity
+from bondgraph.bondgraph.template import TemplateRegistry
+
+#===============================================================================
+
+TEMPLATE_FILE = ROOT / 'data' / 'vascular-segment-template.ttl'
+
+SEGMENT_TEMPLATE = URIRef('http://celldl.org/templates/vascular#segment-template')
+SEGMENT_INPUT = URIRef('http://celldl.org/templates/vascular#segment-model:pressure_1')
+SEGMENT_OUTPUT = URIRef('http://celldl.org/templates/vascular#segment-model:pressure_2')
+
+# Values are given as in a model specification, which all versions accept
+
+QUANTITY_VALUES = {
+    URIRef('http://celldl.org/templates/vascular#elastance'): Literal('400 kPa/L', datatype=CDT.ucum),
+    URIRef('http://celldl.org/templates/vascular#fixed-volume'): Literal('0.06 L', datatype=CDT.ucum),
+    URIRef('http://celldl.org/templates/vascular#resistance'): Literal('100 kPa.s/L', datatype=CDT.ucum),
+    URIRef('http://celldl.org/templates/vascular#volume'): Literal('0.1 L', datatype=CDT.ucum),
+}
+
+#===============================================================================
+
+def node_quantities(node: BondgraphNode) -> list[Quantity]:
+#==========================================================
+    if hasattr(node, 'quantities'):
+        return node.quantities
+    # Earlier versions only hold a node's quantities in a private mapping
+    return list(node._BondgraphNode__quantities.values())            # type: ignore [attr-defined]
+
+def node_memory(segments: int) -> tuple[float, float]:
+#=====================================================
+    registry = TemplateRegistry(str(TEMPLATE_FILE))
+    if (template := registry.get_template(SEGMENT_TEMPLATE)) is None:
+        raise ValueError(f'Missing template: {SEGMENT_TEMPLATE}')
+    ns_map = NamespaceMap({'': 'http://example.org/chain#'})
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    model = BondgraphModel(ns_map.uri(':chain'), ns_map)
+    for n in range(segments):
+        model.merge_template(template, {
+            SEGMENT_INPUT: ns_map.uri(f':u_{n}'),
+            SEGMENT_OUTPUT: ns_map.uri(f':u_{n+1}'),
+        })
+    for node in model.nodes:
+        for quantity in node_quantities(node):
+            node.set_quantity_value(quantity.uri, ns_map.uri(f':{quantity.variable}_{node.name}'),
+                                    QUANTITY_VALUES[quantity.uri])
+    gc.collect()
+    chain = tracemalloc.get_traced_memory()[0] - start
+
+    nodes = model.nodes
+    chain_bonds = len(model.bonds)
+    random.seed(0)
+    for n in range(segments):
+        model.add_bond(ns_map.uri(f':extra_{n}'), random.choice(nodes).uri, random.choice(nodes).uri)
+    gc.collect()
+    bond_bytes = (tracemalloc.get_traced_memory()[0] - start - chain)/segments
+    tracemalloc.stop()
+    return ((chain - chain_bonds*bond_bytes)/len(nodes), bond_bytes)
+
+def baseline_memory(baseline: str, segments: int) -> tuple[float, float]:
+#========================================================================
+    # Measured in a separate process, as the two versions can't both be imported
+    result = subprocess.run([sys.executable, __file__, '--segments', str(segments), '--figures'],
+                            env=os.environ | {'BONDGRAPH_ROOT': str(Path(baseline).absolute())},
+                            capture_output=True, text=True, check=True)
+    (node_bytes, bond_bytes) = result.stdout.split()
+    return (float(node_bytes), float(bond_bytes))
+
+#===============================================================================
+
+def main():
+#==========
+    import argparse
+    parser = argparse.ArgumentParser(description='Report the memory used by bondgraph nodes and bonds.')
+    parser.add_argument('--segments', type=int, default=100000, help='The number of vascular segments in the chain')
+    parser.add_argument('--baseline', metavar='DIRECTORY',
+                        help='Also measure the version of the code in DIRECTORY, for comparison')
+    parser.add_argument('--figures', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    (node_bytes, bond_bytes) = node_memory(args.segments)
+    if args.figures:
+        print(node_bytes, bond_bytes)
+    elif args.baseline is None:
+        print(f'{args.segments} segments: {node_bytes:.0f} bytes per node, {bond_bytes:.0f} bytes per bond')
+    else:
+        (baseline_node_bytes, baseline_bond_bytes) = baseline_memory(args.baseline, args.segments)
+        print(f'{args.segments} segments:    before    after')
+        print(f'    bytes per node    {baseline_node_bytes:6.0f}   {node_bytes:6.0f}')
+        print(f'    bytes per bond    {baseline_bond_bytes:6.0f}   {bond_bytes:6.0f}')
+        print(f'    bytes per segment {2*(baseline_node_bytes + baseline_bond_bytes):6.0f}   {2*(node_bytes + bond_bytes):6.0f}')
+
+#===============================================================================
+
+if __name__ == '__main__':
+    main()
+
+#===============================================================================
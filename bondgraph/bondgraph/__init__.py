@@ -18,6 +18,7 @@
 #
 #===============================================================================
 
+from itertools import groupby
 import logging
 from pathlib import Path
 from typing import Optional
@@ -31,7 +32,10 @@ from rdflib import BNode, Literal, URIRef
 
 from .bondgraph import BondgraphModel
 from .definitions import NS_MAP
-from .queries import SPECIFICATION_QUERY, SPECIFICATION_NODE_QUANTITIES, SPECIFICATION_NODE_VALUES
+from .namespaces import BG, RDF, RDFS, TPL
+from .queries import SPECIFICATION_QUERY
+from .snapshot import load_snapshot, save_snapshot
+from .streaming import SpecificationStore
 from .template import TemplateRegistry
 
 #===============================================================================
@@ -41,18 +45,25 @@ __version__ = "1.1.1"
 #===============================================================================
 
 class ModelLoader:
-    def __init__(self, bg_spec: str, registry: TemplateRegistry):
-        self.__rdf_graph = rdflib.Graph(identifier=f'{Path(bg_spec).absolute().as_uri()}')
-        self.__rdf_graph.parse(bg_spec, format='turtle')
+    def __init__(self, bg_spec: str, registry: TemplateRegistry, use_sparql: bool=True, streaming: bool=False):
+        identifier = Path(bg_spec).absolute().as_uri()
         self.__model = None
-        self.__model
         self.__ns_map = NS_MAP.copy()
-        self.__ns_map.add_namespace('', f'{self.__rdf_graph.identifier}#')
-        self.__sparql_prefixes = self.__ns_map.sparql_prefixes()
-        self.__load_model(registry)
+        self.__ns_map.add_namespace('', f'{identifier}#')
+        self.__interface_nodes: dict[URIRef, None] = {}
+        self.__values: list[tuple[URIRef, Literal]] = []
+        self.__quantity_values: list[tuple[URIRef, URIRef, URIRef, Literal]] = []
+        if streaming:
+            self.__stream_model(bg_spec, identifier, registry)
+        else:
+            self.__rdf_graph = rdflib.Graph(identifier=identifier)
+            self.__rdf_graph.parse(bg_spec, format='turtle')
+            if use_sparql:
+                self.__load_model(registry)
+            else:
+                self.__walk_model(registry)
+            self.__set_parameters(self.__values, self.__quantity_values)
         if self.__model is not None:
-            self.__load_values()
-            self.__load_quantities()
             self.__model.freeze()
 
     @property
@@ -66,6 +77,7 @@ class ModelLoader:
         if result.vars is not None:
             (model_key, name_key, component_key, template_key, port_key, node_key) = result.vars
             last_component = None
+            last_template_uri = None
             template = None
             template_ports = {}
             for row in result.bindings:
@@ -77,7 +89,6 @@ class ModelLoader:
                 node_uri: URIRef = row[node_key]                # type: ignore
                 if self.__model is None:
                     self.__model = BondgraphModel(uri, self.__ns_map, name=name)
-                    self.__model_id = self.__ns_map.curie(self.__model.uri)
                 elif self.__model.uri != uri:
                     logging.error(f'Multiple models in source, used: `{self.__model.uri}`')
                     break
@@ -87,45 +98,113 @@ class ModelLoader:
                     template = registry.get_template(template_uri)
                     template_ports = {}
                     last_component = component_id
+                    last_template_uri = template_uri
+                elif template_uri != last_template_uri:
+                    raise ValueError(f'Component {component_id} of {uri} has more than one template')
                 template_ports[port_uri] = node_uri
+                if node_uri not in self.__interface_nodes:
+                    self.__interface_nodes[node_uri] = None
+                    self.__collect_parameters(node_uri, self.__values, self.__quantity_values)
             if self.__model is not None and template is not None and len(template_ports):
                 self.__model.merge_template(template, template_ports)
 
-    def __load_quantities(self):
-    #===========================
+    def __interface_ports(self, component: BNode) -> dict[URIRef, URIRef]:
+    #=====================================================================
+        template_ports = {}
+        for interface in self.__rdf_graph.objects(component, TPL.interface):
+            for port_uri in self.__rdf_graph.objects(interface, TPL.node):
+                for node_uri in self.__rdf_graph.objects(interface, BG.node):
+                    template_ports[port_uri] = node_uri
+        return template_ports
+
+    def __walk_model(self, registry):
+    #================================
+        # Walk the graph's triple indexes directly instead of running
+        # SPECIFICATION_QUERY, merging components in the query's order and
+        # collecting the parameters of interface nodes as they are reached
+        for uri in sorted(set(self.__rdf_graph.subjects(RDF.type, BG.Model))):
+            components = []
+            interface_nodes: dict[URIRef, None] = {}
+            values: list[tuple[URIRef, Literal]] = []
+            quantity_values: list[tuple[URIRef, URIRef, URIRef, Literal]] = []
+            for component_id in sorted(set(self.__rdf_graph.objects(uri, BG.component))):
+                templates = list(dict.fromkeys(self.__rdf_graph.objects(component_id, TPL.template)))
+                if len(templates) > 1:
+                    raise ValueError(f'Component {component_id} of {uri} has more than one template')
+                elif len(templates) and len(template_ports := self.__interface_ports(component_id)):
+                    components.append((templates[0], template_ports))      # type: ignore
+                    for node_uri in template_ports.values():
+                        if node_uri not in interface_nodes:
+                            interface_nodes[node_uri] = None
+                            self.__collect_parameters(node_uri, values, quantity_values)
+            if len(components) == 0:
+                continue
+            elif self.__model is not None:
+                logging.error(f'Multiple models in source, used: `{self.__model.uri}`')
+                break
+            self.__merge_components(uri, self.__rdf_graph.value(uri, RDFS.label), components, registry)   # type: ignore
+            self.__values = values
+            self.__quantity_values = quantity_values
+
+    def __stream_model(self, bg_spec: str, identifier: str, registry: TemplateRegistry):
+    #===================================================================================
+        # Build the model from triples as they are parsed, without
+        # keeping the specification's RDF graph
+        store = SpecificationStore()
+        rdflib.Graph(store=store, identifier=identifier).parse(bg_spec, format='turtle')
+        for uri in sorted(store.models):
+            components = store.model_components(uri)
+            if len(components) == 0:
+                continue
+            elif self.__model is not None:
+                logging.error(f'Multiple models in source, used: `{self.__model.uri}`')
+                break
+            self.__merge_components(uri, store.label(uri), components, registry)
         if self.__model is not None:
-            result = self.__rdf_graph.query(SPECIFICATION_NODE_QUANTITIES
-                                                .replace('%MODEL%', self.__model_id)
-                                                .replace('%PREFIXES%', self.__sparql_prefixes))
-            if result.vars is not None:
-                (node_key, quantity_key, name_key, value_key) = result.vars
-                for row in result.bindings:
-                    node_uri: URIRef = row[node_key]            # type: ignore
-                    quantity_uri: URIRef = row[quantity_key]    # type: ignore
-                    name: URIRef = row[name_key]                # type: ignore
-                    value: Literal = row[value_key]             # type: ignore
-                    if (node := self.__model.get_node(node_uri)) is not None:
-                        node.set_quantity_value(quantity_uri, name, value)
-
-    def __load_values(self):
-    #=======================
+            self.__set_parameters(store.node_values(self.__interface_nodes),
+                                  store.node_quantities(self.__interface_nodes))
+
+    def __merge_components(self, uri: URIRef, name: Optional[Literal],
+    #=================================================================
+                           components: list[tuple[URIRef, dict[URIRef, URIRef]]], registry: TemplateRegistry):
+        self.__model = BondgraphModel(uri, self.__ns_map, name=name)
+        # Consecutive components with the same template are instantiated together
+        for template_uri, group in groupby(components, key=lambda component: component[0]):
+            bindings = [template_ports for _, template_ports in group]
+            if (template := registry.get_template(template_uri)) is not None:
+                self.__model.instantiate_many(template, bindings)
+            for template_ports in bindings:
+                self.__interface_nodes.update(dict.fromkeys(template_ports.values()))
+
+    def __collect_parameters(self, node_uri: URIRef, values: list[tuple[URIRef, Literal]],
+    #=====================================================================================
+                             quantity_values: list[tuple[URIRef, URIRef, URIRef, Literal]]):
+        # An interface node's ``bg:value`` and ``bg:quantities``
+        for value in self.__rdf_graph.objects(node_uri, BG.value):
+            values.append((node_uri, value))                                        # type: ignore
+        for quantities in self.__rdf_graph.objects(node_uri, BG.quantities):
+            for quantity_uri in self.__rdf_graph.objects(quantities, BG.quantity):
+                for name in self.__rdf_graph.objects(quantities, BG.name):
+                    for value in self.__rdf_graph.objects(quantities, BG.value):
+                        quantity_values.append((node_uri, quantity_uri, name, value))   # type: ignore
+
+    def __set_parameters(self, values: list[tuple[URIRef, Literal]],
+    #===============================================================
+                         quantity_values: list[tuple[URIRef, URIRef, URIRef, Literal]]):
         if self.__model is not None:
-            result = self.__rdf_graph.query(SPECIFICATION_NODE_VALUES
-                                                .replace('%MODEL%', self.__model_id)
-                                                .replace('%PREFIXES%', self.__sparql_prefixes))
-            if result.vars is not None:
-                (node_key, value_key) = result.vars
-                for row in result.bindings:
-                    node_uri: URIRef = row[node_key]            # type: ignore
-                    value: Literal = row[value_key]             # type: ignore
-                    if (node := self.__model.get_node(node_uri)) is not None:
-                        node.set_value(value)
+            for node_uri, value in values:
+                if (node := self.__model.get_node(node_uri)) is not None:
+                    node.set_value(value)
+            for node_uri, quantity_uri, name, value in quantity_values:
+                if (node := self.__model.get_node(node_uri)) is not None:
+                    node.set_quantity_value(quantity_uri, name, value)
 
 #===============================================================================
 
-def load_model(bg_spec: str, registry: TemplateRegistry) -> Optional[BondgraphModel]:
-#====================================================================================
-    model_loader = ModelLoader(bg_spec, registry)
+def load_model(bg_spec: str, registry: TemplateRegistry,
+#=======================================================
+               use_sparql: bool=True, streaming: bool=False) -> Optional[BondgraphModel]:
+    model_loader = ModelLoader(bg_spec, registry, use_sparql=use_sparql, streaming=streaming)
     return model_loader.model
 
 #===============================================================================
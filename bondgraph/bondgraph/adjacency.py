@@ -0,0 +1,183 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from typing import Mapping, Optional, Self, Sequence, TYPE_CHECKING
+
+#===============================================================================
+
+import numpy as np
+from rdflib import URIRef
+
+if TYPE_CHECKING:
+    from .bondgraph import BondgraphNode
+
+#===============================================================================
+
+"""
+The connectivity of a frozen :class:`BondgraphModel`.
+
+Nodes are given dense integer ids, in the order they were added to the
+model, and each node's sources and targets are held as compressed sparse
+row (CSR) arrays, with the neighbours of node ``i`` at ``ptr[i]:ptr[i+1]``
+in the order of the model's bonds.
+"""
+
+def _csr(node_count: int, rows: np.ndarray, columns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+#=================================================================================================
+    ptr = np.zeros(node_count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=node_count), out=ptr[1:])
+    return (ptr, columns[np.argsort(rows, kind='stable')].astype(np.int32))
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+#===============================================
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+#===============================================================================
+
+class NodeAdjacency:
+    def __init__(self, nodes: Sequence['BondgraphNode'], bonds: Sequence[tuple[URIRef, URIRef]]):
+        self.__nodes: Sequence['BondgraphNode'] = list(nodes)
+        self.__node_ids: Mapping[URIRef, int] = {node.uri: n for n, node in enumerate(self.__nodes)}
+        self.__names: Sequence[str] = [node.name for node in self.__nodes]
+        bond_ids = np.array([(self.__node_ids[source], self.__node_ids[target]) for source, target in bonds],
+                            dtype=np.int32).reshape((-1, 2))
+        self.__set_bonds(bond_ids[:, 0].copy(), bond_ids[:, 1].copy())
+
+    @classmethod
+    def from_arrays(cls, nodes: Sequence['BondgraphNode'], node_ids: Mapping[URIRef, int], names: Sequence[str],
+    #===========================================================================================================
+                    bond_sources: np.ndarray, bond_targets: np.ndarray) -> Self:
+        """
+        Connectivity given by the node ids at each end of a model's bonds.
+        Nodes, their ids and names may be sequences that only make their
+        items when they are accessed.
+        """
+        self = cls.__new__(cls)
+        self.__nodes = nodes
+        self.__node_ids = node_ids
+        self.__names = names
+        self.__set_bonds(bond_sources, bond_targets)
+        return self
+
+    def __set_bonds(self, bond_sources: np.ndarray, bond_targets: np.ndarray):
+    #=========================================================================
+        self.__bond_sources = bond_sources
+        self.__bond_targets = bond_targets
+        (self.__targets_ptr, self.__targets) = _csr(len(self.__nodes), bond_sources, bond_targets)
+        (self.__sources_ptr, self.__sources) = _csr(len(self.__nodes), bond_targets, bond_sources)
+        self.__deltas: Optional[list[str]] = None
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__nodes)
+
+    @property
+    def bond_sources(self) -> np.ndarray:
+        return _read_only(self.__bond_sources)
+
+    @property
+    def bond_targets(self) -> np.ndarray:
+        return _read_only(self.__bond_targets)
+
+    @property
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.__sources_ptr)
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.__targets_ptr)
+
+    @property
+    def names(self) -> Sequence[str]:
+        return self.__names
+
+    @property
+    def node_ids(self) -> Mapping[URIRef, int]:
+        return self.__node_ids
+
+    @property
+    def nodes(self) -> Sequence['BondgraphNode']:
+        return self.__nodes
+
+    @property
+    def sources_ptr(self) -> np.ndarray:
+        return _read_only(self.__sources_ptr)
+
+    @property
+    def sources_index(self) -> np.ndarray:
+        return _read_only(self.__sources)
+
+    @property
+    def targets_ptr(self) -> np.ndarray:
+        return _read_only(self.__targets_ptr)
+
+    @property
+    def targets_index(self) -> np.ndarray:
+        return _read_only(self.__targets)
+
+    def node_id(self, node_uri: URIRef) -> Optional[int]:
+    #====================================================
+        return self.__node_ids.get(node_uri)
+
+    def sources(self, node: int) -> np.ndarray:
+    #==========================================
+        return self.__sources[self.__sources_ptr[node]:self.__sources_ptr[node + 1]]
+
+    def targets(self, node: int) -> np.ndarray:
+    #==========================================
+        return self.__targets[self.__targets_ptr[node]:self.__targets_ptr[node + 1]]
+
+    def delta(self, node: int) -> str:
+    #=================================
+        """
+        The names of a node's sources less those of its targets, as used
+        in the node's equations.
+        """
+        if self.__deltas is None:
+            # Connectivity is fixed so all deltas are found in a single pass
+            self.__deltas = self.__all_deltas()
+        return self.__deltas[node]
+
+    def __all_deltas(self) -> list[str]:
+    #===================================
+        (targets_ptr, targets) = (self.__targets_ptr.tolist(), self.__targets.tolist())
+        (sources_ptr, sources) = (self.__sources_ptr.tolist(), self.__sources.tolist())
+        names = self.__names
+        def joined(separator: str, neighbours: list[int]) -> str:
+            if len(neighbours) == 1:
+                return names[neighbours[0]]
+            return separator.join(dict.fromkeys([names[m] for m in neighbours]))
+        deltas = []
+        for n in range(len(self.__nodes)):
+            inputs = joined(' + ', sources[sources_ptr[n]:sources_ptr[n + 1]])
+            outputs = joined(' - ', targets[targets_ptr[n]:targets_ptr[n + 1]])
+            if inputs != '' and outputs != '':
+                deltas.append(f'{inputs} - {outputs}')
+            elif inputs != '':
+                deltas.append(inputs)
+            elif outputs != '':
+                deltas.append(f'- {outputs}')
+            else:
+                deltas.append('')
+        return deltas
+
+#===============================================================================
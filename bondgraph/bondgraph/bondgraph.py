@@ -19,16 +19,22 @@
 #===============================================================================
 
 import copy
-from typing import Any, Optional, Self, TYPE_CHECKING
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Self, Sequence, TYPE_CHECKING
 
 #===============================================================================
 
 import networkx as nx
+import numpy as np
 from rdflib import Literal, URIRef
 
 #===============================================================================
 
+from .adjacency import NodeAdjacency
+from .connectivity import ConnectedComponents
+from .graphview import BondgraphGraphView
 from .namespaces import NamespaceMap
+from .parameters import ParameterTable
 from .quantity import Quantity, Units, Value
 from .definitions import BONDGRAPH_BASE_TYPES
 
@@ -37,23 +43,67 @@ if TYPE_CHECKING:
 
 #===============================================================================
 
+# Empty containers shared by nodes until they need their own. Properties and
+# quantities are shared with the template node a node is copied from, so are
+# read-only and replaced rather than modified
+
+_NO_NODES: tuple = ()
+_NO_PROPERTIES: Mapping[str, Any] = MappingProxyType({})
+_NO_QUANTITIES: Mapping[URIRef, Quantity] = MappingProxyType({})
+_NO_QUANTITY_VALUES: dict[URIRef, tuple[URIRef, float]] = {}
+
+# Most nodes have only a few sources and targets, so these are held in tuples
+# of just the right size, with a list used once a node has more than
+# ``MAX_NEIGHBOUR_TUPLE`` of either
+
+MAX_NEIGHBOUR_TUPLE = 8
+
+def _add_neighbour(neighbours: list['BondgraphNode']|tuple, node: 'BondgraphNode') -> list['BondgraphNode']|tuple:
+#=================================================================================================================
+    if isinstance(neighbours, list):
+        neighbours.append(node)
+        return neighbours
+    elif len(neighbours) < MAX_NEIGHBOUR_TUPLE:
+        return neighbours + (node,)
+    return [*neighbours, node]
+
+#===============================================================================
+
 class BondgraphNode:
+    __slots__ = ('__uri', '__type', '__units', '__label', '__properties', '__quantities',
+                 '__quantity_values', '__sources', '__targets', '__value', '__parameters', '__adjacency',
+                 '__index')
+
     def __init__(self, uri: URIRef, type: URIRef, units: Units,
-            label: Optional[Literal]=None, properties: Optional[dict[str, Any]]=None):
+            label: Optional[Literal]=None, properties: Optional[Mapping[str, Any]]=None):
         self.__uri = uri
         self.__type = type
         self.__units = units
         self.__label = label
-        self.__properties = properties if properties is not None else {}
-        self.__quantities: dict[URIRef, Quantity] = {}
-        self.__quantity_values: dict[URIRef, tuple[URIRef, float]] = {}
-        self.__sources: list[BondgraphNode] = []
-        self.__targets: list[BondgraphNode] = []
-        self.__value: Optional[Value] = None
+        # Properties are copied unless already read-only, so a node copied
+        # from another shares its properties
+        if not properties:
+            self.__properties = _NO_PROPERTIES
+        elif isinstance(properties, MappingProxyType):
+            self.__properties = properties
+        else:
+            self.__properties = MappingProxyType(dict(properties))
+        self.__quantities = _NO_QUANTITIES
+        self.__quantity_values = _NO_QUANTITY_VALUES
+        self.__sources: list[BondgraphNode]|tuple = _NO_NODES
+        self.__targets: list[BondgraphNode]|tuple = _NO_NODES
+        self.__value: Optional[float] = None
+        # The node's index in its model
+        self.__index = -1
+        # Set when the node's model is frozen
+        self.__parameters: Optional[ParameterTable] = None
+        self.__adjacency: Optional[NodeAdjacency] = None
 
     @property
     def delta(self) -> str:
     #======================
+        if self.__adjacency is not None:
+            return self.__adjacency.delta(self.__index)
         inputs = ' + '.join(list({n.name for n in self.__sources}))
         outputs = ' - '.join(list({n.name for n in self.__targets}))
         if inputs != '' and outputs != '':
@@ -65,6 +115,10 @@ class BondgraphNode:
         else:
             return ''
 
+    @property
+    def index(self) -> int:
+        return self.__index
+
     @property
     def label(self) -> Optional[str]:
         return str(self.__label) if self.__label else None
@@ -74,27 +128,54 @@ class BondgraphNode:
         return self.__uri.rsplit('#')[-1]
 
     @property
-    def properties(self):
+    def properties(self) -> Mapping[str, Any]:
         return self.__properties
 
+    @property
+    def quantities(self) -> list[Quantity]:
+        return list(self.__quantities.values())
+
+    @property
+    def quantity_items(self) -> list[tuple[Quantity, URIRef, float]]:
+        if self.__parameters is not None:
+            return self.__parameters.quantity_items(self.__index)
+        return [(self.__quantities[quantity], name_value[0], name_value[1])
+                    for quantity, name_value in self.__quantity_values.items()]
+
     @property
     def quantity_values(self) -> list[tuple[Quantity, str, float]]:
+        if self.__parameters is not None:
+            return self.__parameters.quantity_values(self.__index)
         return [(self.__quantities[quantity], name_value[0].rsplit('#')[-1], name_value[1])
                     for quantity, name_value in self.__quantity_values.items()]
 
     @property
-    def sources(self):
-        return self.__sources
+    def sources(self) -> list['BondgraphNode']:
+        if self.__adjacency is not None:
+            nodes = self.__adjacency.nodes
+            return [nodes[n] for n in self.__adjacency.sources(self.__index).tolist()]
+        return list(self.__sources)
 
     @property
-    def targets(self):
-        return self.__targets
+    def targets(self) -> list['BondgraphNode']:
+        if self.__adjacency is not None:
+            nodes = self.__adjacency.nodes
+            return [nodes[n] for n in self.__adjacency.targets(self.__index).tolist()]
+        return list(self.__targets)
+
+    @property
+    def specified_type(self) -> URIRef:
+        return self.__type
 
     @property
     def type(self):
         # If a ZeroStorage or OneResistance node hasn't been assigned values for
         # its parameters then it's treated as a Zero or One node.
-        if len(self.__quantity_values) == 0:
+        if self.__parameters is not None:
+            quantity_count = self.__parameters.quantity_count(self.__index)
+        else:
+            quantity_count = len(self.__quantity_values)
+        if quantity_count == 0:
             return BONDGRAPH_BASE_TYPES.get(self.__type, self.__type)
         else:
             return self.__type
@@ -109,25 +190,43 @@ class BondgraphNode:
 
     @property
     def value(self):
-        return self.__value.value if self.__value is not None else None
+        if self.__parameters is not None:
+            return self.__parameters.node_value(self.__index)
+        return self.__value
 
     def add_quantity(self, quantity: Quantity):
     #==========================================
-        self.__quantities[quantity.uri] = quantity
+        self.__quantities = self.__quantities | {quantity.uri: quantity}
 
     def add_source(self, source: Self):
     #==================================
-        self.__sources.append(source)
+        if self.__adjacency is not None:
+            # A bound node's sources are held by its model
+            return
+        self.__sources = _add_neighbour(self.__sources, source)
 
     def add_target(self, target: Self):
     #==================================
-        self.__targets.append(target)
+        if self.__adjacency is not None:
+            return
+        self.__targets = _add_neighbour(self.__targets, target)
+
+    def bind(self, parameters: ParameterTable, adjacency: NodeAdjacency):
+    #====================================================================
+        # Values and connectivity are now held by the frozen model, with the
+        # node identified by its index
+        self.__parameters = parameters
+        self.__adjacency = adjacency
+        self.__value = None
+        self.__quantity_values = _NO_QUANTITY_VALUES
+        self.__sources = _NO_NODES
+        self.__targets = _NO_NODES
 
     def copy(self) -> 'BondgraphNode':
     #=================================
         node = BondgraphNode(self.__uri, self.__type, self.__units,
-            label=self.__label, properties=self.__properties.copy())
-        node.__quantities = self.__quantities.copy()
+            label=self.__label, properties=self.__properties)
+        node.__quantities = self.__quantities
         return node
 
     def get_property(self, key: str, default=None) -> Optional[Any]:
@@ -138,40 +237,52 @@ class BondgraphNode:
     #========================================
         return key in self.__properties
 
-    def set_quantity_value(self, quantity_uri: URIRef, name: URIRef, value: Literal):   # "100 kPa.s/L"^^cdt:ucum
-    #================================================================================
+    def set_quantity_value(self, quantity_uri: URIRef, name: URIRef, value: Literal|Value):   # "100 kPa.s/L"^^cdt:ucum
+    #======================================================================================
         if (quantity := self.__quantities.get(quantity_uri)) is not None:
-            new_value = Value(value)
+            new_value = value if isinstance(value, Value) else Value(value)
             if new_value.units != quantity.units:
                 raise TypeError(f"Value's units don't match Quantity's: {new_value.units} != {quantity.units}")
-            self.__quantity_values[quantity_uri] = (name, new_value.value)
+            if self.__parameters is not None:
+                self.__parameters.set_quantity_value(self.__index, quantity_uri, name, new_value.value)
+            else:
+                if self.__quantity_values is _NO_QUANTITY_VALUES:
+                    self.__quantity_values = {}
+                self.__quantity_values[quantity_uri] = (name, new_value.value)
+
+    def set_index(self, index: int):
+    #===============================
+        self.__index = index
 
     def set_uri(self, uri: URIRef):
     #==============================
         self.__uri = uri
 
-    def set_value(self, value: Literal):   # "100 kPa.s/L"^^cdt:ucum
-    #===================================
-        new_value = Value(value)
+    def set_value(self, value: Literal|Value):   # "100 kPa.s/L"^^cdt:ucum
+    #=========================================
+        new_value = value if isinstance(value, Value) else Value(value)
         if new_value.units != self.__units:
             raise TypeError(f"Value's units don't match nodes's: {new_value.units} != {self.__units}")
-        if self.__value is None:
-            self.__value = new_value
+        if self.__parameters is not None:
+            self.__parameters.set_node_value(self.__index, new_value.value)
         else:
-            self.__value.set_value(new_value.value)
+            self.__value = new_value.value
 
 #===============================================================================
 
 class BondgraphBond:
+    __slots__ = ('__uri', '__node_0', '__node_1')
+
     def __init__(self, uri: URIRef, node_0: BondgraphNode, node_1: BondgraphNode):
         self.__uri = uri
-        self.__nodes = (node_0, node_1)
+        self.__node_0 = node_0
+        self.__node_1 = node_1
         node_1.add_source(node_0)
         node_0.add_target(node_1)
 
     @property
-    def nodes(self):
-        return self.__nodes
+    def nodes(self) -> tuple[BondgraphNode, BondgraphNode]:
+        return (self.__node_0, self.__node_1)
 
     @property
     def uri(self):
@@ -188,17 +299,68 @@ class BondgraphModel:
         self.__bonds: dict[URIRef, BondgraphBond] = {}
         self.__last_id = 0
         self.__updatable  = True
-        self.__nx_graph = None
+        self.__nx_graph: Optional[BondgraphGraphView] = None
+        self.__parameters: Optional[ParameterTable] = None
+        self.__adjacency: Optional[NodeAdjacency] = None
+        self.__components = ConnectedComponents()
+
+    @classmethod
+    def from_frozen(cls, uri: URIRef, ns_map: NamespaceMap, nodes: Mapping[URIRef, BondgraphNode],
+    #=============================================================================================
+                    bonds: Mapping[URIRef, BondgraphBond], adjacency: NodeAdjacency,
+                    parameters: ParameterTable, name: Optional[Literal]=None,
+                    component_roots: Optional[np.ndarray]=None) -> Self:
+        """
+        A frozen model over existing connectivity and parameters, with nodes
+        already bound to them. Nodes and bonds may be mappings that only make
+        their items when they are accessed.
+
+        Components are given by ``component_roots``, as from the model's
+        :attr:`component_roots`, or are otherwise found from the bonds.
+        """
+        self = cls(uri, ns_map, name=name)
+        self.__nodes = nodes                                # type: ignore [assignment]
+        self.__bonds = bonds                                # type: ignore [assignment]
+        self.__adjacency = adjacency
+        self.__parameters = parameters
+        if component_roots is not None:
+            self.__components = ConnectedComponents.from_roots(component_roots)
+        else:
+            self.__components = ConnectedComponents.from_pairs(len(adjacency),
+                                    zip(adjacency.bond_sources.tolist(), adjacency.bond_targets.tolist()))
+        self.__updatable = False
+        return self
 
     @property
-    def bonds(self) -> list[BondgraphBond]:
-    #======================================
-        return list(self.__bonds.values())
+    def adjacency(self) -> NodeAdjacency:
+    #====================================
+        if self.__adjacency is None:
+            raise ValueError(f"Bondgraph {self.__uri} must be frozen before its nodes are indexed")
+        return self.__adjacency
 
     @property
-    def disconnected(self):
-    #======================
-        return self.__nx_graph is None or not nx.is_weakly_connected(self.__nx_graph)
+    def bonds(self) -> Sequence[BondgraphBond]:
+    #==========================================
+        bonds = self.__bonds.values()
+        return bonds if isinstance(bonds, Sequence) else list(bonds)
+
+    @property
+    def component_roots(self) -> np.ndarray:
+    #=======================================
+        """
+        The index of the node at the root of each node's component.
+        """
+        return self.__components.roots()
+
+    @property
+    def component_count(self) -> int:
+    #================================
+        return self.__components.count
+
+    @property
+    def disconnected(self) -> bool:
+    #==============================
+        return self.__components.count != 1
 
     @property
     def frozen(self):
@@ -211,22 +373,38 @@ class BondgraphModel:
         return self.__name
 
     @property
-    def nodes(self) -> list[BondgraphNode]:
+    def nodes(self) -> Sequence[BondgraphNode]:
+    #==========================================
+        # Nodes that are only made when accessed are returned as they are
+        nodes = self.__nodes.values()
+        return nodes if isinstance(nodes, Sequence) else list(nodes)
+
+    @property
+    def ns_map(self) -> NamespaceMap:
+    #================================
+        return self.__ns_map
+
+    @property
+    def parameters(self) -> ParameterTable:
     #======================================
-        return list(self.__nodes.values())
+        if self.__parameters is None:
+            raise ValueError(f"Bondgraph {self.__uri} must be frozen before its parameters are tabulated")
+        return self.__parameters
 
     @property
     def uri(self):
     #=============
         return self.__uri
 
-    def add_node(self, node_uri: URIRef, type: URIRef, units: Literal,
-    #=================================================================
+    def add_node(self, node_uri: URIRef, type: URIRef, units: Literal|Units,
+    #=======================================================================
                  label: Optional[Literal]=None,
-                 properties: Optional[dict[str, Any]]=None) -> BondgraphNode:
+                 properties: Optional[Mapping[str, Any]]=None) -> BondgraphNode:
         self.__check_updatable()
-        node = BondgraphNode(node_uri, type, Units.from_ucum(units), label=label, properties=properties)
-        self.__nodes[node_uri] = node
+        if not isinstance(units, Units):
+            units = Units.from_ucum(units)
+        node = BondgraphNode(node_uri, type, units, label=label, properties=properties)
+        self.__insert_node(node)
         return node
 
     def add_bond(self, uri: URIRef, node_0: URIRef, node_1: URIRef) -> Optional[BondgraphBond]:
@@ -236,6 +414,7 @@ class BondgraphModel:
         and (n1 := self.get_node(node_1)) is not None):
             bond = BondgraphBond(uri, n0, n1)
             self.__bonds[uri] = bond
+            self.__components.union(n0.index, n1.index)
             return bond
 
     def __check_updatable(self):
@@ -243,25 +422,25 @@ class BondgraphModel:
         if not self.__updatable:
             raise ValueError(f"Bondgraph {self.__uri} is readonly and can't be modified")
 
-    def __create_nx_graph(self):
-    #===========================
-        if self.__nx_graph is None:
-            self.__nx_graph = nx.DiGraph()
-            for node in self.__nodes.values():
-                node_id = self.__ns_map.curie(node.uri)
-                attributes = node.properties.copy()
-                attributes['label'] = node_id[1:]
-                if node.type is not None:
-                    attributes['type'] = self.__ns_map.curie(node.type)
-                self.__nx_graph.add_node(node_id, **attributes)
-            # Can use a nodes sources/targets...
-            for bond in self.__bonds.values():
-                self.__nx_graph.add_edge(*[self.__ns_map.curie(node.uri) for node in bond.nodes])
+    def components(self) -> list[list[URIRef]]:
+    #==========================================
+        """
+        The URIs of the nodes in each weakly connected component of the
+        bondgraph, largest component first.
+        """
+        node_uris = list(self.__nodes)
+        return [[node_uris[index] for index in component]
+                    for component in self.__components.components()]
 
     def freeze(self):
     #================
         if self.__updatable:
-            self.__create_nx_graph()
+            nodes = list(self.__nodes.values())
+            self.__adjacency = NodeAdjacency(nodes, [(bond.nodes[0].uri, bond.nodes[1].uri)
+                                                        for bond in self.__bonds.values()])
+            self.__parameters = ParameterTable(nodes, self.__adjacency.node_ids)
+            for node in nodes:
+                node.bind(self.__parameters, self.__adjacency)
             self.__updatable = False
 
     def get_node(self, node_uri: URIRef) -> Optional[BondgraphNode]:
@@ -272,33 +451,74 @@ class BondgraphModel:
     #============================================
         return node_uri in self.__nodes
 
-    def __new_uri(self) -> URIRef:
-    #=============================
-        self.__last_id += 1
-        return self.__ns_map.uri(f':ID-{self.__last_id:08d}')
+    def __insert_node(self, node: BondgraphNode):
+    #============================================
+        if (existing := self.__nodes.get(node.uri)) is not None:
+            # A replacement node keeps the index of the node it replaces
+            node.set_index(existing.index)
+        else:
+            node.set_index(self.__components.add())
+        self.__nodes[node.uri] = node
+
+    def instantiate_many(self, template: 'BondgraphTemplate', bindings: Iterable[dict[URIRef, URIRef]]):
+    #===================================================================================================
+        """
+        Add an instance of a template for each of a sequence of port bindings,
+        each mapping template node URIs to the URIs of nodes in this model.
+
+        Template nodes that aren't bound are given new URIs and, as with
+        :meth:`merge_template`, a bound node that is already in the model
+        isn't replaced.
+        """
+        self.__check_updatable()
+        if template.model is None:
+            return
+        compiled = template.compiled
+        template_nodes = compiled.nodes
+        template_uris = [node.uri for node in template_nodes]
+        template_bonds = list(zip(compiled.bond_sources.tolist(), compiled.bond_targets.tolist()))
+        nodes = self.__nodes
+        bonds = self.__bonds
+        components = self.__components
+        # New node and bond URIs are ``:ID-nnnnnnnn`` in the model's default namespace
+        id_prefix = str(self.__ns_map.uri(':'))
+        last_id = self.__last_id
+        joined: list[tuple[int, int]] = []
+        for template_ports in bindings:
+            instance_nodes = []
+            for template_node, template_uri in zip(template_nodes, template_uris):
+                if (node_uri := template_ports.get(template_uri)) is None:
+                    last_id += 1
+                    node_uri = URIRef(f'{id_prefix}ID-{last_id:08d}')
+                if (node := nodes.get(node_uri)) is None:
+                    node = template_node.copy()
+                    node.set_uri(node_uri)
+                    node.set_index(components.add())
+                    nodes[node_uri] = node
+                instance_nodes.append(node)
+            for source, target in template_bonds:
+                last_id += 1
+                bond_uri = URIRef(f'{id_prefix}ID-{last_id:08d}')
+                (node_0, node_1) = (instance_nodes[source], instance_nodes[target])
+                bonds[bond_uri] = BondgraphBond(bond_uri, node_0, node_1)
+                joined.append((node_0.index, node_1.index))
+        self.__last_id = last_id
+        components.union_many(joined)
 
     def merge_template(self, template: 'BondgraphTemplate', template_ports: dict[URIRef, URIRef]):
     #=============================================================================================
-        self.__check_updatable()
-        if template.model is not None:
-            uri_remap = {}
-            for node in template.model.nodes:
-                if node.uri in template_ports:
-                    node_uri = template_ports[node.uri]
-                else:
-                    node_uri = self.__new_uri()
-                uri_remap[node.uri] = node_uri
-                if node_uri not in self.__nodes:
-                    new_node = node.copy()
-                    new_node.set_uri(node_uri)
-                    self.__nodes[node_uri] = new_node
-            for bond in template.model.__bonds.values():
-                self.add_bond(self.__new_uri(), uri_remap[bond.nodes[0].uri], uri_remap[bond.nodes[1].uri])
+        self.instantiate_many(template, [template_ports])
 
     def nx_graph(self) -> nx.DiGraph:
     #================================
+        """
+        A read-only ``networkx`` view of the bondgraph, which is frozen
+        if it isn't already.
+        """
         self.freeze()
-        return self.__nx_graph      # type: ignore [return-value]
+        if self.__nx_graph is None:
+            self.__nx_graph = BondgraphGraphView(self)
+        return self.__nx_graph
 
 #===============================================================================
 
@@ -18,19 +18,23 @@
 #
 #===============================================================================
 
-from typing import Optional, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from itertools import repeat
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Sequence, TYPE_CHECKING
 
 #===============================================================================
 
 import lxml.etree as etree
-import sympy
-from sympy.printing.mathml import MathMLContentPrinter
+import numpy as np
+from rdflib import URIRef
 
 #===============================================================================
 
 from ..definitions import BONDGRAPH_EQUATIONS
 from ..namespaces import XMLNamespace
 from ..quantity import Units
+from .mathml import EquationEmitter
 
 if TYPE_CHECKING:
     from ..bondgraph import BondgraphModel, BondgraphNode
@@ -60,6 +64,164 @@ CELLML_UNITS = [
 
 #===============================================================================
 
+class UnitsDefinition:
+    def __init__(self, units: Units):
+        self.__string = str(units)
+        self.__name = units.name
+        self.__items: list[tuple[str, etree.Element]] = []
+        for item in units.base_items():
+            name = Units.normalise_name(item[0])
+            if item[1] == 0: unit = cellml_element('unit', units=name)
+            else: unit = cellml_element('unit', units=name, exponent=f'{item[1]}')
+            self.__items.append((item[0], unit))
+
+    @property
+    def items(self) -> list[tuple[str, etree.Element]]:
+        """
+        The string of each base item's units and a ``<unit>`` element for it.
+        """
+        return self.__items
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def string(self) -> str:
+        return self.__string
+
+# Definitions are resolved once per process and shared by all models, keyed
+# by the string of the units or of a base item. CellML's own units map to
+# ``None``
+
+_UNITS_DEFINITIONS: dict[str, Optional[UnitsDefinition]] = {}
+
+def units_definition(units: Units|str) -> Optional[UnitsDefinition]:
+#===================================================================
+    key = str(units)
+    if key not in _UNITS_DEFINITIONS:
+        if isinstance(units, str):
+            units = Units(units)
+        if str(units) in CELLML_UNITS:
+            definition = None
+        elif (definition := _UNITS_DEFINITIONS.get(str(units))) is None:
+            definition = UnitsDefinition(units)
+            _UNITS_DEFINITIONS[str(units)] = definition
+        _UNITS_DEFINITIONS[key] = definition
+    return _UNITS_DEFINITIONS[key]
+
+def _units_element(definition: Optional[UnitsDefinition], known_units: set[str]) -> Optional[etree.Element]:
+#===========================================================================================================
+    if definition is None or definition.string in known_units:
+        return None
+    element = cellml_element('units', name=definition.name)
+    for item_string, unit in definition.items:
+        # Base units not yet defined are nested in the definition
+        if (item_string not in known_units
+        and (item_element := _units_element(units_definition(item_string), known_units)) is not None):
+            element.append(item_element)
+        element.append(copy(unit))
+    known_units.add(definition.string)
+    return element
+
+#===============================================================================
+
+# Nodes are given to worker processes as their (type, delta, name, quantity
+# variables) so that equations can be generated without the bondgraph
+
+EQUATION_CHUNK_SIZE = 256
+
+EquationSpec = tuple[URIRef, str, str, list[tuple[str, str]]]
+
+def _equation_spec(node: 'BondgraphNode') -> EquationSpec:
+#=========================================================
+    return (node.type, node.delta, node.name,
+            [(quantity.variable, name) for quantity, name, _ in node.quantity_values])
+
+def _sympy_mathml(equation_spec: EquationSpec, time_var: str) -> str:
+#====================================================================
+    import sympy
+    from sympy.printing.mathml import MathMLContentPrinter
+
+    (node_type, delta, node_name, quantity_names) = equation_spec
+    names: dict[str, Any] = {
+        'NODE': sympy.Symbol(node_name),
+        'TIME': sympy.Symbol(time_var),
+    }
+    n = 0
+    node_delta = []
+    for name in delta.split():
+        if name not in ['+', '-']:
+            names[f'N_{n}'] = sympy.Symbol(name)
+            node_delta.append(f'N_{n}')
+            n += 1
+        else:
+            node_delta.append(name)
+    node_delta = ' '.join(node_delta)
+    for variable, name in quantity_names:
+        names[variable] = sympy.Symbol(name)
+    mathml_printer = MathMLContentPrinter({'disable_split_super_sub': True})
+    mathml = ['<math xmlns="http://www.w3.org/1998/Math/MathML">']
+    mathml.extend([mathml_printer.doprint(eval(equation.format(NODE_DELTA=node_delta), {'sympy': sympy}, names))
+                                                for equation in BONDGRAPH_EQUATIONS[node_type]])
+    mathml.append('</math>')
+    return ''.join(mathml)
+
+def _equations_math(equation_spec: EquationSpec, time_var: str) -> Optional[etree.Element]:
+#==========================================================================================
+    (node_type, delta, node_name, quantity_names) = equation_spec
+    if len(BONDGRAPH_EQUATIONS.get(node_type, [])) == 0:
+        return None
+    if (emitter := EquationEmitter.for_type(node_type)) is not None:
+        names = {
+            'NODE': node_name,
+            'TIME': time_var,
+        }
+        names.update(quantity_names)
+        delta_terms = []
+        sign = 1
+        for name in delta.split():
+            if name in ['+', '-']:
+                sign = 1 if name == '+' else -1
+            else:
+                delta_terms.append((sign, name))
+                sign = 1
+        if (math := emitter.math_element(names, delta_terms)) is not None:
+            return math
+    # Fallback to ``sympy`` for equations the emitter can't write
+    return etree.fromstring(_sympy_mathml(equation_spec, time_var))
+
+def _chunk_mathml(equation_specs: list[EquationSpec], time_var: str) -> list[Optional[bytes]]:
+#=============================================================================================
+    return [etree.tostring(math) if (math := _equations_math(equation_spec, time_var)) is not None else None
+                for equation_spec in equation_specs]
+
+def _node_equations(nodes: Iterable['BondgraphNode'], time_var: str, processes: int,
+#===================================================================================
+                    chunk_size: int) -> Iterator[tuple['BondgraphNode', URIRef, Optional[etree.Element]]]:
+    # Equations for chunks of nodes are generated in worker processes
+    # and are then given in the order of ``nodes``
+    nodes = list(nodes)
+    if processes <= 1 or len(nodes) <= chunk_size:
+        for node in nodes:
+            equation_spec = _equation_spec(node)
+            yield (node, equation_spec[0], _equations_math(equation_spec, time_var))
+        return
+    equation_specs = [_equation_spec(node) for node in nodes]
+    chunks = [equation_specs[start:start+chunk_size] for start in range(0, len(nodes), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        start = 0
+        for mathml_chunk in executor.map(_chunk_mathml, chunks, repeat(time_var)):
+            for node, equation_spec, mathml in zip(nodes[start:], equation_specs[start:], mathml_chunk):
+                yield (node, equation_spec[0], etree.fromstring(mathml) if mathml is not None else None)
+            start += len(mathml_chunk)
+
+def _uses_time(node_type: URIRef) -> bool:
+#=========================================
+    return any('TIME' in equation for equation in BONDGRAPH_EQUATIONS.get(node_type, []))
+
+#===============================================================================
+
 class CellMLVariable:
     def __init__(self, name: str, units: Units):
         self.__name = name
@@ -92,50 +254,40 @@ class CellMLModel:
         self.__have_time_var: bool = False
         self.__cellml = cellml_element('model', name=name.replace(' ', '_').replace('-', '_'), nsmap={None: str(CELLML_NS)})
         self.__main = cellml_subelement(self.__cellml, 'component', name='main')
-        self.__known_units: list[str] = []
+        self.__known_units: set[str] = set()
+        # The ``<variable>`` of each node's value and quantities, keyed by node
+        # and quantity URIs, with ``None`` as the quantity for a node's value
+        self.__parameter_variables: dict[tuple[URIRef, Optional[URIRef]], etree.Element] = {}
 
     @property
     def name(self):
     #==============
         return self.__name
 
-    def __add_equations(self, node: 'BondgraphNode'):
-    #================================================
-        equations = BONDGRAPH_EQUATIONS.get(node.type, [])
-        if len(equations):
-            for equation in equations:
-                if 'TIME' in equation:
-                    self.__add_time_var()
-                    TIME = sympy.Symbol(self.__time_var)
-                    break
-            local_names = locals()
-            n = 0
-            node_delta = []
-            for name in node.delta.split():
-                if name not in ['+', '-']:
-                    local_names[f'N_{n}'] = sympy.Symbol(name)
-                    node_delta.append(f'N_{n}')
-                    n += 1
-                else:
-                    node_delta.append(name)
-            node_delta = ' '.join(node_delta)
-            for quantity, name, value in node.quantity_values:
-                local_names[quantity.variable] = sympy.Symbol(name)
-            NODE = sympy.Symbol(node.name)
-            mathml_printer = MathMLContentPrinter({'disable_split_super_sub': True})
-            mathml = ['<math xmlns="http://www.w3.org/1998/Math/MathML">']
-            mathml.extend([mathml_printer.doprint(eval(equation.format(NODE_DELTA=node_delta)))
-                                                        for equation in equations])
-            mathml.append('</math>')
-            self.__main.append(etree.fromstring(''.join(mathml)))
+    def __add_equations(self, node_type: URIRef, math: Optional[etree.Element]):
+    #===========================================================================
+        if _uses_time(node_type):
+            self.__add_time_var()
+        if math is not None:
+            self.__main.append(math)
 
     def add_node(self, node: 'BondgraphNode'):
     #=========================================
-        self.__add_variable(node.name, node.units, node.value)
+        equation_spec = _equation_spec(node)
+        self.__add_node(node, equation_spec[0], _equations_math(equation_spec, self.__time_var))
+
+    def __add_node(self, node: 'BondgraphNode', node_type: URIRef, math: Optional[etree.Element]):
+    #=============================================================================================
+        self.__parameter_variables[(node.uri, None)] = self.__add_variable(node.name, node.units, node.value)
         for quantity, name, value in node.quantity_values:
-            self.__add_variable(name, quantity.units, value)
+            self.__parameter_variables[(node.uri, quantity.uri)] = self.__add_variable(name, quantity.units, value)
         # Assign equation variables now that quantities have names
-        self.__add_equations(node)
+        self.__add_equations(node_type, math)
+
+    def add_nodes(self, nodes: Iterable['BondgraphNode'], processes: int=1, chunk_size: int=EQUATION_CHUNK_SIZE):
+    #============================================================================================================
+        for node, node_type, math in _node_equations(nodes, self.__time_var, processes, chunk_size):
+            self.__add_node(node, node_type, math)
 
     def __add_time_var(self):
     #========================
@@ -146,35 +298,60 @@ class CellMLModel:
 
     def __add_units(self, units: Units):
     #===================================
-        elements = self.__elements_from_units(units)
-        if len(elements):
-            units_element = etree.fromstring(''.join(elements))
-            self.__main.addprevious(units_element)
+        if str(units) not in self.__known_units:
+            if (units_element := self.__units_element(units_definition(units))) is not None:
+                self.__main.addprevious(units_element)
 
-    def __add_variable(self, name: str, units: Units, init: Optional[float]=None):
-    #=============================================================================
+    def __add_variable(self, name: str, units: Units, init: Optional[float]=None) -> etree.Element:
+    #==============================================================================================
         self.__add_units(units)
         variable = CellMLVariable(name, units)
         if init is not None:
             variable.set_initial_value(init)
-        self.__main.append(variable.get_element())
+        element = variable.get_element()
+        self.__main.append(element)
+        return element
 
-    def __elements_from_units(self, units: Units) -> list[str]:
-    #==========================================================
-        if str(units) in self.__known_units or str(units) in CELLML_UNITS:
-            return []
-        elements = []
-        elements.append(f'<units xmlns="{CELLML_NS}" name="{units.name}">')
-        for item in units.base_items():
-            if item[0] not in self.__known_units:
-                item_elements = self.__elements_from_units(Units(item[0]))
-                elements.extend(item_elements)
-            name = Units.normalise_name(item[0])
-            if item[1] == 0: elements.append(f'<unit units="{name}"/>')
-            else: elements.append(f'<unit units="{name}" exponent="{item[1]}"/>')
-        elements.append('</units>')
-        self.__known_units.append(str(units))
-        return elements
+    def __parameter_variable(self, node_uri: URIRef, quantity_uri: Optional[URIRef]) -> etree.Element:
+    #=================================================================================================
+        if (element := self.__parameter_variables.get((node_uri, quantity_uri))) is None:
+            if quantity_uri is None:
+                raise KeyError(f'No CellML variable for {node_uri}')
+            raise KeyError(f'No CellML variable for quantity {quantity_uri} of {node_uri}')
+        return element
+
+    @staticmethod
+    def __set_initial_value(element: etree.Element, value: Optional[float]):
+    #=======================================================================
+        if value is not None:
+            element.attrib['initial_value'] = f'{value}'
+        elif 'initial_value' in element.attrib:
+            del element.attrib['initial_value']
+
+    def set_initial_values(self, parameters: Sequence[tuple[URIRef, Optional[URIRef]]],
+    #==================================================================================
+                           values: Sequence[Optional[float]]):
+        """
+        Set the initial values of the variables of ``(node, quantity)`` parameters,
+        with a quantity of ``None`` for a node's own value.
+        """
+        for (node_uri, quantity_uri), value in zip(parameters, values):
+            self.__set_initial_value(self.__parameter_variable(node_uri, quantity_uri), value)
+
+    def update_values(self, nodes: Iterable['BondgraphNode']):
+    #=========================================================
+        """
+        Update the initial values of variables from the current values of
+        nodes and their quantities, leaving equations and units unchanged.
+        """
+        for node in nodes:
+            self.__set_initial_value(self.__parameter_variable(node.uri, None), node.value)
+            for quantity, _, value in node.quantity_values:
+                self.__set_initial_value(self.__parameter_variable(node.uri, quantity.uri), value)
+
+    def __units_element(self, definition: Optional[UnitsDefinition]) -> Optional[etree.Element]:
+    #===========================================================================================
+        return _units_element(definition, self.__known_units)
 
     def to_xml(self) -> bytes:
     #=========================
@@ -185,13 +362,140 @@ class CellMLModel:
 
 #===============================================================================
 
-def generate_cellml(bondgraph: 'BondgraphModel') -> bytes:
-#=========================================================
+class CellMLWriter:
+    """
+    Write the CellML for a model's nodes directly to a file, without building
+    a ``<model>`` tree. Each node's variables and equations are written as they
+    are generated, so memory use doesn't grow with the size of the model. The
+    output is the same as :meth:`CellMLModel.to_xml`.
+    """
+    def __init__(self, name: str, time_var:str='t', time_units: Units=Units('s')):
+        self.__name = name
+        self.__time_var = time_var
+        self.__time_units = time_units
+
+    @property
+    def name(self):
+    #==============
+        return self.__name
+
+    def write(self, fp: BinaryIO, nodes: Iterable['BondgraphNode'], processes: int=1,
+    #================================================================================
+              chunk_size: int=EQUATION_CHUNK_SIZE):
+        nodes = list(nodes)
+        # Output is formatted as ``to_xml`` pretty prints the model's tree
+        with etree.xmlfile(fp, encoding='utf-8') as xf:
+            xf.write_declaration()
+            with xf.element(CELLML_NS('model'), name=self.__name.replace(' ', '_').replace('-', '_'),
+                            nsmap={None: str(CELLML_NS)}):
+                for units_element in self.__units_elements(nodes):
+                    self.__write_element(xf, units_element, 1)
+                xf.write('\n  ')
+                with xf.element('component', name='main'):
+                    have_time_var = False
+                    for node, node_type, math in _node_equations(nodes, self.__time_var, processes, chunk_size):
+                        self.__write_variable(xf, node.name, node.units, node.value)
+                        for quantity, name, value in node.quantity_values:
+                            self.__write_variable(xf, name, quantity.units, value)
+                        if not have_time_var and _uses_time(node_type):
+                            self.__write_variable(xf, self.__time_var, self.__time_units)
+                            have_time_var = True
+                        if math is not None:
+                            self.__write_element(xf, math, 2)
+                    xf.write('\n  ')
+                xf.write('\n')
+        fp.write(b'\n')
+
+    def __units_elements(self, nodes: list['BondgraphNode']) -> list[etree.Element]:
+    #===============================================================================
+        # Units precede the ``main`` component so are found, in the order
+        # ``CellMLModel`` defines them, before any equations are generated
+        elements = []
+        known_units: set[str] = set()
+        def add_units(units: Units):
+            if (str(units) not in known_units
+            and (element := _units_element(units_definition(units), known_units)) is not None):
+                elements.append(element)
+        have_time_var = False
+        for node in nodes:
+            add_units(node.units)
+            for quantity, _, _ in node.quantity_values:
+                add_units(quantity.units)
+            if not have_time_var and _uses_time(node.type):
+                add_units(self.__time_units)
+                have_time_var = True
+        return elements
+
+    @staticmethod
+    def __write_element(xf, element: etree.Element, level: int):
+    #===========================================================
+        # CellML elements are written in the ``<model>`` element's default
+        # namespace; qualified tags would have their namespace declared again
+        for e in element.iter(CELLML_NS('*')):
+            e.tag = etree.QName(e).localname
+        etree.cleanup_namespaces(element)
+        etree.indent(element, space='  ', level=level)
+        xf.write('\n' + level*'  ')
+        xf.write(element)
+
+    def __write_variable(self, xf, name: str, units: Units, init: Optional[float]=None):
+    #===================================================================================
+        variable = CellMLVariable(name, units)
+        if init is not None:
+            variable.set_initial_value(init)
+        self.__write_element(xf, variable.get_element(), 2)
+
+#===============================================================================
+
+def generate_cellml(bondgraph: 'BondgraphModel', processes: int=1) -> bytes:
+#===========================================================================
     if bondgraph.disconnected:
-        raise ValueError(f"Bondgraph {bondgraph.__uri} is disconnected -- can't generate CellML")
+        raise ValueError(f"Bondgraph {bondgraph.uri} is disconnected ({bondgraph.component_count} components) -- can't generate CellML")
     cellml = CellMLModel(bondgraph.name)
-    for node in bondgraph.nodes:
-        cellml.add_node(node)
+    cellml.add_nodes(bondgraph.nodes, processes=processes)
     return cellml.to_xml()
 
+def write_cellml(bondgraph: 'BondgraphModel', fp: BinaryIO, processes: int=1):
+#=============================================================================
+    """
+    Stream the CellML of a bondgraph to a binary file, as :class:`CellMLWriter`.
+    """
+    if bondgraph.disconnected:
+        raise ValueError(f"Bondgraph {bondgraph.uri} is disconnected ({bondgraph.component_count} components) -- can't generate CellML")
+    CellMLWriter(bondgraph.name).write(fp, bondgraph.nodes, processes=processes)
+
+def generate_cellml_sweep(bondgraph: 'BondgraphModel', parameters: Sequence[tuple[URIRef, Optional[URIRef]]],
+#============================================================================================================
+                          values: np.ndarray|Sequence[Sequence[float]], processes: int=1) -> Iterator[bytes]:
+    """
+    Generate CellML for each row of a matrix of parameter values.
+
+    :param bondgraph: A frozen bondgraph model
+    :param parameters: The ``(node, quantity)`` URIs of each column of ``values``,
+                       with a quantity of ``None`` for the node's own value
+    :param values: Parameter values, in the units of their node or quantity,
+                   with a row for each CellML document
+    :param processes: The number of processes used to generate equations
+
+    The model's variables, units and equations are generated once, with only
+    the initial values of parameters changed for each document.
+    """
+    if bondgraph.disconnected:
+        raise ValueError(f"Bondgraph {bondgraph.uri} is disconnected ({bondgraph.component_count} components) -- can't generate CellML")
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2 or values.shape[1] != len(parameters):
+        raise ValueError(f'Parameter values must have a column for each of the {len(parameters)} parameters')
+    return _cellml_sweep(bondgraph, parameters, values, processes)
+
+def _cellml_sweep(bondgraph: 'BondgraphModel', parameters: Sequence[tuple[URIRef, Optional[URIRef]]],
+#====================================================================================================
+                  values: np.ndarray, processes: int) -> Iterator[bytes]:
+    # Arguments have been checked by ``generate_cellml_sweep`` when it was called,
+    # rather than when its documents are first iterated
+    cellml = CellMLModel(bondgraph.name)
+    cellml.add_nodes(bondgraph.nodes, processes=processes)
+    for row in values.tolist():
+        cellml.set_initial_values(parameters, row)
+        yield cellml.to_xml()
+
 #===============================================================================
@@ -0,0 +1,249 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+import ast
+from typing import Any, Optional
+import unicodedata
+
+#===============================================================================
+
+import lxml.etree as etree
+from rdflib import URIRef
+
+#===============================================================================
+
+from ..definitions import BONDGRAPH_EQUATIONS
+from ..namespaces import XMLNamespace
+
+#===============================================================================
+
+"""
+Content MathML for bondgraph equations, written directly as ``lxml`` elements.
+
+Each equation in ``BONDGRAPH_EQUATIONS`` is compiled once into a shape with
+named placeholders for the node's symbols. Elements are then produced in the
+same form, and with terms in the same order, as ``sympy``'s
+``MathMLContentPrinter`` would give for the evaluated equation.
+
+Only the equation forms used in ``BONDGRAPH_EQUATIONS`` are compiled, namely
+equalities, first derivatives, sums and differences of symbols, and products
+and quotients of a symbol with such a sum. Node types with other equations,
+and nodes whose symbols would be combined or cancelled by ``sympy``, return
+``None`` so that the caller can fall back to ``sympy``.
+"""
+
+MATHML_NS = XMLNamespace('http://www.w3.org/1998/Math/MathML')
+
+NODE_DELTA = 'NODE_DELTA'
+
+#===============================================================================
+
+# Symbol names that ``sympy`` prints as Greek letters
+
+_GREEK_LETTERS = [
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta',
+    'iota', 'kappa', 'lamda', 'mu', 'nu', 'xi', 'omicron', 'pi', 'rho',
+    'sigma', 'tau', 'upsilon', 'phi', 'chi', 'psi', 'omega',
+]
+
+GREEK_SYMBOLS: dict[str, str] = {
+    letter: unicodedata.lookup(f'GREEK SMALL LETTER {letter.upper()}') for letter in _GREEK_LETTERS
+} | {
+    letter.capitalize(): unicodedata.lookup(f'GREEK CAPITAL LETTER {letter.upper()}') for letter in _GREEK_LETTERS
+} | {
+    'lambda': '\N{GREEK SMALL LETTER LAMDA}',
+    'Lambda': '\N{GREEK CAPITAL LETTER LAMDA}',
+    'varsigma': '\N{GREEK SMALL LETTER FINAL SIGMA}',
+}
+
+#===============================================================================
+
+# A sum is a list of (sign, symbol) terms, with ``sign`` either +1 or -1
+
+Sum = list[tuple[int, str]]
+
+def _mathml_element(tag: str, *children: etree.Element) -> etree.Element:
+#========================================================================
+    element = etree.Element(MATHML_NS(tag))
+    element.extend(children)
+    return element
+
+def _apply(operator: str, *operands: etree.Element) -> etree.Element:
+#====================================================================
+    return _mathml_element('apply', _mathml_element(operator), *operands)
+
+def _ci(symbol: str) -> etree.Element:
+#=====================================
+    element = _mathml_element('ci')
+    element.text = GREEK_SYMBOLS.get(symbol, symbol)
+    return element
+
+def _term(sign: int, symbol: str) -> etree.Element:
+#==================================================
+    return _ci(symbol) if sign > 0 else _apply('minus', _ci(symbol))
+
+def _sum(terms: Sum) -> etree.Element:
+#=====================================
+    # Follows ``MathMLContentPrinter._print_Add``, with terms ordered by symbol name
+    terms = sorted(terms, key=lambda term: term[1])
+    last = _term(*terms[0])
+    plus = []
+    for n, (sign, symbol) in enumerate(terms[1:], start=2):
+        if sign < 0:
+            last = _apply('minus', last, _ci(symbol))
+            if n == len(terms):
+                plus.append(last)
+        else:
+            plus.append(last)
+            last = _ci(symbol)
+            if n == len(terms):
+                plus.append(last)
+    if len(plus) == 1:
+        return last
+    return _apply('plus', *plus)
+
+def _times(symbol: str, terms: Sum) -> etree.Element:
+#====================================================
+    if len(terms) > 1:
+        return _apply('times', _ci(symbol), _sum(terms))
+    (sign, factor) = terms[0]
+    product = _apply('times', *[_ci(name) for name in sorted([symbol, factor])])
+    return product if sign > 0 else _apply('minus', product)
+
+def _divide(terms: Sum, symbol: str) -> etree.Element:
+#=====================================================
+    if len(terms) > 1:
+        return _apply('divide', _sum(terms), _ci(symbol))
+    (sign, numerator) = terms[0]
+    quotient = _apply('divide', _ci(numerator), _ci(symbol))
+    return quotient if sign > 0 else _apply('minus', quotient)
+
+#===============================================================================
+
+class _Unsupported(Exception):
+    pass
+
+def _compile_sum(node: ast.expr) -> list[tuple[int, str]]:
+#=========================================================
+    if isinstance(node, ast.Name):
+        return [(1, node.id)]
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return [(-sign, name) for sign, name in _compile_sum(node.operand)]
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return _compile_sum(node.left) + _compile_sum(node.right)
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Sub):
+        return _compile_sum(node.left) + [(-sign, name) for sign, name in _compile_sum(node.right)]
+    raise _Unsupported()
+
+def _compile(node: ast.expr) -> tuple:
+#=====================================
+    if isinstance(node, ast.Call) and len(node.keywords) == 0:
+        function = node.func
+        if (isinstance(function, ast.Attribute) and isinstance(function.value, ast.Name)
+        and function.value.id == 'sympy'):
+            if function.attr == 'Eq' and len(node.args) == 2:
+                return ('eq', _compile(node.args[0]), _compile(node.args[1]))
+            elif (function.attr == 'Derivative' and len(node.args) == 2
+              and all(isinstance(arg, ast.Name) for arg in node.args)):
+                return ('diff', node.args[0].id, node.args[1].id)            # type: ignore
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult):
+        if isinstance(node.left, ast.Name) and not isinstance(node.right, ast.Name):
+            return ('times', node.left.id, _compile_sum(node.right))
+        elif isinstance(node.right, ast.Name) and not isinstance(node.left, ast.Name):
+            return ('times', node.right.id, _compile_sum(node.left))
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div):
+        if isinstance(node.right, ast.Name):
+            return ('divide', _compile_sum(node.left), node.right.id)
+    elif not isinstance(node, ast.Name) or node.id == NODE_DELTA:
+        return ('sum', _compile_sum(node))
+    else:
+        return ('ci', node.id)
+    raise _Unsupported()
+
+#===============================================================================
+
+class EquationEmitter:
+    def __init__(self, equations: list[str]):
+        self.__shapes = [_compile(ast.parse(equation.format(NODE_DELTA=NODE_DELTA), mode='eval').body)
+                            for equation in equations]
+
+    @classmethod
+    def for_type(cls, node_type: URIRef) -> Optional['EquationEmitter']:
+    #===================================================================
+        if (emitter := _EMITTERS.get(node_type, False)) is False:
+            try:
+                emitter = cls(BONDGRAPH_EQUATIONS.get(node_type, []))
+            except (SyntaxError, _Unsupported):
+                emitter = None
+            _EMITTERS[node_type] = emitter
+        return emitter
+
+    def __sum(self, terms: Sum, names: dict[str, str], delta: Sum) -> Sum:
+    #=====================================================================
+        result = []
+        for sign, name in terms:
+            if name == NODE_DELTA:
+                result.extend((sign*delta_sign, symbol) for delta_sign, symbol in delta)
+            else:
+                result.append((sign, names[name]))
+        if len(result) == 0 or len({symbol for _, symbol in result}) < len(result):
+            raise _Unsupported()
+        return result
+
+    def __element(self, shape: tuple, names: dict[str, str], delta: Sum) -> etree.Element:
+    #=====================================================================================
+        kind = shape[0]
+        if kind == 'eq':
+            return _apply('eq', self.__element(shape[1], names, delta),
+                                self.__element(shape[2], names, delta))
+        elif kind == 'diff':
+            return _apply('diff', _mathml_element('bvar', _ci(names[shape[2]])), _ci(names[shape[1]]))
+        elif kind == 'times':
+            return _times(names[shape[1]], self.__sum(shape[2], names, delta))
+        elif kind == 'divide':
+            return _divide(self.__sum(shape[1], names, delta), names[shape[2]])
+        elif kind == 'sum':
+            terms = self.__sum(shape[1], names, delta)
+            return _sum(terms) if len(terms) > 1 else _term(*terms[0])
+        else:
+            return _ci(names[shape[1]])
+
+    def math_element(self, names: dict[str, str], delta: Sum) -> Optional[etree.Element]:
+    #====================================================================================
+        """
+        A ``<math>`` element for the equations, given the symbol for each of
+        their names and a node's ``NODE_DELTA`` terms, or ``None`` if the
+        equations can't be written without ``sympy``.
+        """
+        # ``sympy`` would combine or cancel terms that share a symbol
+        symbols = list(names.values()) + [symbol for _, symbol in delta]
+        if len(set(symbols)) < len(symbols):
+            return None
+        try:
+            equations = [self.__element(shape, names, delta) for shape in self.__shapes]
+        except (KeyError, _Unsupported):
+            return None
+        math = etree.Element(MATHML_NS('math'), nsmap={None: str(MATHML_NS)})
+        math.extend(equations)
+        return math
+
+_EMITTERS: dict[URIRef, Any] = {}
+
+#===============================================================================
@@ -0,0 +1,143 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from array import array
+from typing import Iterable, Self
+
+#===============================================================================
+
+import numpy as np
+
+#===============================================================================
+
+class ConnectedComponents:
+    """
+    The weakly connected components of a bondgraph, as a union-find over
+    node indices that is updated as nodes and bonds are added.
+    """
+    def __init__(self):
+        self.__parent = array('l')
+        self.__size = array('l')
+        self.__count = 0
+
+    @classmethod
+    def from_pairs(cls, count: int, pairs: Iterable[tuple[int, int]]) -> Self:
+    #=========================================================================
+        """
+        The components of ``count`` indices joined by pairs of indices.
+        """
+        self = cls()
+        self.__parent = array('l', range(count))
+        self.__size = array('l', [1])*count
+        self.__count = count
+        self.union_many(pairs)
+        return self
+
+    @classmethod
+    def from_roots(cls, roots: np.ndarray) -> Self:
+    #==============================================
+        """
+        The components given by the root of each index's component, as
+        returned by :meth:`roots`.
+        """
+        self = cls()
+        self.__parent = array('l', roots.tolist())
+        self.__size = array('l', np.bincount(roots, minlength=len(roots)).tolist())
+        self.__count = int(np.count_nonzero(roots == np.arange(len(roots))))
+        return self
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__parent)
+
+    @property
+    def count(self) -> int:
+    #======================
+        return self.__count
+
+    def add(self) -> int:
+    #====================
+        index = len(self.__parent)
+        self.__parent.append(index)
+        self.__size.append(1)
+        self.__count += 1
+        return index
+
+    def find(self, index: int) -> int:
+    #=================================
+        parent = self.__parent
+        while (next := parent[index]) != index:
+            parent[index] = parent[next]        # Path halving
+            index = parent[index]
+        return index
+
+    def union(self, index_0: int, index_1: int):
+    #===========================================
+        root_0 = self.find(index_0)
+        root_1 = self.find(index_1)
+        if root_0 != root_1:
+            if self.__size[root_0] < self.__size[root_1]:
+                (root_0, root_1) = (root_1, root_0)
+            self.__parent[root_1] = root_0
+            self.__size[root_0] += self.__size[root_1]
+            self.__count -= 1
+
+    def union_many(self, pairs: Iterable[tuple[int, int]]):
+    #======================================================
+        """
+        Join the components of each pair of indices, as a single pass
+        over the pairs.
+        """
+        parent = self.__parent
+        size = self.__size
+        count = self.__count
+        for (root_0, root_1) in pairs:
+            while (next := parent[root_0]) != root_0:
+                parent[root_0] = parent[next]
+                root_0 = parent[root_0]
+            while (next := parent[root_1]) != root_1:
+                parent[root_1] = parent[next]
+                root_1 = parent[root_1]
+            if root_0 != root_1:
+                if size[root_0] < size[root_1]:
+                    (root_0, root_1) = (root_1, root_0)
+                parent[root_1] = root_0
+                size[root_0] += size[root_1]
+                count -= 1
+        self.__count = count
+
+    def roots(self) -> np.ndarray:
+    #=============================
+        """
+        The index at the root of each index's component.
+        """
+        return np.array([self.find(index) for index in range(len(self.__parent))], dtype=np.int32)
+
+    def components(self) -> list[list[int]]:
+    #=======================================
+        """
+        The indices in each component, largest component first.
+        """
+        components: dict[int, list[int]] = {}
+        for index in range(len(self.__parent)):
+            components.setdefault(self.find(index), []).append(index)
+        return sorted(components.values(), key=len, reverse=True)
+
+#===============================================================================
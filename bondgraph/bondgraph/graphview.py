@@ -0,0 +1,211 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from collections.abc import Mapping
+from copy import deepcopy
+from types import MappingProxyType
+from typing import Any, Iterator, Optional, Sequence, TYPE_CHECKING
+
+#===============================================================================
+
+import networkx as nx
+import numpy as np
+
+#===============================================================================
+
+from .adjacency import NodeAdjacency
+from .namespaces import NamespaceMap
+
+if TYPE_CHECKING:
+    from .bondgraph import BondgraphModel, BondgraphNode
+
+#===============================================================================
+
+"""
+A read-only ``networkx`` view of a frozen :class:`BondgraphModel`.
+
+Nodes are keyed by the CURIE of their URI and have the node's properties as
+attributes, along with its ``label`` and the CURIE of its ``type``. Edges are
+the model's bonds and have no attributes. Node keys, attributes and
+neighbours are found from the model's nodes and :class:`NodeAdjacency` when
+they are accessed, rather than being copied into ``networkx`` dictionaries.
+"""
+
+#===============================================================================
+
+class _EdgeData(Mapping):
+    # Bonds have no edge attributes; copies are ordinary, empty, dicts
+
+    def __getitem__(self, attribute: str) -> Any:
+        raise KeyError(attribute)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def copy(self) -> dict[str, Any]:
+        return {}
+
+    def __deepcopy__(self, memo: dict) -> dict[str, Any]:
+        return {}
+
+_NO_EDGE_DATA = _EdgeData()
+
+#===============================================================================
+
+class _NodeKeys:
+    def __init__(self, adjacency: NodeAdjacency, ns_map: NamespaceMap):
+        self.__adjacency = adjacency
+        self.__ns_map = ns_map
+        self.__keys: Optional[list[str]] = None
+        self.__index: Optional[dict[str, int]] = None
+
+    @property
+    def keys(self) -> list[str]:
+        if self.__keys is None:
+            self.__keys = [self.__ns_map.curie(node.uri) for node in self.__adjacency.nodes]
+        return self.__keys
+
+    @property
+    def ns_map(self) -> NamespaceMap:
+        return self.__ns_map
+
+    def index(self, key: Any) -> Optional[int]:
+    #==========================================
+        if self.__index is None:
+            self.__index = {key: n for n, key in enumerate(self.keys)}
+        try:
+            return self.__index.get(key)
+        except TypeError:       # Unhashable key
+            return None
+
+#===============================================================================
+
+class _NodeData(Mapping):
+    __slots__ = ('__node', '__key', '__ns_map')
+
+    def __init__(self, node: 'BondgraphNode', key: str, ns_map: NamespaceMap):
+        self.__node = node
+        self.__key = key
+        self.__ns_map = ns_map
+
+    def __getitem__(self, attribute: str) -> Any:
+    #============================================
+        if attribute == 'label':
+            return self.__key[1:]
+        elif attribute == 'type' and (type := self.__node.type) is not None:
+            return self.__ns_map.curie(type)
+        return self.__node.properties[attribute]
+
+    def __iter__(self) -> Iterator[str]:
+    #===================================
+        properties = self.__node.properties
+        yield from properties
+        if 'label' not in properties:
+            yield 'label'
+        if 'type' not in properties and self.__node.type is not None:
+            yield 'type'
+
+    def __len__(self) -> int:
+    #========================
+        return sum(1 for _ in self)
+
+    def copy(self) -> dict[str, Any]:
+    #================================
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict[str, Any]:
+    #====================================================
+        return deepcopy(dict(self), memo)
+
+class _NodeAttributes(Mapping):
+    def __init__(self, node_keys: _NodeKeys, nodes: Sequence['BondgraphNode']):
+        self.__node_keys = node_keys
+        self.__nodes = nodes
+
+    def __getitem__(self, key: str) -> _NodeData:
+    #============================================
+        if (n := self.__node_keys.index(key)) is None:
+            raise KeyError(key)
+        return _NodeData(self.__nodes[n], key, self.__node_keys.ns_map)
+
+    def __contains__(self, key: object) -> bool:
+    #===========================================
+        return self.__node_keys.index(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+    #===================================
+        return iter(self.__node_keys.keys)
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__nodes)
+
+#===============================================================================
+
+class _Neighbours(Mapping):
+    def __init__(self, node_keys: _NodeKeys, ptr: np.ndarray, index: np.ndarray):
+        self.__node_keys = node_keys
+        self.__ptr = ptr
+        self.__index = index
+
+    def __getitem__(self, key: str) -> Mapping[str, Mapping[str, Any]]:
+    #==================================================================
+        if (n := self.__node_keys.index(key)) is None:
+            raise KeyError(key)
+        keys = self.__node_keys.keys
+        # Parallel bonds are a single edge
+        return MappingProxyType(dict.fromkeys(
+            [keys[m] for m in self.__index[self.__ptr[n]:self.__ptr[n + 1]].tolist()], _NO_EDGE_DATA))
+
+    def __contains__(self, key: object) -> bool:
+    #===========================================
+        return self.__node_keys.index(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+    #===================================
+        return iter(self.__node_keys.keys)
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__ptr) - 1
+
+#===============================================================================
+
+class BondgraphGraphView(nx.DiGraph):
+    """
+    A frozen ``networkx.DiGraph`` over a frozen model's storage.
+
+    Without a model this is an ordinary, empty, ``DiGraph``, as used by
+    ``networkx`` when it copies, reverses or takes views of the graph.
+    """
+    def __init__(self, model: Optional['BondgraphModel']=None, **attr):
+        super().__init__(**attr)
+        if model is not None:
+            adjacency = model.adjacency
+            node_keys = _NodeKeys(adjacency, model.ns_map)
+            self._node = _NodeAttributes(node_keys, adjacency.nodes)
+            self._succ = _Neighbours(node_keys, adjacency.targets_ptr, adjacency.targets_index)
+            self._pred = _Neighbours(node_keys, adjacency.sources_ptr, adjacency.sources_index)
+            nx.freeze(self)
+
+#===============================================================================
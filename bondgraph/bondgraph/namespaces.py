@@ -57,6 +57,7 @@ class XMLNamespace:
 
 #===============================================================================
 
+RDF = RDFNamespace('http://www.w3.org/1999/02/22-rdf-syntax-ns#')
 RDFS = RDFNamespace('http://www.w3.org/2000/01/rdf-schema#')
 BG = RDFNamespace('http://celldl.org/ontologies/bond-graph#')
 CDT = RDFNamespace('https://w3id.org/cdt/')
@@ -64,10 +65,16 @@ TPL = RDFNamespace('http://celldl.org/ontologies/model-template#')
 
 #===============================================================================
 
+CURIE_CACHE_SIZE = 4096
+
+#===============================================================================
+
 class NamespaceMap:
     def __init__(self, ns_map: Optional[dict[str, str]]=None):
         self.__prefix_dict: dict[str, str] = {}
         self.__reverse_map: dict[str, str] = {}
+        self.__namespace_lengths: Optional[list[int]] = None
+        self.__curie_cache: dict[str, str] = {}
         if ns_map is not None:
             for prefix, namespace in ns_map.items():
                 self.add_namespace(prefix, namespace)
@@ -97,6 +104,12 @@ class NamespaceMap:
             self.__reverse_map.pop(ns, None)
         self.__prefix_dict[prefix] = namespace
         self.__reverse_map[namespace] = prefix
+        self.__namespaces_changed()
+
+    def __namespaces_changed(self):
+    #==============================
+        self.__namespace_lengths = None
+        self.__curie_cache.clear()
 
     def copy(self) -> 'NamespaceMap':
     #================================
@@ -104,15 +117,31 @@ class NamespaceMap:
 
     def curie(self, uri) -> str:
     #===========================
-        for prefix, namespace in self.__prefix_dict.items():
-            if uri.startswith(namespace):
-                return f'{prefix}:{uri[len(namespace):]}'
-        return uri
+        """
+        Compact a URI using the longest namespace that it starts with.
+        """
+        if (curie := self.__curie_cache.get(uri)) is not None:
+            return curie
+        if self.__namespace_lengths is None:
+            # Namespaces are looked up by length, longest first, so that
+            # nested namespaces give the longest match
+            self.__namespace_lengths = sorted({len(namespace) for namespace in self.__reverse_map},
+                                              reverse=True)
+        curie = uri
+        for length in self.__namespace_lengths:
+            if length <= len(uri) and (prefix := self.__reverse_map.get(uri[:length])) is not None:
+                curie = f'{prefix}:{uri[length:]}'
+                break
+        if len(self.__curie_cache) >= CURIE_CACHE_SIZE:
+            del self.__curie_cache[next(iter(self.__curie_cache))]
+        self.__curie_cache[uri] = curie
+        return curie
 
     def delete_prefix(self, prefix: str):
     #====================================
         if (ns := self.__prefix_dict.pop(prefix, None)) is not None:
             self.__reverse_map.pop(ns, None)
+            self.__namespaces_changed()
 
     def merge_namespaces(self, other: Self) -> Self:
     #===============================================
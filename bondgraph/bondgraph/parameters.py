@@ -0,0 +1,331 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from typing import Iterable, Mapping, Optional, Self, Sequence, TYPE_CHECKING
+
+#===============================================================================
+
+import numpy as np
+from rdflib import URIRef
+
+#===============================================================================
+
+from .quantity import Quantity, Units
+
+if TYPE_CHECKING:
+    from .bondgraph import BondgraphNode
+
+#===============================================================================
+
+"""
+The parameters of a frozen :class:`BondgraphModel`, held as columns of a
+table with a row for the value of each node and for each of its quantities.
+
+Rows are grouped by node, with a node's value first followed by its
+quantities, those that have been assigned a value coming first and in the
+order they were assigned. Columns are:
+
+*   ``node``, the index of the row's node in the model's ``nodes``,
+*   ``quantity``, an index into ``quantities``, or ``NODE_VALUE`` for the
+    node's own value,
+*   ``name``, an index into ``names`` and ``variables``, giving the URI and
+    variable name of the value, or ``-1`` if a quantity hasn't been named,
+*   ``value``, the value, or ``NaN`` if it hasn't been assigned,
+*   ``units``, an index into ``units_table``,
+*   ``assigned``, whether a value has been assigned.
+"""
+
+NODE_VALUE = -1
+
+#===============================================================================
+
+class ParameterTable:
+    def __init__(self, nodes: Sequence['BondgraphNode'], node_index: Mapping[URIRef, int]):
+        self.__node_index = node_index
+        self.__quantities: list[Quantity] = []
+        self.__quantity_index: dict[URIRef, int] = {}
+        self.__names: Sequence[URIRef] = []
+        self.__variables: Sequence[str] = []
+        self.__name_index: Optional[dict[URIRef, int]] = {}
+        self.__units_table: list[Units] = []
+        self.__units_index: dict[str, int] = {}
+
+        node_column: list[int] = []
+        quantity_column: list[int] = []
+        name_column: list[int] = []
+        value_column: list[float] = []
+        units_column: list[int] = []
+        assigned_column: list[bool] = []
+        def add_row(node: int, quantity: int, name: int, value: Optional[float], units: Units):
+            node_column.append(node)
+            quantity_column.append(quantity)
+            name_column.append(name)
+            value_column.append(value if value is not None else np.nan)
+            units_column.append(self.__units_id(units))
+            assigned_column.append(value is not None)
+
+        self.__node_ptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        for n, node in enumerate(nodes):
+            add_row(n, NODE_VALUE, self.__name_id(node.uri), node.value, node.units)
+            assigned = set()
+            for quantity, name, value in node.quantity_items:
+                add_row(n, self.__quantity_id(quantity), self.__name_id(name), value, quantity.units)
+                assigned.add(quantity.uri)
+            for quantity in node.quantities:
+                if quantity.uri not in assigned:
+                    add_row(n, self.__quantity_id(quantity), -1, None, quantity.units)
+            self.__node_ptr[n + 1] = len(node_column)
+        self.__node = np.array(node_column, dtype=np.int32)
+        self.__quantity = np.array(quantity_column, dtype=np.int32)
+        self.__name = np.array(name_column, dtype=np.int32)
+        self.__value = np.array(value_column, dtype=np.float64)
+        self.__units = np.array(units_column, dtype=np.int32)
+        self.__assigned = np.array(assigned_column, dtype=np.bool_)
+
+    @classmethod
+    def from_arrays(cls, node_index: Mapping[URIRef, int], node_ptr: np.ndarray, columns: dict[str, np.ndarray],
+    #===========================================================================================================
+                    names: Sequence[URIRef], variables: Sequence[str],
+                    quantities: list[Quantity], units_table: list[Units]) -> Self:
+        """
+        A table over existing columns, with ``node_ptr`` giving the first row
+        of each node. Columns are used as they are, so must be writable if
+        values are to be updated.
+
+        ``names`` and ``variables`` may be sequences that only make their
+        items when they are accessed, and are only indexed if a quantity is
+        given a new name.
+        """
+        self = cls.__new__(cls)
+        self.__node_index = node_index
+        self.__quantities = quantities
+        self.__quantity_index = {quantity.uri: n for n, quantity in enumerate(quantities)}
+        self.__names = names
+        self.__variables = variables
+        self.__name_index = None
+        self.__units_table = units_table
+        self.__units_index = {str(units): n for n, units in enumerate(units_table)}
+        self.__node_ptr = node_ptr
+        self.__node = columns['node']
+        self.__quantity = columns['quantity']
+        self.__name = columns['name']
+        self.__value = columns['value']
+        self.__units = columns['units']
+        self.__assigned = columns['assigned']
+        return self
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__value)
+
+    def __name_id(self, name: URIRef) -> int:
+    #========================================
+        if self.__name_index is None:
+            self.__names = list(self.__names)
+            self.__variables = list(self.__variables)
+            self.__name_index = {name: n for n, name in enumerate(self.__names)}
+        if (index := self.__name_index.get(name)) is None:
+            index = len(self.__names)
+            self.__name_index[name] = index
+            self.__names.append(name)                       # type: ignore [attr-defined]
+            self.__variables.append(name.rsplit('#')[-1])   # type: ignore [attr-defined]
+        return index
+
+    def __quantity_id(self, quantity: Quantity) -> int:
+    #==================================================
+        if (index := self.__quantity_index.get(quantity.uri)) is None:
+            index = len(self.__quantities)
+            self.__quantity_index[quantity.uri] = index
+            self.__quantities.append(quantity)
+        return index
+
+    def __units_id(self, units: Units) -> int:
+    #=========================================
+        if (index := self.__units_index.get(str(units))) is None:
+            index = len(self.__units_table)
+            self.__units_index[str(units)] = index
+            self.__units_table.append(units)
+        return index
+
+    @staticmethod
+    def __read_only(array: np.ndarray) -> np.ndarray:
+    #================================================
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    # Columns are returned as read-only views, with ``update()`` used to
+    # change values
+
+    @property
+    def node(self) -> np.ndarray:
+        return self.__read_only(self.__node)
+
+    @property
+    def quantity(self) -> np.ndarray:
+        return self.__read_only(self.__quantity)
+
+    @property
+    def name(self) -> np.ndarray:
+        return self.__read_only(self.__name)
+
+    @property
+    def value(self) -> np.ndarray:
+        return self.__read_only(self.__value)
+
+    @property
+    def units(self) -> np.ndarray:
+        return self.__read_only(self.__units)
+
+    @property
+    def assigned(self) -> np.ndarray:
+        return self.__read_only(self.__assigned)
+
+    @property
+    def node_ptr(self) -> np.ndarray:
+        return self.__read_only(self.__node_ptr)
+
+    @property
+    def names(self) -> Sequence[URIRef]:
+        return self.__names
+
+    @property
+    def quantities(self) -> list[Quantity]:
+        return self.__quantities
+
+    @property
+    def units_table(self) -> list[Units]:
+        return self.__units_table
+
+    @property
+    def variables(self) -> Sequence[str]:
+        return self.__variables
+
+    def node_index(self, node_uri: URIRef) -> Optional[int]:
+    #=======================================================
+        return self.__node_index.get(node_uri)
+
+    def node_rows(self, node: int) -> slice:
+    #=======================================
+        return slice(int(self.__node_ptr[node]), int(self.__node_ptr[node + 1]))
+
+    def row(self, node_uri: URIRef, quantity_uri: Optional[URIRef]=None) -> Optional[int]:
+    #=====================================================================================
+        """
+        The row of a node's value, or of one of its quantities.
+        """
+        if (node := self.__node_index.get(node_uri)) is None:
+            return None
+        start = int(self.__node_ptr[node])
+        if quantity_uri is None:
+            return start
+        if (quantity := self.__quantity_index.get(quantity_uri)) is not None:
+            for row in range(start + 1, int(self.__node_ptr[node + 1])):
+                if self.__quantity[row] == quantity:
+                    return row
+
+    def rows(self, keys: Iterable[tuple[URIRef, Optional[URIRef]]]) -> np.ndarray:
+    #=============================================================================
+        """
+        The rows of (node, quantity) pairs, with a quantity of ``None`` giving
+        the node's value.
+        """
+        rows = []
+        for node_uri, quantity_uri in keys:
+            if (row := self.row(node_uri, quantity_uri)) is None:
+                raise KeyError(f'No parameter for {node_uri} {quantity_uri if quantity_uri is not None else ""}')
+            rows.append(row)
+        return np.array(rows, dtype=np.intp)
+
+    def update(self, rows: np.ndarray|Sequence[int], values: np.ndarray|Sequence[float]):
+    #====================================================================================
+        """
+        Set the values of rows. Values are in the units of each row and a
+        quantity must have been named before it can be given a value.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if np.any(self.__name[rows] < 0):
+            raise ValueError('Quantities must be named before their values are updated')
+        self.__value[rows] = values
+        self.__assigned[rows] = True
+
+    #===========================================================================
+
+    # Parameter access for individual nodes, by their index
+
+    def node_value(self, node: int) -> Optional[float]:
+    #==================================================
+        row = self.__node_ptr[node]
+        return self.__value[row].item() if self.__assigned[row] else None
+
+    def set_node_value(self, node: int, value: float):
+    #=================================================
+        row = self.__node_ptr[node]
+        self.__value[row] = value
+        self.__assigned[row] = True
+
+    def __assigned_quantity_rows(self, node: int) -> range:
+    #======================================================
+        start = int(self.__node_ptr[node]) + 1
+        end = int(self.__node_ptr[node + 1])
+        return range(start, start + int(np.count_nonzero(self.__assigned[start:end])))
+
+    def quantity_count(self, node: int) -> int:
+    #==========================================
+        return len(self.__assigned_quantity_rows(node))
+
+    def quantity_items(self, node: int) -> list[tuple[Quantity, URIRef, float]]:
+    #===========================================================================
+        rows = self.__assigned_quantity_rows(node)
+        return [(self.__quantities[quantity], self.__names[name], value)
+                    for quantity, name, value in zip(self.__quantity[rows.start:rows.stop].tolist(),
+                                                     self.__name[rows.start:rows.stop].tolist(),
+                                                     self.__value[rows.start:rows.stop].tolist())]
+
+    def quantity_values(self, node: int) -> list[tuple[Quantity, str, float]]:
+    #=========================================================================
+        rows = self.__assigned_quantity_rows(node)
+        return [(self.__quantities[quantity], self.__variables[name], value)
+                    for quantity, name, value in zip(self.__quantity[rows.start:rows.stop].tolist(),
+                                                     self.__name[rows.start:rows.stop].tolist(),
+                                                     self.__value[rows.start:rows.stop].tolist())]
+
+    def set_quantity_value(self, node: int, quantity_uri: URIRef, name: URIRef, value: float):
+    #=========================================================================================
+        if (quantity := self.__quantity_index.get(quantity_uri)) is None:
+            return
+        assigned = self.__assigned_quantity_rows(node)
+        for row in range(assigned.start, int(self.__node_ptr[node + 1])):
+            if self.__quantity[row] == quantity:
+                if row >= assigned.stop:
+                    # Keep assigned quantities before unassigned ones
+                    self.__swap_rows(row, assigned.stop)
+                    row = assigned.stop
+                self.__name[row] = self.__name_id(name)
+                self.__value[row] = value
+                self.__assigned[row] = True
+                return
+
+    def __swap_rows(self, row_0: int, row_1: int):
+    #=============================================
+        for column in (self.__quantity, self.__name, self.__value, self.__units, self.__assigned):
+            column[[row_0, row_1]] = column[[row_1, row_0]]
+
+#===============================================================================
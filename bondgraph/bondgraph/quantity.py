@@ -18,13 +18,16 @@
 #
 #===============================================================================
 
-from typing import Optional, Self
+from functools import lru_cache
+from typing import Optional, Self, TYPE_CHECKING
 
 #===============================================================================
 
 import pint
 from rdflib import Literal, URIRef
-from ucumvert import PintUcumRegistry
+
+if TYPE_CHECKING:
+    from ucumvert import PintUcumRegistry
 
 #===============================================================================
 
@@ -32,7 +35,20 @@ from .namespaces import CDT
 
 #===============================================================================
 
-unit_registry = PintUcumRegistry()
+# Creating the UCUM registry is expensive so is only done when units are
+# first parsed
+
+_unit_registry: Optional['PintUcumRegistry'] = None
+
+def unit_registry() -> 'PintUcumRegistry':
+#=========================================
+    global _unit_registry
+    if _unit_registry is None:
+        from ucumvert import PintUcumRegistry
+        _unit_registry = PintUcumRegistry()
+    return _unit_registry
+
+#===============================================================================
 
 PREFERRED_BASE_ITEMS = {
     'kilopascal': [
@@ -52,17 +68,30 @@ SUBSTITUTIONS = {
 class Units:
     def __init__(self, units: str|pint.Unit):
         if isinstance(units, str):
-            units = unit_registry[units]
-        self.__units = pint.Quantity(1, units)
-        self.__name = Units.normalise_name(str(self.__units.u))
+            units = unit_registry()[units]
+        self.__units: Optional[pint.Quantity] = pint.Quantity(1, units)
+        self.__string = str(self.__units.u)
+        self.__name = Units.normalise_name(self.__string)
+
+    @classmethod
+    def deferred(cls, units: str, name: str) -> Self:
+    #================================================
+        # Units given by their ``pint`` string and normalised name, with
+        # the ``pint`` quantity only created when it is needed
+        self = cls.__new__(cls)
+        self.__units = None
+        self.__string = units
+        self.__name = name
+        return self
 
     @classmethod
     def from_ucum(cls, ucum_units: Literal|str) -> Self:
+    #===================================================
         if (not isinstance(ucum_units, str)
          and ucum_units.datatype != CDT.ucumunit
          and ucum_units.datatype is not None):
             raise TypeError(f'Units value has unexpected datatype: {ucum_units.datatype}')
-        return cls(unit_registry.from_ucum(str(ucum_units)))
+        return _ucum_units(cls, str(ucum_units))      # type: ignore
 
     @staticmethod
     def normalise_name(name: str) -> str:
@@ -76,24 +105,49 @@ class Units:
 
     def __eq__(self, other):
     #=======================
-        return self.__units.u == other.__units.u
+        return self is other or self.units.u == other.units.u
 
     def __str__(self):
     #=================
-        return str(self.__units.u)
+        return self.__string
 
     @property
     def name(self):
         return self.__name
 
     @property
-    def units(self):
+    def units(self) -> pint.Quantity:
+        if self.__units is None:
+            self.__units = pint.Quantity(1, unit_registry()[self.__string])
         return self.__units
 
     def base_items(self):
     #====================
         return PREFERRED_BASE_ITEMS.get(str(self),
-                                        self.__units.unit_items())
+                                        self.units.unit_items())
+
+#===============================================================================
+
+# Units parsed from UCUM strings are interned, so that the same string in
+# many literals is only parsed once and shares a single ``Units`` instance.
+# The cache is keyed by class as well as string, so a subclass of ``Units``
+# gets instances of itself
+
+UCUM_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=UCUM_CACHE_SIZE)
+def _ucum_units(cls: type[Units], ucum_units: str) -> Units:
+#===========================================================
+    return cls(unit_registry().from_ucum(ucum_units))
+
+def ucum_cache_info():
+#=====================
+    """
+    Hit, miss and size statistics of the UCUM units cache, as a
+    ``functools`` ``CacheInfo`` tuple.
+    """
+    return _ucum_units.cache_info()
+
 #===============================================================================
 
 class Value:
@@ -108,6 +162,14 @@ class Value:
         else:
             raise TypeError(f'Literal value has unexpected datatype: {value.datatype}')
 
+    @classmethod
+    def from_value(cls, value: float, units: Optional[Units]) -> Self:
+    #=================================================================
+        self = cls.__new__(cls)
+        self.__value = value
+        self.__units = units
+        return self
+
     @property
     def units(self):
     #===============
@@ -125,9 +187,10 @@ class Value:
 #===============================================================================
 
 class Quantity:
-    def __init__(self, uri: URIRef, units: Literal, label: Optional[Literal]=None, variable: Optional[Literal]=None):
+    def __init__(self, uri: URIRef, units: Literal|Units, label: Optional[Literal|str]=None,
+                 variable: Optional[Literal|str]=None):
         self.__uri = uri
-        self.__units = Units.from_ucum(units)
+        self.__units = units if isinstance(units, Units) else Units.from_ucum(units)
         self.__label = str(label) if label is not None else str(uri)
         self.__variable = str(variable) if variable is not None else self.__label
 
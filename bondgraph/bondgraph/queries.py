@@ -59,42 +59,6 @@ WHERE {{
 }}
 ORDER BY ?model ?component"""
 
-#===============================================================================
-
-SPECIFICATION_NODE_QUANTITIES = f"""
-%PREFIXES%
-
-SELECT DISTINCT ?node ?quantity ?name ?value
-WHERE {{
-    %MODEL% bg:component [
-        tpl:interface [
-            bg:node ?node
-        ]
-    ] .
-    ?node bg:quantities [
-        bg:quantity ?quantity ;
-        bg:name ?name ;
-        bg:value ?value
-    ] .
-}}
-ORDER BY ?node"""
-
-#===============================================================================
-
-SPECIFICATION_NODE_VALUES = f"""
-%PREFIXES%
-
-SELECT DISTINCT ?node ?value
-WHERE {{
-    %MODEL% bg:component [
-        tpl:interface [
-            bg:node ?node
-        ]
-    ] .
-    ?node bg:value ?value .
-}}
-ORDER BY ?node"""
-
 #===============================================================================
 #===============================================================================
 
@@ -0,0 +1,312 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+import json
+from pathlib import Path
+import struct
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, Optional, Sequence
+
+#===============================================================================
+
+import numpy as np
+from rdflib import URIRef
+
+#===============================================================================
+
+from .adjacency import NodeAdjacency
+from .bondgraph import BondgraphBond, BondgraphModel, BondgraphNode
+from .namespaces import NamespaceMap
+from .parameters import ParameterTable
+from .quantity import Quantity, Units
+
+#===============================================================================
+
+"""
+A snapshot of a frozen :class:`BondgraphModel` is saved as:
+
+*   an 8 byte magic string,
+*   the length of a JSON header as a little-endian 64-bit integer,
+*   the JSON header, giving the model's URI, name and namespaces, its units,
+    quantity and node property tables, and the location of each array,
+*   8-byte aligned arrays of node, bond, connected component and parameter
+    table data, with all URIs, names and labels in a single string table
+    indexed by the offset of each string.
+
+The arrays are memory-mapped when a snapshot is loaded and used as they are
+by the model's :class:`ParameterTable` and :class:`NodeAdjacency`. Nodes,
+bonds and URIs are only made when they are accessed, and units are only
+given to ``pint`` if they are later needed, so reopening a model doesn't
+require RDF parsing, SPARQL or UCUM unit parsing, nor finding the model's
+connected components again.
+"""
+
+SNAPSHOT_MAGIC = b'BGSNAP01'
+
+SNAPSHOT_VERSION = 3
+
+PARAMETER_COLUMNS = ('node', 'quantity', 'name', 'value', 'units', 'assigned')
+
+#===============================================================================
+
+class _StringTable:
+    def __init__(self):
+        self.__strings: dict[str, int] = {}
+
+    def add(self, string: str) -> int:
+    #=================================
+        if (index := self.__strings.get(string)) is None:
+            index = len(self.__strings)
+            self.__strings[string] = index
+        return index
+
+    def as_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+    #====================================================
+        # The UTF-8 of all strings, and the offset of each string in it
+        encoded = [string.encode('utf-8') for string in self.__strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        return (np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+#===============================================================================
+
+class _LazySequence(Sequence):
+    """
+    A sequence whose items are made when they are first accessed.
+    """
+    def __init__(self, length: int, make_item: Callable[[int], Any]):
+        self.__items: list[Any] = [None]*length
+        self.__make_item = make_item
+
+    def __getitem__(self, index):
+    #============================
+        if isinstance(index, slice):
+            return [self[n] for n in range(*index.indices(len(self.__items)))]
+        if (item := self.__items[index]) is None:
+            item = self.__make_item(index if index >= 0 else index + len(self.__items))
+            self.__items[index] = item
+        return item
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__items)
+
+#===============================================================================
+
+class _Positions(Mapping):
+    """
+    The position of each key in a sequence of unique keys, with keys only
+    indexed when one is first looked up.
+    """
+    def __init__(self, keys: Sequence):
+        self.__keys = keys
+        self.__positions: Optional[dict[Any, int]] = None
+
+    def __getitem__(self, key) -> int:
+    #=================================
+        if self.__positions is None:
+            self.__positions = {key: n for n, key in enumerate(self.__keys)}
+        return self.__positions[key]
+
+    def __iter__(self) -> Iterator:
+    #==============================
+        return iter(self.__keys)
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__keys)
+
+#===============================================================================
+
+class _KeyedItems(Mapping):
+    """
+    A sequence of items looked up by the key at their position.
+    """
+    def __init__(self, positions: _Positions, items: Sequence):
+        self.__positions = positions
+        self.__items = items
+
+    def __getitem__(self, key):
+    #==========================
+        return self.__items[self.__positions[key]]
+
+    def __iter__(self) -> Iterator:
+    #==============================
+        return iter(self.__positions)
+
+    def __len__(self) -> int:
+    #========================
+        return len(self.__items)
+
+    def values(self) -> Sequence:       # type: ignore [override]
+    #============================
+        return self.__items
+
+#===============================================================================
+
+def save_snapshot(model: BondgraphModel, path: str|Path):
+#========================================================
+    if not model.frozen:
+        raise ValueError(f"Bondgraph {model.uri} must be frozen before it can be saved")
+    strings = _StringTable()
+    parameters = model.parameters
+    units_index = {str(units): n for n, units in enumerate(parameters.units_table)}
+    quantity_index = {quantity.uri: n for n, quantity in enumerate(parameters.quantities)}
+    properties_index: dict[str, int] = {}
+    properties_table: list[dict[str, Any]] = []
+
+    nodes = model.nodes
+    node_uri = np.empty(len(nodes), dtype=np.int32)
+    node_type = np.empty(len(nodes), dtype=np.int32)
+    node_units = np.empty(len(nodes), dtype=np.int32)
+    node_label = np.empty(len(nodes), dtype=np.int32)
+    node_properties = np.empty(len(nodes), dtype=np.int32)
+    node_quantity_ptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+    node_quantity: list[int] = []
+    for n, node in enumerate(nodes):
+        node_uri[n] = strings.add(node.uri)
+        node_type[n] = strings.add(node.specified_type)
+        node_units[n] = units_index[str(node.units)]
+        node_label[n] = strings.add(node.label) if node.label is not None else -1
+        key = json.dumps(dict(node.properties), sort_keys=True)
+        if (index := properties_index.get(key)) is None:
+            index = len(properties_table)
+            properties_index[key] = index
+            properties_table.append(dict(node.properties))
+        node_properties[n] = index
+        node_quantity.extend(quantity_index[quantity.uri] for quantity in node.quantities)
+        node_quantity_ptr[n + 1] = len(node_quantity)
+    bonds = model.bonds
+    adjacency = model.adjacency
+
+    arrays = {
+        'strings': np.empty(0, dtype=np.uint8),
+        'string_offsets': np.empty(0, dtype=np.int64),
+        'node_uri': node_uri,
+        'node_type': node_type,
+        'node_units': node_units,
+        'node_label': node_label,
+        'node_properties': node_properties,
+        'node_quantity_ptr': node_quantity_ptr,
+        'node_quantity': np.array(node_quantity, dtype=np.int32),
+        'bond_uri': np.array([strings.add(bond.uri) for bond in bonds], dtype=np.int32),
+        'bond_source': adjacency.bond_sources,
+        'bond_target': adjacency.bond_targets,
+        'component_root': model.component_roots,
+        'parameter_ptr': parameters.node_ptr,
+        'parameter_names': np.array([strings.add(name) for name in parameters.names], dtype=np.int32),
+    }
+    for column in PARAMETER_COLUMNS:
+        arrays[f'parameter_{column}'] = getattr(parameters, column)
+    (arrays['strings'], arrays['string_offsets']) = strings.as_arrays()
+    offset = 0
+    layout = {}
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, len(array), offset]
+        offset += (array.nbytes + 7) & ~7
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'uri': str(model.uri),
+        'name': model.name,
+        'prefixes': model.ns_map.sparql_prefixes(),
+        'units': [[str(units), units.name] for units in parameters.units_table],
+        'quantities': [[str(quantity.uri), units_index[str(quantity.units)], quantity.label, quantity.variable]
+                            for quantity in parameters.quantities],
+        'properties': properties_table,
+        'arrays': layout,
+    }).encode('utf-8')
+    header += b' '*(-len(header) % 8)
+    with open(path, 'wb') as fp:
+        fp.write(SNAPSHOT_MAGIC)
+        fp.write(struct.pack('<Q', len(header)))
+        fp.write(header)
+        for array in arrays.values():
+            data = array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+            fp.write(data)
+            fp.write(b'\0'*(-len(data) % 8))
+
+#===============================================================================
+
+def load_snapshot(path: str|Path) -> BondgraphModel:
+#===================================================
+    with open(path, 'rb') as fp:
+        if fp.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f'{path} is not a bondgraph snapshot')
+        (header_size,) = struct.unpack('<Q', fp.read(8))
+        header = json.loads(fp.read(header_size))
+    if header['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} has unsupported snapshot version {header['version']}")
+    # Mapped copy-on-write, so that parameter values can be updated without
+    # changing the snapshot
+    data = np.memmap(path, dtype=np.uint8, mode='c', offset=len(SNAPSHOT_MAGIC) + 8 + header_size)
+    arrays: dict[str, np.ndarray] = {}
+    for name, (dtype, length, offset) in header['arrays'].items():
+        dtype = np.dtype(dtype)
+        arrays[name] = data[offset:offset + length*dtype.itemsize].view(dtype)
+
+    (string_data, string_offsets) = (arrays['strings'], arrays['string_offsets'])
+    strings = _LazySequence(len(string_offsets) - 1,
+                            lambda n: bytes(string_data[string_offsets[n]:string_offsets[n + 1]]).decode('utf-8'))
+    units_table = [Units.deferred(units, name) for units, name in header['units']]
+    quantity_table = [Quantity(URIRef(uri), units_table[units], label, variable)
+                        for uri, units, label, variable in header['quantities']]
+    # Nodes share their read-only properties
+    properties_table = [MappingProxyType(properties) for properties in header['properties']]
+    types: dict[int, URIRef] = {}
+
+    (node_uri, node_type, node_units, node_label, node_properties, node_quantity_ptr, node_quantity) = (
+        arrays['node_uri'], arrays['node_type'], arrays['node_units'], arrays['node_label'],
+        arrays['node_properties'], arrays['node_quantity_ptr'], arrays['node_quantity'])
+    def make_node(n: int) -> BondgraphNode:
+        if (type := types.get(type_id := int(node_type[n]))) is None:
+            type = types[type_id] = URIRef(strings[type_id])
+        label = int(node_label[n])
+        node = BondgraphNode(node_uris[n], type, units_table[node_units[n]],
+                             label=strings[label] if label >= 0 else None,      # type: ignore
+                             properties=properties_table[node_properties[n]])
+        for q in node_quantity[node_quantity_ptr[n]:node_quantity_ptr[n + 1]].tolist():
+            node.add_quantity(quantity_table[q])
+        node.set_index(n)
+        node.bind(parameters, adjacency)
+        return node
+    node_uris = _LazySequence(len(node_uri), lambda n: URIRef(strings[node_uri[n]]))
+    node_ids = _Positions(node_uris)
+    nodes = _LazySequence(len(node_uri), make_node)
+    names = _LazySequence(len(node_uri), lambda n: strings[node_uri[n]].rsplit('#')[-1])
+
+    (bond_uri, bond_source, bond_target) = (arrays['bond_uri'], arrays['bond_source'], arrays['bond_target'])
+    bond_uris = _LazySequence(len(bond_uri), lambda n: URIRef(strings[bond_uri[n]]))
+    bonds = _LazySequence(len(bond_uri), lambda n: BondgraphBond(bond_uris[n], nodes[int(bond_source[n])],
+                                                                              nodes[int(bond_target[n])]))
+    adjacency = NodeAdjacency.from_arrays(nodes, node_ids, names, bond_source, bond_target)
+
+    parameter_names = arrays['parameter_names']
+    parameters = ParameterTable.from_arrays(node_ids, arrays['parameter_ptr'],
+        {column: arrays[f'parameter_{column}'] for column in PARAMETER_COLUMNS},
+        _LazySequence(len(parameter_names), lambda n: URIRef(strings[parameter_names[n]])),
+        _LazySequence(len(parameter_names), lambda n: strings[parameter_names[n]].rsplit('#')[-1]),
+        quantity_table, units_table)
+
+    return BondgraphModel.from_frozen(URIRef(header['uri']), NamespaceMap.fromSparqlPrefixes(header['prefixes']),
+                                      _KeyedItems(node_ids, nodes), _KeyedItems(_Positions(bond_uris), bonds),
+                                      adjacency, parameters, name=header['name'],
+                                      component_roots=arrays['component_root'])
+
+#===============================================================================
@@ -0,0 +1,149 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+
+#===============================================================================
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.store import Store
+
+#===============================================================================
+
+from .namespaces import BG, RDF, RDFS, TPL
+
+#===============================================================================
+
+"""
+An rdflib store that consumes a model specification's triples as they are
+parsed, keeping only what is needed to build a :class:`BondgraphModel`.
+
+Components are resolved into their template and port to node mapping as
+their interfaces are completed, and node quantities into ``(quantity, name,
+value)`` slots. Only blank nodes whose statements are still incomplete are
+buffered; all other triples are discarded.
+
+An interface is expected to have a single ``tpl:node`` and ``bg:node``, and
+a node's quantity a single ``bg:quantity``, ``bg:name`` and ``bg:value``.
+"""
+class SpecificationStore(Store):
+    def __init__(self):
+        super().__init__()
+        self.__models: dict[URIRef, None] = {}
+        self.__labels: dict[URIRef, Literal] = {}
+        self.__model_components: defaultdict[URIRef, list[BNode]] = defaultdict(list)
+        self.__components: dict[BNode, list[Any]] = {}             # [template, {port: node}]
+        self.__interfaces: dict[BNode, list[Any]] = {}             # [component, port, node]
+        self.__node_values: defaultdict[URIRef, list[Literal]] = defaultdict(list)
+        self.__node_quantities: defaultdict[URIRef, list[list[Any]]] = defaultdict(list)
+        self.__quantities: dict[BNode, list[Any]] = {}             # [slot, quantity, name, value]
+
+    @property
+    def models(self) -> list[URIRef]:
+    #================================
+        return list(self.__models)
+
+    def add(self, triple, context, quoted: bool=False):
+    #==================================================
+        (s, p, o) = triple
+        if p == RDF.type:
+            if o == BG.Model:
+                self.__models[s] = None
+        elif p == RDFS.label:
+            self.__labels[s] = o
+        elif p == BG.component:
+            self.__model_components[s].append(o)
+        elif p == TPL.template:
+            if (record := self.__component(s))[0] not in (None, o):
+                raise ValueError(f'Component {s} has more than one template')
+            record[0] = o
+        elif p == TPL.interface:
+            self.__update_interface(o, 0, s)
+        elif p == TPL.node:
+            self.__update_interface(s, 1, o)
+        elif p == BG.node:
+            self.__update_interface(s, 2, o)
+        elif p == BG.quantities:
+            slot = [None, None, None]
+            self.__node_quantities[s].append(slot)
+            self.__update_quantity(o, 0, slot)
+        elif p == BG.quantity:
+            self.__update_quantity(s, 1, o)
+        elif p == BG.name:
+            self.__update_quantity(s, 2, o)
+        elif p == BG.value:
+            if isinstance(s, BNode):
+                self.__update_quantity(s, 3, o)
+            else:
+                self.__node_values[s].append(o)
+
+    def __component(self, component: BNode) -> list[Any]:
+    #====================================================
+        if (record := self.__components.get(component)) is None:
+            record = [None, {}]
+            self.__components[component] = record
+        return record
+
+    def __update_interface(self, interface: BNode, index: int, term):
+    #================================================================
+        if (record := self.__interfaces.get(interface)) is None:
+            record = [None, None, None]
+            self.__interfaces[interface] = record
+        record[index] = term
+        if None not in record:
+            self.__component(record[0])[1][record[1]] = record[2]
+            del self.__interfaces[interface]
+
+    def __update_quantity(self, quantities: BNode, index: int, term):
+    #================================================================
+        if (record := self.__quantities.get(quantities)) is None:
+            record = [None, None, None, None]
+            self.__quantities[quantities] = record
+        record[index] = term
+        if None not in record:
+            record[0][:] = record[1:]
+            del self.__quantities[quantities]
+
+    def label(self, uri: URIRef) -> Optional[Literal]:
+    #=================================================
+        return self.__labels.get(uri)
+
+    def model_components(self, model: URIRef) -> list[tuple[URIRef, dict[URIRef, URIRef]]]:
+    #======================================================================================
+        components = []
+        for component_id in sorted(set(self.__model_components.get(model, []))):
+            if ((record := self.__components.get(component_id)) is not None
+            and record[0] is not None and len(record[1])):
+                components.append((record[0], record[1]))
+        return components
+
+    def node_quantities(self, nodes: Iterable[URIRef]) -> list[tuple[URIRef, URIRef, URIRef, Literal]]:
+    #==================================================================================================
+        return [(node, *slot) for node in nodes
+                    for slot in self.__node_quantities.get(node, [])
+                        if None not in slot]
+
+    def node_values(self, nodes: Iterable[URIRef]) -> list[tuple[URIRef, Literal]]:
+    #==============================================================================
+        return [(node, value) for node in nodes
+                    for value in self.__node_values.get(node, [])]
+
+#===============================================================================
@@ -18,12 +18,18 @@
 #
 #===============================================================================
 
-from typing import Optional
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional
 
 #===============================================================================
 
+import numpy as np
 import rdflib
-from rdflib import Literal, URIRef
+from rdflib import BNode, Literal, URIRef
 
 #===============================================================================
 
@@ -36,16 +42,110 @@ from .queries import QUANTITIES_QUERY
 
 #===============================================================================
 
+# Bump whenever the compiled form of a template library changes
+
+COMPILED_FORMAT = 2
+
+# The tables of a compiled template library, with their number of columns
+
+COMPILED_TABLES = {
+    'quantities': 4,
+    'nodes': 6,
+    'bonds': 4,
+    'node_quantities': 3,
+    'templates': 3,
+    'ports': 2,
+}
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'bondgraph'
+
+#===============================================================================
+
+# Compiled template libraries are cached as JSON, with RDF terms as tagged
+# lists, so that reading a cache can't run code
+
+def _encode_term(term: Any) -> Any:
+#==================================
+    if isinstance(term, URIRef):
+        return ['uri', str(term)]
+    elif isinstance(term, BNode):
+        return ['bnode', str(term)]
+    elif isinstance(term, Literal):
+        return ['literal', str(term),
+                str(term.datatype) if term.datatype is not None else None, term.language]
+    elif isinstance(term, dict):
+        return {key: _encode_term(value) for key, value in term.items()}
+    return term
+
+def _decode_term(value: Any) -> Any:
+#===================================
+    if isinstance(value, list):
+        if value[0] == 'uri':
+            return URIRef(value[1])
+        elif value[0] == 'bnode':
+            return BNode(value[1])
+        elif value[0] == 'literal':
+            return Literal(value[1], datatype=URIRef(value[2]) if value[2] is not None else None, lang=value[3])
+        raise ValueError(f'Unknown term in template cache: {value[0]}')
+    elif isinstance(value, dict):
+        return {key: _decode_term(term) for key, term in value.items()}
+    return value
+
+#===============================================================================
+
+class CompiledTemplate:
+    """
+    A template's model as index arrays, for adding instances of the template
+    to a model without looking up its nodes and bonds each time.
+
+    ``bond_sources`` and ``bond_targets`` hold the index, in ``nodes``, of
+    each bond's endpoints, in the order the template's bonds were added.
+    """
+    def __init__(self, model: Optional[BondgraphModel]):
+        self.__nodes = model.nodes if model is not None else []
+        self.__node_index = {node.uri: n for n, node in enumerate(self.__nodes)}
+        bonds = model.bonds if model is not None else []
+        bond_nodes = np.array([(self.__node_index[bond.nodes[0].uri], self.__node_index[bond.nodes[1].uri])
+                                for bond in bonds], dtype=np.int32).reshape((-1, 2))
+        self.__bond_sources = bond_nodes[:, 0].copy()
+        self.__bond_targets = bond_nodes[:, 1].copy()
+
+    @property
+    def bond_sources(self) -> np.ndarray:
+        return self.__bond_sources
+
+    @property
+    def bond_targets(self) -> np.ndarray:
+        return self.__bond_targets
+
+    @property
+    def nodes(self) -> list[BondgraphNode]:
+        return self.__nodes
+
+    def node_index(self, node_uri: URIRef) -> Optional[int]:
+    #=======================================================
+        return self.__node_index.get(node_uri)
+
+#===============================================================================
+
 class BondgraphTemplate:
     def __init__(self, uri: URIRef, model: Optional[BondgraphModel], label: Optional[Literal]=None):
         self.__uri = uri
         self.__model = model
         self.__label = label if label is not None else NS_MAP.curie(uri)
         self.__ports: dict[URIRef, BondgraphNode] = {}
+        self.__compiled: Optional[CompiledTemplate] = None
 
     def label(self) -> Optional[str]:
         return str(self.__label) if self.__label else None
 
+    @property
+    def compiled(self) -> CompiledTemplate:
+        # Compiled when first instantiated, after the template's model is loaded
+        if self.__compiled is None:
+            self.__compiled = CompiledTemplate(self.__model)
+        return self.__compiled
+
     @property
     def model(self):
         return self.__model
@@ -66,95 +166,126 @@ class BondgraphTemplate:
 #===============================================================================
 
 class TemplateRegistry:
-    def __init__(self, template_file: str):
+    def __init__(self, template_file: str, cache_dir: Optional[str|Path]=None):
         self.__models: dict[URIRef, BondgraphModel] = {}
         self.__quantities: dict[URIRef, Quantity] = {}
         self.__templates: dict[URIRef, BondgraphTemplate] = {}
+        self.__cache_dir = Path(cache_dir) if cache_dir is not None else None
         self.load_templates(template_file)
 
     def load_templates(self, template_file: str):
     #============================================
-        rdf_graph = rdflib.Graph()
-        rdf_graph.parse(template_file, format='turtle')
-        self.__load_quantities(rdf_graph)
-        self.__load_models(rdf_graph)
-        self.__load_templates(rdf_graph)
+        compiled = None
+        if self.__cache_dir is not None:
+            cache_file = self.__cache_dir / f'templates-{self.__cache_key(template_file)}.json'
+            compiled = self.__read_cache(cache_file)
+        if compiled is None:
+            rdf_graph = rdflib.Graph()
+            rdf_graph.parse(template_file, format='turtle')
+            compiled = self.__compile(rdf_graph)
+            if self.__cache_dir is not None:
+                self.__write_cache(cache_file, compiled)            # type: ignore
+        self.__load_quantities(compiled['quantities'])
+        self.__load_models(compiled['nodes'], compiled['bonds'], compiled['node_quantities'])
+        self.__load_templates(compiled['templates'], compiled['ports'])
 
     def get_template(self, template: URIRef) -> Optional[BondgraphTemplate]:
     #=======================================================================
         return self.__templates.get(template)
 
-    def __load_models(self, rdf_graph: rdflib.Graph):
-    #================================================
+    def __compile(self, rdf_graph: rdflib.Graph) -> dict[str, list[tuple]]:
+    #======================================================================
+        # Query results as plain rows, in a form that can be cached
+        def result_rows(query: str) -> list[tuple]:
+            result = rdf_graph.query(query)
+            if result.vars is None:
+                return []
+            return [tuple(row.get(var) for var in result.vars) for row in result.bindings]
+        nodes = []
         result = rdf_graph.query(BONDGRAPH_MODEL_QUERY)
         if result.vars is not None:
             (model_key, node_key, type_key, units_key, label_key) = result.vars[0:5]
-            model = None
             for row in result.bindings:
-                model_uri: URIRef = row[model_key]          # type: ignore
-                node_uri: URIRef = row[node_key]            # type: ignore
-                type: URIRef = row[type_key]                # type: ignore
-                units: Literal = row.get(units_key)         # type: ignore
-                label: Optional[Literal] = row.get(label_key)   # type: ignore
                 properties = {str(k): NS_MAP.simplify(row[k]) for k in result.vars[5:] if k in row}
-                if type is not None:
+                if (type := row.get(type_key)) is not None:
                     properties['type'] = NS_MAP.curie(type)
-                if model is None or model_uri != model.uri:
-                    model = BondgraphModel(model_uri, NS_MAP)
-                    self.__models[model_uri] = model
-                    model_uri = model.uri
-                model.add_node(node_uri, type, units, label=label, properties=properties)
-        result = rdf_graph.query(BONDGRAPH_MODEL_BONDS)
-        if result.vars is not None:
-            (model_key, bond_key, source_key, target_key) = result.vars
-            for row in result.bindings:
-                model_uri: URIRef = row[model_key]          # type: ignore
-                bond_uri: URIRef = row[bond_key]            # type: ignore
-                source_uri: URIRef = row[source_key]        # type: ignore
-                target_uri: URIRef = row[target_key]        # type: ignore
-                if (model := self.__models.get(model_uri)) is not None:
-                    model.add_bond(bond_uri, source_uri, target_uri)
-        result = rdf_graph.query(BONDGRAPH_MODEL_QUANTITIES)
-        if result.vars is not None:
-            (model_key, node_key, quantity_key) = result.vars
-            for row in result.bindings:
-                model_uri: URIRef = row[model_key]          # type: ignore
-                node_uri: URIRef = row[node_key]            # type: ignore
-                quantity: URIRef = row.get(quantity_key)    # type: ignore
-                if (model := self.__models.get(model_uri)) is not None:
-                    if ((node := model.get_node(node_uri)) is not None
-                     and quantity in self.__quantities):
-                        node.add_quantity(self.__quantities[quantity])
-
-    def __load_quantities(self, rdf_graph: rdflib.Graph):
+                nodes.append((row[model_key], row[node_key], type, row.get(units_key),
+                              row.get(label_key), properties))
+        return {
+            'quantities': result_rows(QUANTITIES_QUERY),
+            'nodes': nodes,
+            'bonds': result_rows(BONDGRAPH_MODEL_BONDS),
+            'node_quantities': result_rows(BONDGRAPH_MODEL_QUANTITIES),
+            'templates': result_rows(TEMPLATE_QUERY),
+            'ports': result_rows(TEMPLATE_PORTS_QUERY),
+        }
+
+    def __load_models(self, nodes: list[tuple], bonds: list[tuple], node_quantities: list[tuple]):
+    #=============================================================================================
+        model = None
+        for (model_uri, node_uri, type, units, label, properties) in nodes:
+            if model is None or model_uri != model.uri:
+                model = BondgraphModel(model_uri, NS_MAP)
+                self.__models[model_uri] = model
+            model.add_node(node_uri, type, units, label=label, properties=properties)
+        for (model_uri, bond_uri, source_uri, target_uri) in bonds:
+            if (model := self.__models.get(model_uri)) is not None:
+                model.add_bond(bond_uri, source_uri, target_uri)
+        for (model_uri, node_uri, quantity) in node_quantities:
+            if (model := self.__models.get(model_uri)) is not None:
+                if ((node := model.get_node(node_uri)) is not None
+                 and quantity in self.__quantities):
+                    node.add_quantity(self.__quantities[quantity])
+
+    def __load_quantities(self, quantities: list[tuple]):
     #====================================================
-        result = rdf_graph.query(QUANTITIES_QUERY)
-        if result.vars is not None:
-            (uri_key, units_key, variable_key, label_key) = result.vars
-            for row in result.bindings:
-                uri: URIRef = row[uri_key]                  # type: ignore
-                units: Literal = row.get(units_key)         # type: ignore
-                label: Optional[Literal] = row.get(label_key)   # type: ignore
-                variable: Optional[Literal] = row.get(variable_key)   # type: ignore
-                self.__quantities[uri] = Quantity(uri, units, label, variable)
-
-    def __load_templates(self, rdf_graph: rdflib.Graph):
-    #===================================================
-        qres = rdf_graph.query(TEMPLATE_QUERY)
-        if qres.vars is not None:
-            (uri_key, model_key, label_key) = qres.vars
-            for row in qres.bindings:
-                uri: URIRef = row[uri_key]                  # type: ignore
-                model_uri: URIRef = row[model_key]          # type: ignore
-                label: Optional[Literal] = row.get(label_key)   # type: ignore
-                self.__templates[uri] = BondgraphTemplate(uri, self.__models.get(model_uri), label)
-        result = rdf_graph.query(TEMPLATE_PORTS_QUERY)
-        if result.vars is not None:
-            (uri_key, node_key) = result.vars
-            for row in result.bindings:
-                uri: URIRef = row[uri_key]                 # type: ignore
-                node: URIRef = row.get(node_key)           # type: ignore
-                if (template := self.__templates.get(uri)) is not None:
-                    template.add_port(node)
+        for (uri, units, variable, label) in quantities:
+            self.__quantities[uri] = Quantity(uri, units, label, variable)
+
+    def __load_templates(self, templates: list[tuple], ports: list[tuple]):
+    #======================================================================
+        for (uri, model_uri, label) in templates:
+            self.__templates[uri] = BondgraphTemplate(uri, self.__models.get(model_uri), label)
+        for (uri, node) in ports:
+            if (template := self.__templates.get(uri)) is not None:
+                template.add_port(node)
+
+    @staticmethod
+    def __cache_key(template_file: str) -> str:
+    #==========================================
+        # Compiled templates depend on the package's code and the namespaces
+        # used to simplify node properties, as well as on the template file
+        from . import __version__
+        key = hashlib.sha256()
+        with open(template_file, 'rb') as fp:
+            key.update(fp.read())
+        key.update(f'\n{COMPILED_FORMAT}\n{__version__}\n{NS_MAP.sparql_prefixes()}'.encode('utf-8'))
+        return key.hexdigest()
+
+    def __read_cache(self, cache_file: Path) -> Optional[dict[str, list[tuple]]]:
+    #============================================================================
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'rb') as fp:
+                    cached = json.load(fp)
+                if (not isinstance(cached, dict) or cached.keys() != COMPILED_TABLES.keys()
+                 or any(len(row) != COMPILED_TABLES[name] for name, rows in cached.items() for row in rows)):
+                    raise ValueError('missing or incomplete tables')
+                return {name: [tuple(_decode_term(term) for term in row) for row in rows]
+                            for name, rows in cached.items()}
+            except Exception as error:
+                logging.warning(f"Can't read template cache {cache_file}: {error}")
+
+    def __write_cache(self, cache_file: Path, compiled: dict[str, list[tuple]]):
+    #===========================================================================
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temp_file, 'w') as fp:
+                json.dump({name: [[_encode_term(term) for term in row] for row in rows]
+                                for name, rows in compiled.items()}, fp)
+            os.replace(temp_file, cache_file)
+        except OSError as error:
+            logging.warning(f"Can't write template cache {cache_file}: {error}")
 
 #===============================================================================
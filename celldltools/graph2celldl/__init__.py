@@ -18,18 +18,25 @@
 #
 #===============================================================================
 
+from collections import defaultdict
+from copy import deepcopy
+from itertools import islice
+import json
+import math
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 #===============================================================================
 
 import lxml.etree as etree
 import networkx as nx
 import numpy as np
+from scipy.spatial import cKDTree
 
 #===============================================================================
 
-from .celldl import CellDLGraph
+from .celldl import CellDLGraph, component_turtle, connection_turtle
+from .layered import layered_layout
 
 from .definitions import svg_element, svg_subelement, SVG_NS
 from .definitions import CELLDL_DEFINITIONS_ID, CELLDL_LAYER_CLASS
@@ -41,12 +48,34 @@ from .definitions import BondgraphStylesheet, BondgraphSvgDefinitions, CellDLSty
 SVG_WIDTH  = 2400
 SVG_HEIGHT = 1600
 
+VIEW_BOX = (-int(0.6*SVG_WIDTH), -int(0.6*SVG_HEIGHT), int(1.2*SVG_WIDTH), int(1.2*SVG_HEIGHT))
+
 GRID_SPACING = 10
 
 NODE_SIZE = (60, 40)
 
 SPLIT_TEXT_LEN = 10
 
+# Connection end points are found for this many edges at a time, and streamed
+# metadata is written in CDATA sections of about this many characters
+
+CONNECTION_CHUNK_SIZE = 4096
+METADATA_CHUNK_SIZE = 65536
+
+#===============================================================================
+
+# Tiled diagrams
+
+TILE_SIZE = 480
+
+# Tiled diagrams are scaled so that nodes are typically this far from their
+# nearest neighbour
+
+TILE_NODE_SPACING = 2*NODE_SIZE[0]
+
+TILE_INDEX_FILE = 'index.json'
+TILE_OVERVIEW_FILE = 'overview.svg'
+
 #===============================================================================
 
 LAYOUT_METHODS = {
@@ -54,6 +83,7 @@ LAYOUT_METHODS = {
     'bfs': nx.bfs_layout,
     'force': nx.forceatlas2_layout,
     'kk': nx.kamada_kawai_layout,
+    'layered': layered_layout,
     'spring': nx.spring_layout,
 }
 
@@ -74,17 +104,105 @@ LOCAL_STYLESHEET = """
 
 #===============================================================================
 
-def _scaled_vertical_offset(x: float, delta: np.ndarray) -> np.ndarray:
-#======================================================================
-    return np.array([x, x*delta[1]/delta[0]])
-
-def _scaled_horizontal_offset(y: float, delta: np.ndarray) -> np.ndarray:
-#========================================================================
-    return np.array([y*delta[0]/delta[1], y])
-
 def _grid_align(positions: dict) -> dict:
 #========================================
-    return { key: GRID_SPACING*np.floor(pos/GRID_SPACING + 0.5) for key, pos in positions.items() }
+    return { key: _grid_aligned(pos) for key, pos in positions.items() }
+
+def _grid_aligned(positions: np.ndarray) -> np.ndarray:
+#======================================================
+    return GRID_SPACING*np.floor(positions/GRID_SPACING + 0.5)
+
+def _boundary_intersections(centres: np.ndarray, points: np.ndarray) -> np.ndarray:
+#==================================================================================
+    """
+    Where lines from an array of points to the centres of nodes cross the
+    nodes' boundaries, as described in :meth:`CellDLComponent.boundary_intersection`.
+    """
+    delta = points - centres
+    (dx, dy) = (delta[:, 0], delta[:, 1])
+    # The corner offset of the quadrant containing each point
+    corner_x = np.where(dx < 0, -NODE_SIZE[0]/2, NODE_SIZE[0]/2)
+    corner_y = np.where(dy < 0, -NODE_SIZE[1]/2, NODE_SIZE[1]/2)
+    # Lines less steep than the corner's diagonal cross a vertical side. With
+    # the corner's signs, this comparison is reversed in the top-right and
+    # bottom-left quadrants
+    shallower = corner_x*dy < corner_y*dx
+    vertical = np.where((dx < 0) == (dy < 0), shallower, ~shallower)
+    # Offsets for both sides are found, with those that divide by zero unused
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offsets = np.where(vertical[:, np.newaxis],
+                           np.stack([corner_x, corner_x*dy/dx], axis=1),
+                           np.stack([corner_y*dx/dy, corner_y], axis=1))
+    return centres + offsets
+
+def _segment_tiles(start: list[float], end: list[float], tile_size: float,
+#=========================================================================
+                   origin: tuple[float, float]) -> list[tuple[int, int]]:
+    """
+    The ``(row, column)`` of each tile, with tiles starting at ``origin``,
+    that a line segment passes through, in order from its start.
+    """
+    if not all(math.isfinite(v) for v in start + end):
+        return []
+    # Parameters along the segment where it crosses the side of a tile
+    crossings = [0.0, 1.0]
+    for axis in range(2):
+        (a, b) = ((start[axis] - origin[axis])/tile_size, (end[axis] - origin[axis])/tile_size)
+        if a != b:
+            crossings.extend((line - a)/(b - a) for line in range(math.floor(min(a, b)) + 1, math.ceil(max(a, b))))
+    crossings.sort()
+    tiles = {}
+    for (t_0, t_1) in zip(crossings, crossings[1:]):
+        t = (t_0 + t_1)/2
+        tiles[(math.floor((start[1] + t*(end[1] - start[1]) - origin[1])/tile_size),
+               math.floor((start[0] + t*(end[0] - start[0]) - origin[0])/tile_size))] = None
+    return list(tiles)
+
+def _connection_element(connection_id: str, source_point: list[float], target_point: list[float]) -> etree.Element:
+#==================================================================================================================
+    return svg_element('path', {
+        'id': connection_id,
+        'class': 'celldl-Connection bondgraph electrical arrow',
+        'd': f'M{source_point[0]} {source_point[1]}L{target_point[0]} {target_point[1]}',
+    })
+
+def _element_id(number: int) -> str:
+#===================================
+    return f'ID-{number:08d}'
+
+def _joined_chunks(strings: Iterable[str], chunk_size: int) -> Iterator[str]:
+#============================================================================
+    chunk = []
+    length = 0
+    for string in strings:
+        chunk.append(string)
+        length += len(string)
+        if length >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            length = 0
+    if len(chunk):
+        yield ''.join(chunk)
+
+def _unqualified(element: etree._Element) -> etree._Element:
+#===========================================================
+    # Elements written inside the streamed ``<svg>`` element are in its default
+    # namespace; qualified tags would have their namespace declared again
+    for e in element.iter(etree.Element):
+        e.tag = etree.QName(e).localname
+    etree.cleanup_namespaces(element)
+    return element
+
+#===============================================================================
+
+# Corner offsets are shared by all components
+
+CORNER_OFFSETS = [
+    np.array([ NODE_SIZE[0]/2,  NODE_SIZE[1]/2]),  # BR
+    np.array([ NODE_SIZE[0]/2, -NODE_SIZE[1]/2]),  # TR
+    np.array([-NODE_SIZE[0]/2, -NODE_SIZE[1]/2]),  # TL
+    np.array([-NODE_SIZE[0]/2,  NODE_SIZE[1]/2])   # BL
+]
 
 #===============================================================================
 
@@ -94,12 +212,6 @@ class CellDLComponent:
         self.__properties = properties if properties is not None else {}
         self.__label = self.__properties.get('label', id)
         self.__centre = centre
-        self.__corner_offsets = [
-            np.array([ NODE_SIZE[0]/2,  NODE_SIZE[1]/2]),  # BR
-            np.array([ NODE_SIZE[0]/2, -NODE_SIZE[1]/2]),  # TR
-            np.array([-NODE_SIZE[0]/2, -NODE_SIZE[1]/2]),  # TL
-            np.array([-NODE_SIZE[0]/2,  NODE_SIZE[1]/2])   # BL
-        ]
 
     @property
     def centre(self):
@@ -144,30 +256,7 @@ class CellDLComponent:
         #   BR, TR, TL, BL
         #    0   1   2   3
         #
-        delta = point - self.__centre
-        if delta[0] < 0:    # left
-            if delta[1] < 0:    # TL
-                if self.__corner_offsets[2][0]*delta[1] < self.__corner_offsets[2][1]*delta[0]:
-                    offset = _scaled_vertical_offset(self.__corner_offsets[2][0], delta)
-                else:
-                    offset = _scaled_horizontal_offset(self.__corner_offsets[2][1], delta)
-            else:               # BL
-                if self.__corner_offsets[3][0]*delta[1] < self.__corner_offsets[3][1]*delta[0]:
-                    offset = _scaled_horizontal_offset(self.__corner_offsets[3][1], delta)
-                else:
-                    offset = _scaled_vertical_offset(self.__corner_offsets[3][0], delta)
-        else:               # right
-            if delta[1] < 0:    # TR
-                if self.__corner_offsets[1][0]*delta[1] < self.__corner_offsets[1][1]*delta[0]:
-                    offset = _scaled_horizontal_offset(self.__corner_offsets[1][1], delta)
-                else:
-                    offset = _scaled_vertical_offset(self.__corner_offsets[1][0], delta)
-            else:               # BR
-                if self.__corner_offsets[0][0]*delta[1] < self.__corner_offsets[0][1]*delta[0]:
-                    offset = _scaled_vertical_offset(self.__corner_offsets[0][0], delta)
-                else:
-                    offset = _scaled_horizontal_offset(self.__corner_offsets[0][1], delta)
-        return self.__centre + offset
+        return _boundary_intersections(self.__centre[np.newaxis, :], point[np.newaxis, :])[0]
 
     def svg(self) -> etree.Element:
     #==============================
@@ -177,8 +266,8 @@ class CellDLComponent:
         svg = svg_element('g', {'id': self.__id, 'class': ' '.join(classes)})
         svg_subelement(svg, 'rect', {
             'class': 'celldl-Component',
-            'x': str(self.__centre[0] + self.__corner_offsets[2][0]),
-            'y': str(self.__centre[1] + self.__corner_offsets[2][1]),
+            'x': str(self.__centre[0] + CORNER_OFFSETS[2][0]),
+            'y': str(self.__centre[1] + CORNER_OFFSETS[2][1]),
             'width': str(NODE_SIZE[0]), 'height': str(NODE_SIZE[1])
         })
         label = self.__label
@@ -209,45 +298,94 @@ class CellDLComponent:
 class Graph2CellDL:
     def __init__(self, G: nx.DiGraph, layout_method: str='bfs'):
         self.__celldl = CellDLGraph()
-        self.__last_id = 0
         self.__create_diagram()
         layout_params = [G]
         if layout_method == 'bfs':
             layout_params.append(list(G.nodes)[0])
-        self.__positions = _grid_align(nx.rescale_layout_dict(
-            LAYOUT_METHODS.get(layout_method, nx.arf_layout)(*layout_params),
-            scale=min(SVG_WIDTH, SVG_HEIGHT)/2))
-        self.__components: dict = {}
-        for node, properties in G.nodes(data=True):
-            self.__add_component(node, properties)
-        for node_0, node_1, properties in G.edges(data=True):
-            self.__add_connection(node_0, node_1, properties)
-
-    def __add_connection(self, node_0, node_1, properties):
-    #======================================================
-        source = self.__components[node_0]
-        target = self.__components[node_1]
-        source_point = source.boundary_intersection(target.centre)
-        target_point = target.boundary_intersection(source.centre)
-        connection_id = self.__get_id()
-        path = svg_subelement(self.__diagram, 'path', {
-            'id': connection_id,
-            'class': 'celldl-Connection bondgraph electrical arrow',
-            'd': f'M{source_point[0]} {source_point[1]}L{target_point[0]} {target_point[1]}',
-        })
-        self.__celldl.add_connection(connection_id, source.id, target.id)
-
-    def __add_component(self, node, properties):
-    #===========================================
-        component = CellDLComponent(self.__get_id(), self.__positions[node], properties)
-        self.__diagram.append(component.svg())
-        self.__celldl.add_component(component.id)
-        self.__components[node] = component
+        layout = LAYOUT_METHODS.get(layout_method, nx.arf_layout)(*layout_params)
+        # Components and connections are numbered in the order of the graph's
+        # nodes and edges, and only created as the diagram is saved, so the
+        # graph mustn't be changed once it has been laid out
+        self.__graph = G
+        self.__node_numbers = {node: n for n, node in enumerate(G, 1)}
+        # The layout is held centred on the origin, in the order nodes are
+        # numbered, and scaled to fit the diagram's size
+        self.__layout = np.array([layout[node] for node in G], dtype=np.float64).reshape((-1, 2))
+        extent = 0.0
+        if len(self.__layout):
+            self.__layout -= self.__layout.mean(axis=0)
+            extent = float(np.abs(self.__layout).max())
+        self.__scale = (min(SVG_WIDTH, SVG_HEIGHT)/2)/extent if extent > 0 else 1.0
+        self.__positions = _grid_aligned(self.__scale*self.__layout)
+
+    def __tiled_positions(self) -> np.ndarray:
+    #=========================================
+        # The layout is scaled so that the median distance between nodes and
+        # their nearest neighbour is ``TILE_NODE_SPACING``, unless nodes are
+        # further apart than that in the untiled diagram
+        scale = self.__scale
+        if len(self.__layout) > 1:
+            (distances, _) = cKDTree(self.__layout).query(self.__layout, k=2)
+            if len(nearest := distances[:, 1][distances[:, 1] > 0]):
+                scale = max(scale, TILE_NODE_SPACING/float(np.median(nearest)))
+        return _grid_aligned(scale*self.__layout)
+
+    def __components(self, positions: Optional[np.ndarray]=None) -> Iterator[CellDLComponent]:
+    #=========================================================================================
+        if positions is None:
+            positions = self.__positions
+        for n, (_, properties) in enumerate(self.__graph.nodes(data=True)):
+            yield CellDLComponent(_element_id(n + 1), positions[n], properties)
+
+    def __connection_ids(self) -> Iterator[tuple[str, str, str]]:
+    #============================================================
+        # The id, and source and target component ids, of connections
+        node_numbers = self.__node_numbers
+        for number, (node_0, node_1) in enumerate(self.__graph.edges(), len(node_numbers) + 1):
+            yield (_element_id(number), _element_id(node_numbers[node_0]), _element_id(node_numbers[node_1]))
+
+    def __connections(self,
+    #======================
+                      positions: Optional[np.ndarray]=None) -> Iterator[tuple[str, str, str, list[float], list[float]]]:
+        # The id, source and target component ids, and end points of connections,
+        # with end points found for a chunk of edges at once
+        if positions is None:
+            positions = self.__positions
+        node_numbers = self.__node_numbers
+        number = len(node_numbers)
+        edges = iter(self.__graph.edges())
+        while len(chunk := list(islice(edges, CONNECTION_CHUNK_SIZE))):
+            source_centres = positions[[node_numbers[node_0] - 1 for node_0, _ in chunk]]
+            target_centres = positions[[node_numbers[node_1] - 1 for _, node_1 in chunk]]
+            source_points = _boundary_intersections(source_centres, target_centres).tolist()
+            target_points = _boundary_intersections(target_centres, source_centres).tolist()
+            for (node_0, node_1), source_point, target_point in zip(chunk, source_points, target_points):
+                number += 1
+                yield (_element_id(number), _element_id(node_numbers[node_0]), _element_id(node_numbers[node_1]),
+                       source_point, target_point)
+
+    def __diagram_elements(self) -> Iterator[etree._Element]:
+    #========================================================
+        # SVG elements are only created as the diagram is saved
+        for component in self.__components():
+            yield component.svg()
+        for (connection_id, _, _, source_point, target_point) in self.__connections():
+            yield _connection_element(connection_id, source_point, target_point)
+
+    def __metadata(self) -> Iterator[str]:
+    #=====================================
+        # Turtle for the diagram's components and connections, also only
+        # created as the diagram is saved
+        yield self.__celldl.turtle_header()
+        for number in range(1, len(self.__node_numbers) + 1):
+            yield component_turtle(_element_id(number))
+        for (connection_id, source_id, target_id) in self.__connection_ids():
+            yield connection_turtle(connection_id, source_id, target_id)
 
     def __create_diagram(self):
     #==========================
         self.__svg = svg_element('svg', nsmap={None: str(SVG_NS)},
-            viewBox=f'{-int(0.6*SVG_WIDTH)} {-int(0.6*SVG_HEIGHT)} {int(1.2*SVG_WIDTH)} {int(1.2*SVG_HEIGHT)}'
+            viewBox=' '.join(str(v) for v in VIEW_BOX)
         )
         self.__metadata_element = svg_subelement(self.__svg, 'metadata', {
             'id': CELLDL_METADATA_ID,
@@ -269,17 +407,181 @@ class Graph2CellDL:
             'class': CELLDL_LAYER_CLASS
         })
 
-    def __get_id(self) -> str:
-    #=========================
-        self.__last_id += 1
-        return f'ID-{self.__last_id:08d}'
-
-    def save_diagram(self, path: str|Path):
-    #======================================
-        self.__metadata_element.text = etree.CDATA(self.__celldl.as_turtle())
-        svg_tree = etree.ElementTree(self.__svg)
-        svg_tree.write(path,
-            encoding='utf-8', inclusive_ns_prefixes=['svg'],
-            pretty_print=True, xml_declaration=True)
+    def save_diagram(self, path: str|Path, streaming: bool=False):
+    #=============================================================
+        """
+        Save the diagram as CellDL.
+
+        :param path: The file to save the diagram in.
+        :param streaming: Write the metadata, components and connections to
+                          the file as they are created, rather than first
+                          building the complete SVG tree. The saved diagram
+                          is the same, except that long metadata is split
+                          into several CDATA sections, and memory use doesn't
+                          grow with the size of the diagram beyond that of
+                          its layout.
+        """
+        if streaming:
+            self.__stream_diagram(path, self.__diagram_elements(), self.__metadata())
+        else:
+            self.__metadata_element.text = etree.CDATA(''.join(self.__metadata()))
+            if len(self.__diagram) == 0:
+                self.__diagram.extend(self.__diagram_elements())
+            svg_tree = etree.ElementTree(self.__svg)
+            svg_tree.write(path,
+                encoding='utf-8', inclusive_ns_prefixes=['svg'],
+                pretty_print=True, xml_declaration=True)
+
+    def save_tiled_diagram(self, directory: str|Path, tile_size: int=TILE_SIZE):
+    #===========================================================================
+        """
+        Save the diagram as square tiles, along with an overview and an index,
+        for viewers of diagrams too large to load as a single file.
+
+        Each tile is a CellDL file, with its own ``viewBox``, that has the
+        components and connections overlapping the tile. The overview is a
+        CellDL file of the whole diagram with a component for each tile,
+        labelled with the number of components centred in the tile, and a
+        connection between tiles with connected components. The index gives
+        each tile's file, ``viewBox`` and the ids of its components and
+        connections, so that viewers can load only visible tiles.
+
+        Rather than being fitted to the untiled diagram's size, the layout is
+        scaled so that nodes are typically ``TILE_NODE_SPACING`` from their
+        nearest neighbour, and tiles cover the scaled layout's extent. Large
+        diagrams are then spread over more tiles, instead of their nodes
+        overlapping.
+
+        :param directory: The directory for the files, created if needed.
+        :param tile_size: The width and height of tiles, in SVG units.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        positions = self.__tiled_positions()
+        # Tiles start on the grid, with the top-left tile containing the
+        # top-left corner of the laid out components
+        (lower, upper) = (np.zeros(2), np.zeros(2))
+        if len(positions):
+            lower = positions.min(axis=0) - np.array(NODE_SIZE)/2
+            upper = positions.max(axis=0) + np.array(NODE_SIZE)/2
+        origin = tuple(int(v) for v in (GRID_SPACING*np.floor(lower/GRID_SPACING)).tolist())
+        (columns, rows) = (max(math.ceil((upper[axis] - origin[axis])/tile_size), 1) for axis in range(2))
+        diagram_view_box = [origin[0], origin[1], columns*tile_size, rows*tile_size]
+        def tile_index(x: float, y: float) -> tuple[int, int]:
+            return (min(max(math.floor((y - origin[1])/tile_size), 0), rows - 1),
+                    min(max(math.floor((x - origin[0])/tile_size), 0), columns - 1))
+        tile_components: dict[tuple[int, int], list[CellDLComponent]] = defaultdict(list)
+        centre_tiles: dict[str, tuple[int, int]] = {}
+        for component in self.__components(positions):
+            (x, y) = component.centre.tolist()
+            centre_tiles[component.id] = tile_index(x, y)
+            (top, left) = tile_index(x - NODE_SIZE[0]/2, y - NODE_SIZE[1]/2)
+            (bottom, right) = tile_index(x + NODE_SIZE[0]/2, y + NODE_SIZE[1]/2)
+            for row in range(top, bottom + 1):
+                for column in range(left, right + 1):
+                    tile_components[(row, column)].append(component)
+        tile_connections: dict[tuple[int, int], list[tuple]] = defaultdict(list)
+        for connection in self.__connections(positions):
+            if len(connection_tiles := _segment_tiles(connection[3], connection[4], tile_size, origin)) == 0:
+                # End points are undefined when connected components coincide
+                connection_tiles = list(dict.fromkeys([centre_tiles[connection[1]], centre_tiles[connection[2]]]))
+            for (row, column) in connection_tiles:
+                if 0 <= row < rows and 0 <= column < columns:
+                    tile_connections[(row, column)].append(connection)
+        tiles = []
+        for (row, column) in sorted(tile_components.keys() | tile_connections.keys()):
+            tile_id = f'tile-{row}-{column}'
+            components = tile_components.get((row, column), [])
+            connections = tile_connections.get((row, column), [])
+            metadata = CellDLGraph()
+            for component in components:
+                metadata.add_component(component.id)
+            for (connection_id, source_id, target_id, _, _) in connections:
+                metadata.add_connection(connection_id, source_id, target_id)
+            view_box = [origin[0] + column*tile_size, origin[1] + row*tile_size, tile_size, tile_size]
+            self.__stream_diagram(directory / f'{tile_id}.svg',
+                ([component.svg() for component in components]
+               + [_connection_element(connection_id, source_point, target_point)
+                    for (connection_id, _, _, source_point, target_point) in connections]),
+                [metadata.as_turtle().decode('utf-8')], view_box=view_box)
+            tiles.append({
+                'id': tile_id,
+                'file': f'{tile_id}.svg',
+                'row': row,
+                'column': column,
+                'view_box': view_box,
+                'components': [component.id for component in components],
+                'connections': [connection[0] for connection in connections],
+            })
+        self.__save_overview(directory / TILE_OVERVIEW_FILE, centre_tiles, positions, diagram_view_box)
+        with open(directory / TILE_INDEX_FILE, 'w') as fp:
+            json.dump({
+                'view_box': diagram_view_box,
+                'tile_size': tile_size,
+                'overview': TILE_OVERVIEW_FILE,
+                'tiles': tiles,
+            }, fp, indent=2)
+
+    def __save_overview(self, path: Path, centre_tiles: dict[str, tuple[int, int]],
+    #==============================================================================
+                        positions: np.ndarray, view_box: list[int]):
+        # Components are aggregated by the tile containing their centre, and
+        # connections by the tiles of the components they connect
+        tile_centres: dict[tuple[int, int], list[np.ndarray]] = defaultdict(list)
+        for component in self.__components(positions):
+            tile_centres[centre_tiles[component.id]].append(component.centre)
+        positions = _grid_align({tile: np.mean(centres, axis=0) for tile, centres in sorted(tile_centres.items())})
+        metadata = CellDLGraph()
+        aggregates: dict[tuple[int, int], CellDLComponent] = {}
+        for tile, centre in positions.items():
+            aggregates[tile] = CellDLComponent(f'tile-{tile[0]}-{tile[1]}', centre,
+                                               {'label': str(len(tile_centres[tile]))})
+            metadata.add_component(aggregates[tile].id)
+        tile_pairs = list(dict.fromkeys((centre_tiles[source_id], centre_tiles[target_id])
+                            for (_, source_id, target_id) in self.__connection_ids()
+                                if centre_tiles[source_id] != centre_tiles[target_id]))
+        connections = []
+        if len(tile_pairs):
+            source_centres = np.array([aggregates[source].centre for source, _ in tile_pairs])
+            target_centres = np.array([aggregates[target].centre for _, target in tile_pairs])
+            source_points = _boundary_intersections(source_centres, target_centres).tolist()
+            target_points = _boundary_intersections(target_centres, source_centres).tolist()
+            for (source, target), source_point, target_point in zip(tile_pairs, source_points, target_points):
+                connection_id = f'{aggregates[source].id}--{aggregates[target].id}'
+                metadata.add_connection(connection_id, aggregates[source].id, aggregates[target].id)
+                connections.append(_connection_element(connection_id, source_point, target_point))
+        self.__stream_diagram(path, [component.svg() for component in aggregates.values()] + connections,
+                              [metadata.as_turtle().decode('utf-8')], view_box=view_box)
+
+    def __stream_diagram(self, path: str|Path, diagram_elements: Iterable[etree._Element],
+    #=====================================================================================
+                         metadata: Iterable[str], view_box: Optional[list[int]]=None):
+        # Output is formatted as ``save_diagram`` pretty prints the SVG tree
+        attributes = dict(self.__svg.attrib)
+        if view_box is not None:
+            attributes['viewBox'] = ' '.join(str(v) for v in view_box)
+        with open(path, 'wb') as fp:
+            with etree.xmlfile(fp, encoding='UTF-8') as xf:
+                xf.write_declaration()
+                with xf.element(self.__svg.tag, attributes, nsmap=self.__svg.nsmap):
+                    for element in self.__svg:
+                        xf.write('\n  ')
+                        if element is self.__metadata_element:
+                            with xf.element(etree.QName(element).localname, element.attrib):
+                                for chunk in _joined_chunks(metadata, METADATA_CHUNK_SIZE):
+                                    xf.write(etree.CDATA(chunk))
+                        elif element is self.__diagram:
+                            with xf.element(etree.QName(element).localname, element.attrib):
+                                for diagram_element in diagram_elements:
+                                    etree.indent(diagram_element, space='  ', level=2)
+                                    xf.write('\n    ')
+                                    xf.write(_unqualified(diagram_element))
+                                xf.write('\n  ')
+                        else:
+                            # Existing whitespace in metadata and definitions
+                            # means they aren't reformatted by pretty printing
+                            xf.write(_unqualified(deepcopy(element)))
+                    xf.write('\n')
+            fp.write(b'\n')
 
 #===============================================================================
@@ -19,6 +19,7 @@
 #===============================================================================
 
 from datetime import datetime, UTC
+import re
 
 #===============================================================================
 
@@ -55,9 +56,42 @@ def make_uri(id: str) -> rdflib.URIRef:
 
 #===============================================================================
 
+# Components and connections are written as Turtle when they are added, rather
+# than as triples for rdflib to serialise. Ids are written as names in the
+# diagram's namespace when they are valid local names, otherwise as relative
+# IRIs. The Turtle starts with a prefix for every namespace bound to the graph,
+# so that statements can use any of them
+
+TURTLE_LOCAL_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_\-]*')
+
+TURTLE_IRI_ESCAPES = str.maketrans({c: f'\\u{ord(c):04X}' for c in '<>"{}|^`\\'}
+                                 | {chr(n): f'\\u{n:04X}' for n in range(0x21)})
+
+def turtle_term(id: str) -> str:
+#===============================
+    if TURTLE_LOCAL_NAME.fullmatch(id):
+        return f':{id}'
+    return f'<#{id.translate(TURTLE_IRI_ESCAPES)}>'
+
+def component_turtle(id: str) -> str:
+#====================================
+    return f'{turtle_term(id)} a celldl:Component .\n\n'
+
+def connection_turtle(id: str, source: str, target: str) -> str:
+#===============================================================
+    return (f'{turtle_term(id)} a celldl:Connection ;\n'
+            f'    celldl:hasSource {turtle_term(source)} ;\n'
+            f'    celldl:hasTarget {turtle_term(target)} .\n\n')
+
+# Relative IRIs are resolved against a base when Turtle is parsed
+
+_PARSE_BASE = 'urn:celldl:diagram'
+
+#===============================================================================
+
 class CellDLGraph:
     def __init__(self):
-        self.__graph = rdflib.Graph()
+        self.__graph = rdflib.Graph(bind_namespaces='core')
         self.__diagram = make_uri('')
         self.__graph.bind('', str(DIAGRAM_NS))
         for (prefix, ns) in STANDARD_NAMESPACES.items():
@@ -65,26 +99,57 @@ class CellDLGraph:
         self.__graph.add((self.__diagram, RDF_NS.type, CELLDL_NS.Document))
         self.__graph.add((self.__diagram, OWL_NS.versionInfo, rdflib.Literal(CELLDL_SCHEMA_VERSION)))
         self.__graph.add((self.__diagram, DCT_NS.created, rdflib.Literal(datetime.now(UTC).isoformat())))
+        # Turtle statements for components and connections, in the order added
+        self.__statements: list[str] = []
 
     def add_component(self, id: str):
     #================================
-        this = make_uri(id)
-        self.__graph.add((this, RDF_NS.type, CELLDL_NS.Component))
+        self.__statements.append(component_turtle(id))
 
     def add_connection(self, id: str, source: str, target: str):
     #===========================================================
-        this = make_uri(id)
-        self.__graph.add((this, RDF_NS.type, CELLDL_NS.Connection))
-        self.__graph.add((this, CELLDL_NS.hasSource, make_uri(source)))
-        self.__graph.add((this, CELLDL_NS.hasTarget, make_uri(target)))
+        self.__statements.append(connection_turtle(id, source, target))
 
     def as_turtle(self) -> bytes:
     #============================
-        return self.__graph.serialize(format='turtle', encoding='utf-8')
+        return (self.turtle_header() + ''.join(self.__statements)).encode('utf-8')
+
+    def turtle_header(self) -> str:
+    #==============================
+        """
+        Prefixes for the graph's namespaces and the document's own triples,
+        as Turtle that statements for components and connections follow.
+        """
+        namespace_manager = self.__graph.namespace_manager
+        statements = []
+        for subject in sorted(set(self.__graph.subjects())):
+            # A subject's type comes first
+            predicate_objects = sorted(
+                (predicate != RDF_NS.type, 'a' if predicate == RDF_NS.type else predicate.n3(namespace_manager),
+                 object.n3(namespace_manager)) for predicate, object in self.__graph.predicate_objects(subject))
+            statements.append(f'{subject.n3(namespace_manager)} '
+                            + ' ;\n    '.join(f'{predicate} {object}' for _, predicate, object in predicate_objects)
+                            + ' .\n\n')
+        # Terms are written before prefixes, as writing them can bind namespaces
+        prefixes = ''.join(f'@prefix {prefix}: <{namespace}> .\n'
+                            for prefix, namespace in sorted(namespace_manager.namespaces()))
+        return prefixes + '\n' + ''.join(statements)
 
     def as_xml(self) -> bytes:
     #=========================
-        return self.__graph.serialize(format='xml', encoding='utf-8')
+        return self.__rdf_graph().serialize(format='xml', encoding='utf-8')
+
+    def __rdf_graph(self) -> rdflib.Graph:
+    #=====================================
+        statements = rdflib.Graph().parse(data=self.as_turtle(), format='turtle', publicID=_PARSE_BASE)
+        graph = rdflib.Graph(namespace_manager=self.__graph.namespace_manager)
+        def relative(term):
+            if isinstance(term, rdflib.URIRef) and term.startswith(_PARSE_BASE):
+                return rdflib.URIRef(term[len(_PARSE_BASE):])
+            return term
+        for triple in statements:
+            graph.add(tuple(relative(term) for term in triple))
+        return graph
 
     def set_property(self, property: rdflib.URIRef, value: rdflib.Literal|rdflib.URIRef):
     #====================================================================================
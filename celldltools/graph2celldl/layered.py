@@ -0,0 +1,462 @@
+#===============================================================================
+#
+#  CellDL Editor and tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from bisect import bisect_left
+from typing import Any
+
+#===============================================================================
+
+import networkx as nx
+import numpy as np
+
+#===============================================================================
+
+"""
+A layered (Sugiyama-style) layout for directed graphs that are acyclic, or
+nearly so, and mostly trees, such as vascular networks.
+
+The layout is found in four steps, each taking time close to linear in the
+size of the graph:
+
+*   cycles are broken by reversing the back edges found by a depth-first
+    search,
+*   nodes are put into layers by their longest path from a source, and
+    then moved to shorten their edges, with edges that still span several
+    layers split by a dummy node in each layer they cross, shortest edges
+    first and up to a limit set by the number of nodes,
+*   nodes, including dummy nodes, are ordered within their layer by a
+    depth-first preorder, either of the graph or of a spanning tree in
+    which each node's parent is its closest predecessor, so that trees
+    start without crossings, followed by barycentre sweeps and then swaps
+    of adjacent nodes, keeping the ordering with the fewest crossings
+    between adjacent layers,
+*   each node is moved towards the median position of its neighbours in the
+    previous layer of a sweep, keeping the layer's order and spacing, and
+    each dummy node towards the straight line its edge is drawn along.
+    Edges are drawn straight, so a long edge can cross many more edges
+    than its dummy nodes do, and layers are instead evenly spaced about
+    their centre, as with ``networkx.bfs_layout``, when that draws fewer
+    crossings.
+
+Layers are placed along the x-axis, as with ``networkx.bfs_layout``.
+"""
+
+LAYERING_SWEEPS = 2
+
+# Long edges of dense graphs can need many more dummy nodes than the graph
+# has nodes, so no more than this many are added for each node
+
+MAX_DUMMY_NODES = 8
+
+ORDERING_SWEEPS = 4
+
+TRANSPOSE_PASSES = 4
+
+PLACEMENT_SWEEPS = 4
+
+#===============================================================================
+
+def _acyclic_edges(node_count: int, successors: list[list[int]]) -> list[tuple[int, int]]:
+#=========================================================================================
+    # Back edges of an iterative depth-first search are reversed, with searches
+    # started from sources before any other unvisited nodes
+    has_predecessor = [False]*node_count
+    for targets in successors:
+        for target in targets:
+            has_predecessor[target] = True
+    roots = ([n for n in range(node_count) if not has_predecessor[n]]
+           + [n for n in range(node_count) if has_predecessor[n]])
+    UNSEEN, ACTIVE, DONE = 0, 1, 2
+    state = [UNSEEN]*node_count
+    edges = []
+    for root in roots:
+        if state[root] != UNSEEN:
+            continue
+        state[root] = ACTIVE
+        stack = [(root, iter(successors[root]))]
+        while len(stack):
+            (node, targets) = stack[-1]
+            for target in targets:
+                if state[target] == ACTIVE:
+                    if target != node:
+                        edges.append((target, node))
+                else:
+                    edges.append((node, target))
+                    if state[target] == UNSEEN:
+                        state[target] = ACTIVE
+                        stack.append((target, iter(successors[target])))
+                        break
+            else:
+                state[node] = DONE
+                stack.pop()
+    return edges
+
+def _assign_layers(node_count: int, predecessors: list[list[int]], successors: list[list[int]]) -> list[int]:
+#============================================================================================================
+    in_degree = [len(sources) for sources in predecessors]
+    order = [n for n in range(node_count) if in_degree[n] == 0]
+    layer = [0]*node_count
+    for node in order:                  # ``order`` grows into a topological order
+        for target in successors[node]:
+            layer[target] = max(layer[target], layer[node] + 1)
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                order.append(target)
+    # Shorten edges by moving each node to the median of the layers its
+    # neighbours would have it in, within the range allowed by its edges
+    for _ in range(LAYERING_SWEEPS):
+        for node in reversed(order):
+            _shorten_edges(node, layer, predecessors[node], successors[node])
+        for node in order:
+            _shorten_edges(node, layer, predecessors[node], successors[node])
+    lowest = min(layer)
+    return [l - lowest for l in layer]
+
+def _shorten_edges(node: int, layer: list[int], predecessors: list[int], successors: list[int]):
+#===============================================================================================
+    wanted = sorted([layer[source] + 1 for source in predecessors] + [layer[target] - 1 for target in successors])
+    if len(wanted):
+        preferred = wanted[(len(wanted) - 1)//2]
+        if len(predecessors):
+            preferred = max(preferred, max(layer[source] for source in predecessors) + 1)
+        if len(successors):
+            preferred = min(preferred, min(layer[target] for target in successors) - 1)
+        layer[node] = preferred
+
+def _split_long_edges(successors: list[list[int]],
+#=================================================
+                      layer: list[int]) -> tuple[list[list[int]], list[list[int]], list[int], list[tuple[int, int, float]]]:
+    # Dummy nodes are numbered after the graph's nodes, with a dummy in each
+    # layer between the ends of an edge so that every edge spans one layer.
+    # The ends of each dummy's edge are also returned, along with how far
+    # along the edge the dummy is. Edges are split shortest first, and once
+    # ``MAX_DUMMY_NODES`` per node have been added longer edges are left as
+    # they are
+    layer = list(layer)
+    node_count = len(layer)
+    long_edges = sorted(((layer[target] - layer[node], node, target)
+                            for node, targets in enumerate(successors)
+                                for target in targets if layer[target] > layer[node] + 1),
+                        key=lambda edge: edge[0])
+    dummy_count = 0
+    split_edges = set()
+    for span, node, target in long_edges:
+        if dummy_count + span - 1 > MAX_DUMMY_NODES*node_count:
+            break
+        dummy_count += span - 1
+        split_edges.add((node, target))
+    split_successors: list[list[int]] = [[] for _ in layer]
+    dummy_ends: list[tuple[int, int, float]] = []
+    for node, targets in enumerate(successors):
+        for target in targets:
+            source = node
+            if (node, target) in split_edges:
+                span = layer[target] - layer[node]
+                for l in range(layer[node] + 1, layer[target]):
+                    dummy = len(layer)
+                    layer.append(l)
+                    split_successors.append([])
+                    split_successors[source].append(dummy)
+                    dummy_ends.append((node, target, (l - layer[node])/span))
+                    source = dummy
+            split_successors[source].append(target)
+    split_predecessors: list[list[int]] = [[] for _ in layer]
+    for node, targets in enumerate(split_successors):
+        for target in targets:
+            split_predecessors[target].append(node)
+    return (split_successors, split_predecessors, layer, dummy_ends)
+
+def _preorder(node_count: int, successors: list[list[int]], predecessors: list[list[int]]) -> list[int]:
+#=======================================================================================================
+    preorder = [-1]*node_count
+    count = 0
+    roots = ([n for n in range(node_count) if len(predecessors[n]) == 0]
+           + list(range(node_count)))
+    for root in roots:
+        if preorder[root] >= 0:
+            continue
+        stack = [root]
+        while len(stack):
+            node = stack.pop()
+            if preorder[node] < 0:
+                preorder[node] = count
+                count += 1
+                stack.extend(reversed(successors[node]))
+    return preorder
+
+def _spanning_tree(layer: list[int], predecessors: list[list[int]],
+#==================================================================
+                   graph_count: int) -> tuple[list[list[int]], list[list[int]]]:
+    # The children and parent of each node of a spanning forest, with a node's
+    # parent its predecessor in the closest layer, preferring the graph's nodes
+    # to dummy nodes and then the first given. Edges that join one subtree to
+    # another then don't move the second subtree next to the first
+    children: list[list[int]] = [[] for _ in layer]
+    parents: list[list[int]] = [[] for _ in layer]
+    for node, sources in enumerate(predecessors):
+        if len(sources):
+            parent = max(sources, key=lambda source: (layer[source], source < graph_count))
+            children[parent].append(node)
+            parents[node].append(parent)
+    return (children, parents)
+
+#===============================================================================
+
+def _crossings(lower: list[int], edges: list[tuple[int, int]], position: list[int]) -> int:
+#==========================================================================================
+    # Crossings between two adjacent layers, as the number of inversions of
+    # the lower ends of edges sorted by their upper ends, counted with a
+    # Fenwick tree
+    ends = sorted((position[u], position[v]) for u, v in edges)
+    size = len(lower) + 1
+    tree = [0]*(size + 1)
+    crossings = 0
+    for count, (_, end) in enumerate(ends):
+        index = end + 1
+        below = 0
+        while index > 0:
+            below += tree[index]
+            index -= index & -index
+        crossings += count - below
+        index = end + 1
+        while index <= size:
+            tree[index] += 1
+            index += index & -index
+    return crossings
+
+def _total_crossings(layers: list[list[int]], layer_edges: list[list[tuple[int, int]]],
+#======================================================================================
+                     position: list[int]) -> int:
+    return sum(_crossings(layers[l + 1], layer_edges[l], position)
+                for l in range(len(layers) - 1))
+
+def _spread_layers(layers: list[list[int]], node_count: int) -> list[float]:
+#===========================================================================
+    coordinate = [0.0]*node_count
+    for layer in layers:
+        centre = (len(layer) - 1)/2
+        for n, node in enumerate(layer):
+            coordinate[node] = n - centre
+    return coordinate
+
+def _drawn_crossings(layers: list[list[int]], layer_edges: list[list[tuple[int, int]]],
+#======================================================================================
+                     coordinate: list[float], dummy_ends: list[tuple[int, int, float]]) -> int:
+    # Crossings of edges drawn as straight lines, with each dummy node taken
+    # to be where its edge crosses its layer
+    graph_count = len(coordinate) - len(dummy_ends)
+    drawn = coordinate[:graph_count] + [coordinate[source] + fraction*(coordinate[target] - coordinate[source])
+                                            for (source, target, fraction) in dummy_ends]
+    rank = [0]*len(drawn)
+    for layer in layers:
+        for n, node in enumerate(sorted(layer, key=drawn.__getitem__)):
+            rank[node] = n
+    return _total_crossings(layers, layer_edges, rank)
+
+def _pair_crossings(left: list[int], right: list[int], position: list[int]) -> int:
+#==================================================================================
+    # Crossings between the edges of two adjacent nodes to one neighbouring
+    # layer, with ``left`` the neighbours of the first node
+    if len(left) == 0 or len(right) == 0:
+        return 0
+    right_positions = sorted(position[node] for node in right)
+    return sum(bisect_left(right_positions, position[node]) for node in left)
+
+def _transpose(layers: list[list[int]], upper: list[list[int]], lower: list[list[int]], position: list[int]):
+#============================================================================================================
+    # Swap adjacent nodes of a layer when that removes crossings, with ``upper``
+    # and ``lower`` the neighbours of each node in the layers either side
+    for _ in range(TRANSPOSE_PASSES):
+        swapped = False
+        for layer in layers:
+            for n in range(len(layer) - 1):
+                (node_0, node_1) = (layer[n], layer[n + 1])
+                if (_pair_crossings(upper[node_1], upper[node_0], position)
+                  + _pair_crossings(lower[node_1], lower[node_0], position)
+                  < _pair_crossings(upper[node_0], upper[node_1], position)
+                  + _pair_crossings(lower[node_0], lower[node_1], position)):
+                    (layer[n], layer[n + 1]) = (node_1, node_0)
+                    (position[node_0], position[node_1]) = (n + 1, n)
+                    swapped = True
+        if not swapped:
+            break
+
+def _order_layers(orderings: list[list[list[int]]], layer_edges: list[list[tuple[int, int]]],
+#============================================================================================
+                  dummy_ends: list[tuple[int, int, float]]) -> list[list[int]]:
+    # Orderings are compared by the crossings of their edges when drawn across
+    # evenly spaced layers, with sweeps using the same coordinates and each
+    # dummy node kept to where its edge is drawn across its layer. Only
+    # neighbours in adjacent layers are used, as for counting crossings
+    node_count = sum(len(layer) for layer in orderings[0])
+    graph_count = node_count - len(dummy_ends)
+    upper: list[list[int]] = [[] for _ in range(node_count)]
+    lower: list[list[int]] = [[] for _ in range(node_count)]
+    for edges in layer_edges:
+        for u, v in edges:
+            upper[v].append(u)
+            lower[u].append(v)
+    def crossings(layers: list[list[int]]) -> int:
+        return _drawn_crossings(layers, layer_edges, _spread_layers(layers, node_count), dummy_ends)
+    (best, best_crossings) = min(((ordering, crossings(ordering)) for ordering in orderings),
+                                 key=lambda ordering: ordering[1])
+    layers = [list(layer) for layer in best]
+    coordinate = _spread_layers(layers, node_count)
+    def sweep(order: range, step: int, neighbours: list[list[int]]):
+        for l in order:
+            layer = layers[l]
+            # Barycentres are scaled from the neighbouring layer's width to this one's
+            scale = len(layer)/len(layers[l - step])
+            keys = {}
+            for node in layer:
+                if node >= graph_count:
+                    (source, target, fraction) = dummy_ends[node - graph_count]
+                    keys[node] = coordinate[source] + fraction*(coordinate[target] - coordinate[source])
+                elif len(adjacent := neighbours[node]):
+                    keys[node] = scale*sum(coordinate[m] for m in adjacent)/len(adjacent)
+                else:
+                    keys[node] = coordinate[node]
+            layer.sort(key=keys.__getitem__)
+            centre = (len(layer) - 1)/2
+            for n, node in enumerate(layer):
+                coordinate[node] = n - centre
+    for _ in range(ORDERING_SWEEPS):
+        # Orderings are compared after each sweep, as a sweep in one direction
+        # can undo the improvements made by one in the other
+        for (order, step, neighbours) in ((range(1, len(layers)), 1, upper),
+                                          (range(len(layers) - 2, -1, -1), -1, lower)):
+            if best_crossings == 0:
+                break
+            sweep(order, step, neighbours)
+            if (sweep_crossings := crossings(layers)) < best_crossings:
+                best = [list(layer) for layer in layers]
+                best_crossings = sweep_crossings
+    if best_crossings:
+        layers = [list(layer) for layer in best]
+        position = [0]*node_count
+        for layer in layers:
+            for n, node in enumerate(layer):
+                position[node] = n
+        _transpose(layers, upper, lower, position)
+        if crossings(layers) < best_crossings:
+            best = layers
+    return best
+
+def _median(values: list[float]) -> float:
+#=========================================
+    if len(values) == 1:
+        return values[0]
+    values = sorted(values)
+    middle = len(values)//2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle])/2
+
+def _place_layers(layers: list[list[int]], predecessors: list[list[int]], successors: list[list[int]],
+#=====================================================================================================
+                  dummy_ends: list[tuple[int, int, float]]) -> list[float]:
+    node_count = len(predecessors)
+    graph_count = node_count - len(dummy_ends)
+    coordinate = [0.0]*node_count
+    for layer in layers:
+        for n, node in enumerate(layer):
+            coordinate[node] = float(n)
+    def wanted(node: int, neighbours: list[list[int]]) -> float:
+        if node >= graph_count:
+            # Dummy nodes are kept on the straight line between the ends of
+            # their edge, which is how the edge is drawn
+            (source, target, fraction) = dummy_ends[node - graph_count]
+            return coordinate[source] + fraction*(coordinate[target] - coordinate[source])
+        elif len(adjacent := neighbours[node]):
+            return _median([coordinate[m] for m in adjacent])
+        return coordinate[node]
+    def sweep(order: range, neighbours: list[list[int]]):
+        for l in order:
+            layer = layers[l]
+            desired = np.array([wanted(node, neighbours) for node in layer])
+            # Closest positions to ``desired`` that keep nodes in order and at
+            # least a unit apart, pushing right and pushing left, averaged
+            spacing = np.arange(len(layer))
+            offset = desired - spacing
+            right = np.maximum.accumulate(offset)
+            left = np.minimum.accumulate(offset[::-1])[::-1]
+            for node, value in zip(layer, ((right + left)/2 + spacing).tolist()):
+                coordinate[node] = value
+    for _ in range(PLACEMENT_SWEEPS):
+        sweep(range(1, len(layers)), predecessors)
+        sweep(range(len(layers) - 2, -1, -1), successors)
+    return coordinate
+
+#===============================================================================
+
+def layered_layout(G: nx.Graph, layer_spacing: float=2.0) -> dict[Any, np.ndarray]:
+#==================================================================================
+    """
+    Position nodes in layers, with edges directed from lower to higher
+    layers where possible.
+
+    :param G: The graph to lay out. Edges of an undirected graph are taken
+              in the direction given by ``G.edges``.
+    :param layer_spacing: The distance between layers, relative to the
+                          distance between adjacent nodes in a layer.
+    :returns: A dictionary of positions keyed by node.
+    """
+    nodes = list(G)
+    if len(nodes) == 0:
+        return {}
+    index = {node: n for n, node in enumerate(nodes)}
+    graph_successors: list[list[int]] = [[] for _ in nodes]
+    for u, v in G.edges():
+        graph_successors[index[u]].append(index[v])
+    node_count = len(nodes)
+
+    edges = _acyclic_edges(node_count, graph_successors)
+    successors: list[list[int]] = [[] for _ in nodes]
+    predecessors: list[list[int]] = [[] for _ in nodes]
+    for u, v in dict.fromkeys(edges):
+        successors[u].append(v)
+        predecessors[v].append(u)
+
+    layer = _assign_layers(node_count, predecessors, successors)
+    (successors, predecessors, layer, dummy_ends) = _split_long_edges(successors, layer)
+    total_count = len(layer)
+    layer_count = max(layer) + 1
+    layer_edges: list[list[tuple[int, int]]] = [[] for _ in range(layer_count)]
+    for u, targets in enumerate(successors):
+        for v in targets:
+            if layer[v] == layer[u] + 1:
+                layer_edges[layer[u]].append((u, v))
+    # Layers start in whichever preorder, of the graph or of a spanning tree,
+    # has fewer crossings
+    orderings = []
+    for preorder in (_preorder(total_count, successors, predecessors),
+                     _preorder(total_count, *_spanning_tree(layer, predecessors, node_count))):
+        ordering: list[list[int]] = [[] for _ in range(layer_count)]
+        for node in sorted(range(total_count), key=preorder.__getitem__):
+            ordering[layer[node]].append(node)
+        orderings.append(ordering)
+    layers = _order_layers(orderings, layer_edges, dummy_ends)
+
+    coordinate = _place_layers(layers, predecessors, successors, dummy_ends)
+    spread = _spread_layers(layers, total_count)
+    if (_drawn_crossings(layers, layer_edges, spread, dummy_ends)
+      < _drawn_crossings(layers, layer_edges, coordinate, dummy_ends)):
+        coordinate = spread
+    return {node: np.array([layer_spacing*layer[n], coordinate[n]]) for n, node in enumerate(nodes)}
+
+#===============================================================================
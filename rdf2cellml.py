@@ -18,11 +18,20 @@
 #
 #===============================================================================
 
+from concurrent.futures import ProcessPoolExecutor
+import os
+from pathlib import Path
+import re
+import sys
+from typing import Optional
+
+#===============================================================================
+
 from celldltools.graph2celldl import Graph2CellDL
 
 from bondgraph.bondgraph import load_model
-from bondgraph.bondgraph.cellml import CellMLModel
-from bondgraph.bondgraph.template import TemplateRegistry
+from bondgraph.bondgraph.cellml import CellMLWriter
+from bondgraph.bondgraph.template import DEFAULT_CACHE_DIR, TemplateRegistry
 
 #===============================================================================
 
@@ -30,6 +39,87 @@ __version__ = '1.2.1'
 
 #===============================================================================
 
+def convert_model(registry: TemplateRegistry, model_file: str, cellml_file: str, celldl_file: Optional[str]=None,
+#================================================================================================================
+                  processes: int=1, celldl_tiles: Optional[str]=None):
+    model = load_model(model_file, registry)
+    if model is None:
+        raise TypeError('The model could not be loaded')
+    elif model.disconnected:
+        raise ValueError(f'Model is not a connected bondgraph ({model.component_count} components)...')
+
+    if celldl_file or celldl_tiles:
+        G = model.nx_graph()
+        celldl = Graph2CellDL(G)
+        if celldl_file:
+            celldl.save_diagram(celldl_file, streaming=True)
+        if celldl_tiles:
+            celldl.save_tiled_diagram(celldl_tiles)
+
+    cellml = CellMLWriter(model.name)
+    with open(cellml_file, 'wb') as fp:
+        cellml.write(fp, model.nodes, processes=processes)
+
+#===============================================================================
+
+# Each worker process has its own template registry. Workers that are forked
+# inherit the registry loaded by the main process; otherwise it is loaded (from
+# the template cache if enabled) when the worker starts.
+
+_registry: Optional[TemplateRegistry] = None
+
+def _init_worker(template_file: str, cache_dir: Optional[str|Path]):
+#===================================================================
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry(template_file, cache_dir=cache_dir)
+
+def _convert_job(job: tuple[str, ...]) -> Optional[str]:
+#=======================================================
+    try:
+        convert_model(_registry, *job)      # type: ignore
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
+
+# A ``#`` starts a comment at the start of a line or after whitespace, so
+# can still be used in paths
+
+MANIFEST_COMMENT = re.compile(r'(?:^|\s)#')
+
+def read_manifest(manifest: str) -> list[tuple[str, ...]]:
+#=========================================================
+    # Each line gives a MODEL_FILE, CELLML_FILE and optional CELLDL_FILE,
+    # with relative paths taken as relative to the manifest
+    base = Path(manifest).parent
+    jobs = []
+    with open(manifest) as fp:
+        for line_number, line in enumerate(fp, 1):
+            fields = MANIFEST_COMMENT.split(line, 1)[0].split()
+            if len(fields) == 0:
+                continue
+            elif len(fields) not in [2, 3]:
+                raise ValueError(f'{manifest}, line {line_number}: expected MODEL_FILE CELLML_FILE [CELLDL_FILE]')
+            jobs.append(tuple(str(base / field) for field in fields))
+    return jobs
+
+def convert_batch(template_file: str, jobs: list[tuple[str, ...]],
+#=================================================================
+                  cache_dir: Optional[str|Path]=None, processes: int=1) -> dict[int, str]:
+    """
+    Convert each job's model, returning errors keyed by the job's index.
+    """
+    global _registry
+    _registry = TemplateRegistry(template_file, cache_dir=cache_dir)
+    if processes <= 1 or len(jobs) <= 1:
+        errors = [_convert_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(template_file, cache_dir)) as executor:
+            errors = list(executor.map(_convert_job, jobs))
+    return {index: error for index, error in enumerate(errors) if error is not None}
+
+#===============================================================================
+
 def main():
 #==========
     import argparse
@@ -37,28 +127,40 @@ def main():
     parser = argparse.ArgumentParser(description='Generate CellML for a bondgraph model specified in RDF')
     parser.add_argument('--version', action='version', version=f'Version {__version__}')
     parser.add_argument('--celldl', metavar='CELLDL_FILE', help='The name for the CellDL (SVG) output file. Optional')
+    parser.add_argument('--celldl-tiles', metavar='DIRECTORY',
+        help='A directory for the CellDL diagram as tiles, with an overview and index, for viewing large models. Optional')
+    parser.add_argument('--cache-dir', metavar='CACHE_DIR', default=DEFAULT_CACHE_DIR,
+        help=f'Directory for compiled template libraries. Default: {DEFAULT_CACHE_DIR}')
+    parser.add_argument('--no-cache', action='store_true', help="Don't cache compiled template libraries")
+    parser.add_argument('--batch', metavar='MANIFEST',
+        help='Convert the models listed in MANIFEST, one `MODEL_FILE CELLML_FILE [CELLDL_FILE]` per line')
+    parser.add_argument('--jobs', metavar='N', type=int,
+        help='The number of worker processes to use. Default: the number of CPUs with --batch, otherwise 1')
     parser.add_argument('template', metavar='TEMPLATE_FILE', help='A template file defining bondgraph components in RDF')
-    parser.add_argument('model', metavar='MODEL_FILE', help='The RDF definition of a model')
-    parser.add_argument('cellml', metavar='CELLML_FILE', help='The name for the resulting CellML file')
+    parser.add_argument('model', metavar='MODEL_FILE', nargs='?', help='The RDF definition of a model')
+    parser.add_argument('cellml', metavar='CELLML_FILE', nargs='?', help='The name for the resulting CellML file')
     args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
 
-    registry = TemplateRegistry(args.template)
-    model = load_model(args.model, registry)
-    if model is None:
-        raise TypeError('The model could not be loaded')
-    elif model.disconnected:
-        raise ValueError('Model is not a connected bondgraph...')
-
-    if args.celldl:
-        G = model.nx_graph()
-        celldl = Graph2CellDL(G)
-        celldl.save_diagram(args.celldl)
-
-    cellml = CellMLModel(model.name)
-    for node in model.nodes:
-        cellml.add_node(node)
-    with open(args.cellml, 'wb') as fp:
-        fp.write(cellml.to_xml())
+    if args.batch:
+        if args.model or args.cellml or args.celldl:
+            parser.error('MODEL_FILE, CELLML_FILE and --celldl are given in the manifest when using --batch')
+        elif args.celldl_tiles:
+            parser.error("--celldl-tiles can't be used with --batch")
+        jobs = read_manifest(args.batch)
+        processes = args.jobs if args.jobs is not None else (os.cpu_count() or 1)
+        errors = convert_batch(args.template, jobs, cache_dir=cache_dir, processes=processes)
+        for index, error in errors.items():
+            print(f'Model {index + 1} ({jobs[index][0]}): {error}', file=sys.stderr)
+        print(f'Converted {len(jobs) - len(errors)} of {len(jobs)} models', file=sys.stderr)
+        if len(errors):
+            sys.exit(1)
+    elif args.model and args.cellml:
+        registry = TemplateRegistry(args.template, cache_dir=cache_dir)
+        convert_model(registry, args.model, args.cellml, args.celldl,
+                      processes=args.jobs if args.jobs is not None else 1, celldl_tiles=args.celldl_tiles)
+    else:
+        parser.error('MODEL_FILE and CELLML_FILE are required unless --batch is given')
 
 #===============================================================================
 
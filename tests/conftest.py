@@ -0,0 +1,62 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+from pathlib import Path
+import sys
+
+#===============================================================================
+
+import pytest
+
+#===============================================================================
+
+ROOT = Path(__file__).absolute().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bondgraph.bondgraph.template import TemplateRegistry
+from tests.specifications import random_tree_specification
+
+#===============================================================================
+
+DATA_DIR = ROOT / 'data'
+
+TEMPLATE_FILE = DATA_DIR / 'vascular-segment-template.ttl'
+
+SPECIFICATIONS = ['single-segment.ttl', 'stomach-spleen.ttl']
+
+#===============================================================================
+
+@pytest.fixture(scope='session')
+def registry() -> TemplateRegistry:
+    return TemplateRegistry(str(TEMPLATE_FILE))
+
+@pytest.fixture(scope='session')
+def tree_specification(tmp_path_factory) -> str:
+    spec_file = tmp_path_factory.mktemp('specifications') / 'tree.ttl'
+    spec_file.write_text(random_tree_specification(50))
+    return str(spec_file)
+
+@pytest.fixture(scope='session', params=SPECIFICATIONS + ['tree'])
+def specification(request, tree_specification) -> str:
+    if request.param == 'tree':
+        return tree_specification
+    return str(DATA_DIR / request.param)
+
+#===============================================================================
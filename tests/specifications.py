@@ -0,0 +1,62 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+"""
+Bondgraph model specifications for tests and benchmarks.
+"""
+
+import random
+
+#===============================================================================
+
+SPECIFICATION_PREFIXES = """@prefix : <#> .
+@prefix bg: <http://celldl.org/ontologies/bond-graph#> .
+@prefix cdt: <https://w3id.org/cdt/> .
+@prefix lib: <http://celldl.org/templates/vascular#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix tpl: <http://celldl.org/ontologies/model-template#> .
+"""
+
+#===============================================================================
+
+def random_tree_specification(segments: int, seed: int=0) -> str:
+#================================================================
+    rng = random.Random(seed)
+    lines = [SPECIFICATION_PREFIXES,
+             ':tree a bg:Model ;',
+             "    rdfs:label 'Random tree' ;",
+             '    bg:component']
+    components = []
+    for n in range(1, segments + 1):
+        parent = rng.randrange(n)
+        components.append(f"""    [ tpl:template lib:segment-template ;
+        tpl:interface [ tpl:node lib:segment-model:pressure_1 ; bg:node :u_{parent} ],
+            [ tpl:node lib:segment-model:flow ; bg:node :v_{n} ],
+            [ tpl:node lib:segment-model:pressure_2 ; bg:node :u_{n} ] ]""")
+    lines.append(',\n'.join(components) + ' .')
+    lines.append(':u_0 bg:value "16 kPa"^^cdt:ucum .')
+    for n in range(1, segments + 1):
+        lines.append(f""":u_{n} bg:quantities [ bg:quantity lib:elastance ; bg:name :E_{n} ; bg:value "400 kPa/L"^^cdt:ucum ],
+    [ bg:quantity lib:fixed-volume ; bg:name :q_{n}_us ; bg:value "0.06 L"^^cdt:ucum ],
+    [ bg:quantity lib:volume ; bg:name :q_{n} ; bg:value "0.1 L"^^cdt:ucum ] .
+:v_{n} bg:quantities [ bg:quantity lib:resistance ; bg:name :R_{n} ; bg:value "100 kPa.s/L"^^cdt:ucum ] .""")
+    return '\n'.join(lines) + '\n'
+
+#===============================================================================
@@ -0,0 +1,170 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+import pytest
+from rdflib import URIRef
+
+#===============================================================================
+
+from bondgraph.bondgraph import BondgraphModel
+from bondgraph.bondgraph.bondgraph import MAX_NEIGHBOUR_TUPLE, BondgraphNode
+from bondgraph.bondgraph.definitions import NS_MAP
+from bondgraph.bondgraph.quantity import Units, Value
+
+#===============================================================================
+
+NODE_TYPE = URIRef('http://celldl.org/ontologies/bond-graph#ZeroNode')
+
+def example_model() -> BondgraphModel:
+    ns_map = NS_MAP.copy()
+    ns_map.add_namespace('', 'http://example.org/model#')
+    return BondgraphModel(ns_map.uri(':model'), ns_map)
+
+#===============================================================================
+
+def test_properties_read_only():
+    properties = {'colour': 'red'}
+    node = BondgraphNode(URIRef('http://example.org/model#n'), NODE_TYPE, Units.from_ucum('kPa'),
+                         properties=properties)
+    with pytest.raises(TypeError):
+        node.properties['colour'] = 'blue'                  # type: ignore [index]
+    properties['colour'] = 'blue'
+    assert node.get_property('colour') == 'red'
+    empty = BondgraphNode(URIRef('http://example.org/model#e'), NODE_TYPE, Units.from_ucum('kPa'))
+    with pytest.raises(TypeError):
+        empty.properties['colour'] = 'blue'                 # type: ignore [index]
+
+def test_copies_share_properties(registry):
+    template = registry.get_template(NS_MAP.uri('lib:segment-template'))
+    for template_node in template.model.nodes:
+        copy = template_node.copy()
+        assert copy.properties is template_node.properties
+
+def test_many_neighbours():
+    model = example_model()
+    units = Units.from_ucum('kPa')
+    hub = model.add_node(model.ns_map.uri(':hub'), NODE_TYPE, units)
+    count = 2*MAX_NEIGHBOUR_TUPLE + 1
+    for n in range(count):
+        node = model.add_node(model.ns_map.uri(f':n_{n}'), NODE_TYPE, units)
+        model.add_bond(model.ns_map.uri(f':in_{n}'), node.uri, hub.uri)
+        model.add_bond(model.ns_map.uri(f':out_{n}'), hub.uri, node.uri)
+    expected = [model.ns_map.uri(f':n_{n}') for n in range(count)]
+    assert [node.uri for node in hub.sources] == expected
+    assert [node.uri for node in hub.targets] == expected
+    model.freeze()
+    assert [node.uri for node in hub.sources] == expected
+    assert [node.uri for node in hub.targets] == expected
+
+SEGMENT_TEMPLATE = URIRef('http://celldl.org/templates/vascular#segment-template')
+SEGMENT_PORTS = [URIRef(f'http://celldl.org/templates/vascular#segment-model:{port}')
+                    for port in ['pressure_1', 'flow', 'pressure_2']]
+
+def test_instantiate_many(registry):
+    # A chain of segments, with each segment's outlet the next one's inlet
+    template = registry.get_template(SEGMENT_TEMPLATE)
+    template_nodes = len(template.model.nodes)
+    template_bonds = len(template.model.bonds)
+    model = example_model()
+    inlet = model.add_node(URIRef('http://example.org/model#u_0'), NODE_TYPE, Units.from_ucum('kPa'))
+    segments = 5
+    model.instantiate_many(template, [dict(zip(SEGMENT_PORTS,
+                                               [URIRef(f'http://example.org/model#{name}')
+                                                    for name in [f'u_{n}', f'v_{n + 1}', f'u_{n + 1}']]))
+                                        for n in range(segments)])
+    # Existing nodes are kept, and shared ports are only added once
+    assert model.get_node(inlet.uri) is inlet
+    assert len(model.nodes) == segments*template_nodes - (segments - 1)
+    assert len(model.bonds) == segments*template_bonds
+    # Nodes and bonds that aren't bound are numbered in the order they're added
+    names = [str(uri).rsplit('#', 1)[1] for uri in [node.uri for node in model.nodes]
+                                                  + [bond.uri for bond in model.bonds]]
+    ids = sorted(name for name in names if name.startswith('ID-'))
+    assert len(ids) >= len(model.bonds)
+    assert ids == [f'ID-{n:08d}' for n in range(1, len(ids) + 1)]
+    assert not model.disconnected
+    model.freeze()
+    with pytest.raises(ValueError):
+        model.instantiate_many(template, [{}])
+
+def test_separate_components():
+    model = example_model()
+    units = Units.from_ucum('kPa')
+    chains = {'a': 3, 'b': 2}
+    for chain, length in chains.items():
+        for n in range(length):
+            model.add_node(model.ns_map.uri(f':{chain}_{n}'), NODE_TYPE, units)
+            if n > 0:
+                model.add_bond(model.ns_map.uri(f':{chain}_bond_{n}'),
+                               model.ns_map.uri(f':{chain}_{n - 1}'), model.ns_map.uri(f':{chain}_{n}'))
+    # Components are listed largest first
+    expected = [{model.ns_map.uri(f':{chain}_{n}') for n in range(length)} for chain, length in chains.items()]
+    assert model.component_count == 2 and model.disconnected
+    assert [set(component) for component in model.components()] == expected
+    model.freeze()
+    assert model.component_count == 2
+    assert [set(component) for component in model.components()] == expected
+    # A bond between the subgraphs joins them
+    joined = example_model()
+    for node in model.nodes:
+        joined.add_node(node.uri, NODE_TYPE, units)
+    for bond in model.bonds:
+        joined.add_bond(bond.uri, bond.nodes[0].uri, bond.nodes[1].uri)
+    joined.add_bond(joined.ns_map.uri(':join'), joined.ns_map.uri(':a_2'), joined.ns_map.uri(':b_0'))
+    assert joined.component_count == 1 and not joined.disconnected
+    assert [set(component) for component in joined.components()] == [expected[0] | expected[1]]
+
+def test_assign_quantity_values(registry):
+    template = registry.get_template(SEGMENT_TEMPLATE)
+    model = example_model()
+    model.instantiate_many(template, [{}])
+    (node, neighbour) = model.nodes[:2]
+    resistance = NS_MAP.uri('lib:resistance')
+    neighbour.set_quantity_value(resistance, model.ns_map.uri(':R'),
+                                 Value.from_value(100.0, neighbour.quantities[0].units))
+    model.freeze()
+    parameters = model.parameters
+    (elastance, fixed_volume, volume) = [NS_MAP.uri(f'lib:{name}') for name in ['elastance', 'fixed-volume', 'volume']]
+    assert [quantity.uri for quantity in node.quantities] == [elastance, fixed_volume, volume]
+    assert node.quantity_items == []
+    neighbour_items = neighbour.quantity_items
+    # Assigned quantities come first, in the order they are assigned
+    units = {quantity.uri: quantity.units for quantity in node.quantities}
+    node.set_quantity_value(volume, model.ns_map.uri(':q'), Value.from_value(0.1, units[volume]))
+    node.set_quantity_value(elastance, model.ns_map.uri(':E'), Value.from_value(400.0, units[elastance]))
+    assert ([(quantity.uri, name, value) for quantity, name, value in node.quantity_items]
+         == [(volume, model.ns_map.uri(':q'), 0.1), (elastance, model.ns_map.uri(':E'), 400.0)])
+    assert ([(quantity.uri, name, value) for quantity, name, value in node.quantity_values]
+         == [(volume, 'q', 0.1), (elastance, 'E', 400.0)])
+    assert parameters.quantity_count(node.index) == 2
+    assert parameters.node_value(node.index) is None
+    # Rows are still found by quantity, and the neighbouring node is unchanged
+    rows = parameters.rows([(node.uri, volume), (node.uri, fixed_volume), (node.uri, None), (neighbour.uri, None)])
+    assert parameters.quantity[rows[:2]].tolist() == [parameters.quantities.index(node.quantities[2]),
+                                                       parameters.quantities.index(node.quantities[1])]
+    parameters.update(rows[[0, 2]], [0.2, 16.0])
+    assert node.quantity_items[0][2] == 0.2 and node.value == 16.0
+    assert neighbour.quantity_items == neighbour_items
+    assert parameters.node_value(neighbour.index) is None
+    assert ([(quantity.uri, name, value) for quantity, name, value in neighbour.quantity_values]
+         == [(resistance, 'R', 100.0)])
+
+#===============================================================================
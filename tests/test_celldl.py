@@ -0,0 +1,56 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+import re
+
+#===============================================================================
+
+import rdflib
+
+#===============================================================================
+
+from celldltools.graph2celldl.celldl import CellDLGraph, CELLDL_NS, RDF_NS, make_uri
+
+#===============================================================================
+
+def test_turtle_prefixes():
+    graph = CellDLGraph()
+    graph.add_component('ID-00000001')
+    graph.add_component('ID 2')
+    graph.add_connection('ID-00000003', 'ID-00000001', 'ID 2')
+    graph.set_property(rdflib.URIRef('http://purl.org/dc/terms/title'), rdflib.Literal('A diagram'))
+    turtle = graph.as_turtle().decode('utf-8')
+    declared = set(re.findall(r'^@prefix (\w*):', turtle, re.MULTILINE))
+    assert {'', 'celldl', 'dct', 'owl', 'rdf', 'xsd'} <= declared
+
+    base = 'urn:celldl:test'
+    triples = set(rdflib.Graph().parse(data=turtle, format='turtle', publicID=base))
+    uri = lambda id: rdflib.URIRef(f'{base}{make_uri(id)}')
+    assert {(uri('ID-00000001'), RDF_NS.type, CELLDL_NS.Component),
+            (uri('ID 2'), RDF_NS.type, CELLDL_NS.Component),
+            (uri('ID-00000003'), RDF_NS.type, CELLDL_NS.Connection),
+            (uri('ID-00000003'), CELLDL_NS.hasSource, uri('ID-00000001')),
+            (uri('ID-00000003'), CELLDL_NS.hasTarget, uri('ID 2')),
+            (uri(''), RDF_NS.type, CELLDL_NS.Document),
+            (uri(''), rdflib.URIRef('http://purl.org/dc/terms/title'), rdflib.Literal('A diagram'))} <= triples
+    assert len(triples) == 9
+
+#===============================================================================
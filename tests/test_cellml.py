@@ -0,0 +1,146 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+import io
+
+#===============================================================================
+
+from lxml import etree
+import numpy as np
+import pytest
+
+#===============================================================================
+
+from bondgraph.bondgraph import BondgraphModel, load_model
+from bondgraph.bondgraph import cellml
+from bondgraph.bondgraph.cellml import CellMLModel, CellMLWriter, generate_cellml, generate_cellml_sweep, write_cellml
+from bondgraph.bondgraph.cellml import _equation_spec, _equations_math, _sympy_mathml
+from bondgraph.bondgraph.definitions import BONDGRAPH_EQUATIONS
+
+from conftest import DATA_DIR
+
+#===============================================================================
+
+QUANTITY_VARIABLES = ['CHARGE', 'ELASTANCE', 'RESIDUAL_CHARGE', 'RESISTANCE']
+
+# Node, quantity and delta symbols, including ones that ``sympy`` prints as
+# Greek letters or orders other than by their names
+
+SYMBOLS = [
+    ('v_1', ['q_1', 'E_1', 'q_1_us', 'R_1'], 'u_0 - u_1'),
+    ('mu', ['alpha', 'Lambda', 'beta_0', 'rho'], '- u_10 + u_2 - u_1'),
+    ('V', ['x', 'X', 'a1', 'a10'], 'u_a'),
+    ('v', ['Q2', 'q10', 'e', 'r'], 'theta - Theta + phi_1 + phi'),
+]
+
+def _fail(*args):
+    raise AssertionError('Equations fell back to sympy')
+
+@pytest.mark.parametrize('node_type', list(BONDGRAPH_EQUATIONS))
+@pytest.mark.parametrize('symbols', SYMBOLS)
+def test_emitter_matches_sympy(monkeypatch, node_type, symbols):
+    (node_name, quantity_names, delta) = symbols
+    equation_spec = (node_type, delta, node_name, list(zip(QUANTITY_VARIABLES, quantity_names)))
+    expected = etree.tostring(etree.fromstring(_sympy_mathml(equation_spec, 't')))
+    monkeypatch.setattr(cellml, '_sympy_mathml', _fail)
+    assert etree.tostring(_equations_math(equation_spec, 't')) == expected
+
+def test_repeated_symbols(monkeypatch):
+    # ``sympy`` combines terms with the same symbol, so equations for them
+    # are left to it
+    fallbacks = []
+    def sympy_mathml(*args):
+        fallbacks.append(args)
+        return _sympy_mathml(*args)
+    monkeypatch.setattr(cellml, '_sympy_mathml', sympy_mathml)
+    for node_type in BONDGRAPH_EQUATIONS:
+        equation_spec = (node_type, 'u_1 + u_1 - q_1', 'v_1',
+                         list(zip(QUANTITY_VARIABLES, ['q_1', 'E_1', 'q_1_us', 'R_1'])))
+        assert (etree.tostring(_equations_math(equation_spec, 't'))
+             == etree.tostring(etree.fromstring(_sympy_mathml(equation_spec, 't'))))
+    assert len(fallbacks) == len(BONDGRAPH_EQUATIONS)
+
+def test_model_equations(monkeypatch, registry, specification):
+    # Equations are emitted for every node of the test models, with none
+    # needing ``sympy``
+    model = load_model(specification, registry)
+    expected = [_sympy_mathml(equation_spec, 't') for node in model.nodes
+                    if len(BONDGRAPH_EQUATIONS.get((equation_spec := _equation_spec(node))[0], []))]
+    monkeypatch.setattr(cellml, '_sympy_mathml', _fail)
+    emitted = [_equations_math(_equation_spec(node), 't') for node in model.nodes]
+    assert ([etree.tostring(math) for math in emitted if math is not None]
+         == [etree.tostring(etree.fromstring(mathml)) for mathml in expected])
+
+def test_written_cellml(registry, specification):
+    # CellML streamed to a file is that of the model's tree
+    model = load_model(specification, registry)
+    cellml = generate_cellml(model)
+    fp = io.BytesIO()
+    write_cellml(model, fp)
+    assert fp.getvalue() == cellml
+    # Including when equations are generated by worker processes
+    fp = io.BytesIO()
+    CellMLWriter(model.name).write(fp, model.nodes, processes=2, chunk_size=16)
+    assert fp.getvalue() == cellml
+
+def test_updated_values(registry, specification):
+    # Variables of an existing CellML model updated from changed parameters
+    # are those of CellML generated after the change
+    model = load_model(specification, registry)
+    keys = [(node.uri, None) for node in model.nodes if node.value is not None]
+    keys.extend((node.uri, quantity.uri) for node in model.nodes for quantity, _, _ in node.quantity_values)
+    rows = model.parameters.rows(keys)
+    values = model.parameters.value[rows]
+    original = generate_cellml(model)
+    cellml_model = CellMLModel(model.name)
+    cellml_model.add_nodes(model.nodes)
+    cellml_model.set_initial_values(keys, (values + 1.0).tolist())
+    model.parameters.update(rows, 2.0*values)
+    cellml_model.update_values(model.nodes)
+    assert cellml_model.to_xml() == generate_cellml(model) != original
+
+def test_cellml_sweep(registry, specification):
+    # Each document of a sweep is the CellML of the model with that row's values
+    model = load_model(specification, registry)
+    keys = [(node.uri, None) for node in model.nodes if node.value is not None][:2]
+    keys.extend((node.uri, quantity.uri) for node in model.nodes for quantity, _, _ in node.quantity_values[:1])
+    rows = model.parameters.rows(keys)
+    values = np.outer([1.0, 0.5, 2.0], model.parameters.value[rows])
+    documents = list(generate_cellml_sweep(model, keys, values))
+    assert len(documents) == len(values)
+    for document, row in zip(documents, values):
+        model.parameters.update(rows, row)
+        assert document == generate_cellml(model)
+
+def test_cellml_sweep_errors(registry):
+    # Arguments are checked when a sweep is made, not when it's first iterated
+    model = load_model(str(DATA_DIR / 'single-segment.ttl'), registry)
+    keys = [(model.nodes[0].uri, None)]
+    with pytest.raises(ValueError):
+        generate_cellml_sweep(model, keys, [[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        generate_cellml_sweep(model, keys, [1.0])
+    disconnected = BondgraphModel(model.uri, model.ns_map)
+    for node in model.nodes[:2]:
+        disconnected.add_node(node.uri, node.type, node.units)
+    with pytest.raises(ValueError):
+        generate_cellml_sweep(disconnected, keys, [[1.0]])
+
+#===============================================================================
@@ -0,0 +1,83 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+import json
+import re
+
+#===============================================================================
+
+from lxml import etree
+import networkx as nx
+import numpy as np
+import rdflib
+
+#===============================================================================
+
+import celldltools.graph2celldl as graph2celldl
+from celldltools.graph2celldl import Graph2CellDL, NODE_SIZE, TILE_NODE_SPACING
+from celldltools.graph2celldl.celldl import CELLDL_NS, RDF_NS
+
+#===============================================================================
+
+CREATED = re.compile(r'"\d{4}-\d\d-\d\dT[^"]*"')
+
+def test_streamed_diagram(tmp_path, monkeypatch):
+    # Small sections, so that streamed metadata is split into several
+    monkeypatch.setattr(graph2celldl, 'METADATA_CHUNK_SIZE', 256)
+    G = nx.gnm_random_graph(40, 120, seed=1, directed=True)
+    diagram = Graph2CellDL(G, layout_method='layered')
+    diagram.save_diagram(tmp_path / 'streamed.svg', streaming=True)
+    diagram.save_diagram(tmp_path / 'built.svg')
+    streamed = (tmp_path / 'streamed.svg').read_text()
+    built = (tmp_path / 'built.svg').read_text()
+    assert streamed.count('<![CDATA[') > 1
+    assert (CREATED.sub('', streamed.replace(']]><![CDATA[', ''))
+         == CREATED.sub('', built))
+
+    metadata = etree.parse(tmp_path / 'streamed.svg').find('.//{*}metadata').text
+    triples = rdflib.Graph().parse(data=metadata, format='turtle')
+    assert len(set(triples.subjects(RDF_NS.type, CELLDL_NS.Component))) == G.number_of_nodes()
+    assert len(set(triples.subjects(RDF_NS.type, CELLDL_NS.Connection))) == G.number_of_edges()
+
+def test_tiled_diagram(tmp_path):
+    G = nx.gnm_random_graph(300, 600, seed=1, directed=True)
+    Graph2CellDL(G, layout_method='layered').save_tiled_diagram(tmp_path)
+    index = json.loads((tmp_path / 'index.json').read_text())
+    (x_0, y_0, width, height) = index['view_box']
+    tile_size = index['tile_size']
+    centres = {}
+    for tile in index['tiles']:
+        (x, y, _, _) = tile['view_box']
+        assert (x, y) == (x_0 + tile['column']*tile_size, y_0 + tile['row']*tile_size)
+        assert 0 <= tile['column'] < width/tile_size and 0 <= tile['row'] < height/tile_size
+        for rect in etree.parse(tmp_path / tile['file']).iterfind('.//{*}g/{*}rect'):
+            centres[rect.getparent().get('id')] = (float(rect.get('x')) + NODE_SIZE[0]/2,
+                                                   float(rect.get('y')) + NODE_SIZE[1]/2)
+    assert len(centres) == G.number_of_nodes()
+    points = np.array(list(centres.values()))
+    assert np.all(points - np.array(NODE_SIZE)/2 >= (x_0, y_0))
+    assert np.all(points + np.array(NODE_SIZE)/2 <= (x_0 + width, y_0 + height))
+    # Tiles are of the layout scaled to separate nodes, not fitted to the
+    # untiled diagram's size
+    distances = np.linalg.norm(points[:, np.newaxis] - points[np.newaxis], axis=2)
+    np.fill_diagonal(distances, np.inf)
+    assert abs(np.median(distances.min(axis=1)) - TILE_NODE_SPACING) <= 10
+
+#===============================================================================
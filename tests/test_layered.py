@@ -0,0 +1,69 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+import networkx as nx
+
+#===============================================================================
+
+from celldltools.graph2celldl.layered import MAX_DUMMY_NODES, _split_long_edges, layered_layout
+
+#===============================================================================
+
+def test_long_edges_split():
+    successors = [[1, 3], [2], [3], []]
+    layer = [0, 1, 2, 3]
+    (split_successors, split_predecessors, split_layer, dummy_ends) = _split_long_edges(successors, layer)
+    assert split_layer[:4] == layer
+    assert dummy_ends == [(0, 3, 1/3), (0, 3, 2/3)]
+    for node, targets in enumerate(split_successors):
+        for target in targets:
+            assert split_layer[target] == split_layer[node] + 1
+            assert node in split_predecessors[target]
+    assert split_successors[0] == [1, 4] and split_successors[4] == [5] and split_successors[5] == [3]
+
+def test_dummy_nodes_limited():
+    # A chain, with edges from its first node to every other node
+    node_count = 4*MAX_DUMMY_NODES
+    successors = [[n + 1] for n in range(node_count - 1)] + [[]]
+    successors[0].extend(range(2, node_count))
+    layer = list(range(node_count))
+    (split_successors, _, split_layer, dummy_ends) = _split_long_edges(successors, layer)
+    assert 0 < len(dummy_ends) <= MAX_DUMMY_NODES*node_count
+    # Shorter edges are split before longer ones
+    split_targets = {target for (_, target, _) in dummy_ends}
+    assert split_targets == set(range(2, max(split_targets) + 1))
+    assert max(split_targets) < node_count - 1
+    assert node_count - 1 in split_successors[0]
+
+def test_layered_layout():
+    G = nx.DiGraph([(0, 1), (1, 2), (2, 3), (0, 3), (3, 4), (4, 2)])
+    positions = layered_layout(G)
+    assert set(positions) == set(G)
+    forward = [(u, v) for u, v in G.edges if positions[v][0] > positions[u][0]]
+    assert len(forward) == G.number_of_edges() - 1
+    coordinates = {}
+    for node, (x, y) in positions.items():
+        coordinates.setdefault(x, []).append(y)
+    for ys in coordinates.values():
+        ys.sort()
+        assert all(y_1 - y_0 >= 1 - 1e-9 for y_0, y_1 in zip(ys, ys[1:]))
+
+#===============================================================================
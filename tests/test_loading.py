@@ -0,0 +1,41 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+import pytest
+
+#===============================================================================
+
+from bondgraph.bondgraph import load_model
+from bondgraph.bondgraph.cellml import generate_cellml
+
+#===============================================================================
+
+@pytest.mark.parametrize('loader', [{'use_sparql': False}, {'streaming': True}])
+def test_loaders_agree(registry, specification, loader):
+    # Models found by walking the RDF graph, and by streaming triples as they
+    # are parsed, are those found by ``SPECIFICATION_QUERY``
+    model = load_model(specification, registry, use_sparql=True)
+    assert model is not None
+    loaded = load_model(specification, registry, **loader)
+    assert loaded is not None
+    assert [node.uri for node in loaded.nodes] == [node.uri for node in model.nodes]
+    assert generate_cellml(loaded) == generate_cellml(model)
+
+#===============================================================================
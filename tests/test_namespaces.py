@@ -0,0 +1,69 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+from rdflib import URIRef
+
+#===============================================================================
+
+from bondgraph.bondgraph import namespaces
+from bondgraph.bondgraph.namespaces import NamespaceMap
+
+#===============================================================================
+
+def test_longest_namespace():
+    ns_map = NamespaceMap({'a': 'http://a/', 'b': 'http://a/b/'})
+    assert ns_map.curie(URIRef('http://a/b/c')) == 'b:c'
+    assert ns_map.curie(URIRef('http://a/c')) == 'a:c'
+    assert ns_map.curie(URIRef('http://a/b')) == 'a:b'
+    # URIs not in any namespace are returned as they are
+    assert ns_map.curie(URIRef('http://c/d')) == URIRef('http://c/d')
+    # The order namespaces are added in doesn't matter
+    ns_map = NamespaceMap({'b': 'http://a/b/', 'a': 'http://a/'})
+    assert ns_map.curie(URIRef('http://a/b/c')) == 'b:c'
+    assert ns_map.curie(URIRef('http://a/c')) == 'a:c'
+
+def test_changed_namespaces():
+    # Cached CURIEs are dropped when namespaces change
+    ns_map = NamespaceMap({'a': 'http://a/'})
+    uri = URIRef('http://a/b/c')
+    assert ns_map.curie(uri) == 'a:b/c'
+    ns_map.add_namespace('b', 'http://a/b/')
+    assert ns_map.curie(uri) == 'b:c'
+    ns_map.add_namespace('bb', 'http://a/b/')
+    assert ns_map.curie(uri) == 'bb:c'
+    ns_map.delete_prefix('bb')
+    assert ns_map.curie(uri) == 'a:b/c'
+    ns_map.merge_namespaces(NamespaceMap({'b': 'http://a/b/'}))
+    assert ns_map.curie(uri) == 'b:c'
+    # Copies have their own cache
+    copy = ns_map.copy()
+    copy.delete_prefix('b')
+    assert copy.curie(uri) == 'a:b/c'
+    assert ns_map.curie(uri) == 'b:c'
+
+def test_curie_cache_size(monkeypatch):
+    monkeypatch.setattr(namespaces, 'CURIE_CACHE_SIZE', 2)
+    ns_map = NamespaceMap({'a': 'http://a/'})
+    uris = [URIRef(f'http://a/{n}') for n in range(5)]
+    assert [ns_map.curie(uri) for uri in uris] == [f'a:{n}' for n in range(5)]
+    assert [ns_map.curie(uri) for uri in reversed(uris)] == [f'a:{n}' for n in reversed(range(5))]
+
+#===============================================================================
@@ -0,0 +1,42 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+from bondgraph.bondgraph.quantity import Units
+
+#===============================================================================
+
+class DerivedUnits(Units):
+    pass
+
+#===============================================================================
+
+def test_ucum_units_interned():
+    assert Units.from_ucum('kPa/L') is Units.from_ucum('kPa/L')
+    assert Units.from_ucum('kPa/L') is not Units.from_ucum('kPa.s/L')
+
+def test_ucum_units_subclass():
+    units = DerivedUnits.from_ucum('kPa/L')
+    assert type(units) is DerivedUnits
+    assert DerivedUnits.from_ucum('kPa/L') is units
+    assert type(Units.from_ucum('kPa/L')) is Units
+    assert units == Units.from_ucum('kPa/L')
+
+#===============================================================================
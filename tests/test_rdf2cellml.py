@@ -0,0 +1,65 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+import json
+from pathlib import Path
+
+#===============================================================================
+
+from rdf2cellml import convert_batch, convert_model, read_manifest
+
+from conftest import DATA_DIR, TEMPLATE_FILE
+
+#===============================================================================
+
+def test_manifest_comments(tmp_path):
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text("""# A comment line
+model#1.ttl model#1.cellml   # A trailing comment
+
+  # An indented comment
+model.ttl model.cellml model.svg
+""")
+    assert read_manifest(str(manifest)) == [
+        (str(tmp_path / 'model#1.ttl'), str(tmp_path / 'model#1.cellml')),
+        (str(tmp_path / 'model.ttl'), str(tmp_path / 'model.cellml'), str(tmp_path / 'model.svg')),
+    ]
+
+def test_batch_errors_by_index(tmp_path):
+    model_file = str(DATA_DIR / 'single-segment.ttl')
+    missing_file = str(tmp_path / 'missing.ttl')
+    jobs = [(model_file, str(tmp_path / 'model-1.cellml')),
+            (missing_file, str(tmp_path / 'model-2.cellml')),
+            (missing_file, str(tmp_path / 'model-3.cellml'))]
+    errors = convert_batch(str(TEMPLATE_FILE), jobs)
+    assert list(errors) == [1, 2]
+    assert Path(jobs[0][1]).exists()
+
+def test_tiled_celldl(tmp_path, registry):
+    tiles = tmp_path / 'tiles'
+    convert_model(registry, str(DATA_DIR / 'single-segment.ttl'), str(tmp_path / 'model.cellml'),
+                  celldl_tiles=str(tiles))
+    index = json.loads((tiles / 'index.json').read_text())
+    assert len(index['tiles'])
+    assert (tiles / index['overview']).exists()
+    assert all((tiles / tile['file']).exists() for tile in index['tiles'])
+
+#===============================================================================
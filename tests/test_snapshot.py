@@ -0,0 +1,83 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+import pytest
+from rdflib import URIRef
+
+#===============================================================================
+
+from bondgraph.bondgraph import BondgraphModel, load_model, load_snapshot, save_snapshot
+from bondgraph.bondgraph.cellml import generate_cellml
+from bondgraph.bondgraph.definitions import NS_MAP
+
+#===============================================================================
+
+@pytest.fixture
+def snapshot(specification, registry, tmp_path):
+    model = load_model(specification, registry)
+    model.freeze()
+    snapshot_file = tmp_path / 'model.snap'
+    save_snapshot(model, snapshot_file)
+    return (model, snapshot_file)
+
+#===============================================================================
+
+def test_round_trip(snapshot):
+    (model, snapshot_file) = snapshot
+    loaded = load_snapshot(snapshot_file)
+    assert loaded.frozen
+    assert (loaded.uri, loaded.name) == (model.uri, model.name)
+    assert [node.uri for node in loaded.nodes] == [node.uri for node in model.nodes]
+    assert ([(bond.uri, bond.nodes[0].uri, bond.nodes[1].uri) for bond in loaded.bonds]
+         == [(bond.uri, bond.nodes[0].uri, bond.nodes[1].uri) for bond in model.bonds])
+    assert loaded.component_count == model.component_count
+    assert loaded.components() == model.components()
+    assert generate_cellml(loaded) == generate_cellml(model)
+
+def test_nodes_made_when_accessed(snapshot):
+    (model, snapshot_file) = snapshot
+    loaded = load_snapshot(snapshot_file)
+    assert not isinstance(loaded.nodes, list)
+    expected = model.nodes[-1]
+    node = loaded.get_node(expected.uri)
+    assert node is not None and node is loaded.nodes[-1]
+    assert node.value == expected.value
+    assert node.delta == expected.delta
+    assert ([(quantity.uri, name, value) for quantity, name, value in node.quantity_values]
+         == [(quantity.uri, name, value) for quantity, name, value in expected.quantity_values])
+    assert [source.uri for source in node.sources] == [source.uri for source in expected.sources]
+    assert loaded.get_node(URIRef(f'{expected.uri}-missing')) is None
+
+def test_updates_leave_snapshot_unchanged(snapshot):
+    (model, snapshot_file) = snapshot
+    contents = snapshot_file.read_bytes()
+    loaded = load_snapshot(snapshot_file)
+    rows = loaded.parameters.rows([(model.nodes[0].uri, None)])
+    loaded.parameters.update(rows, [1.25])
+    assert loaded.nodes[0].value == 1.25
+    assert snapshot_file.read_bytes() == contents
+    assert load_snapshot(snapshot_file).nodes[0].value == model.nodes[0].value
+
+def test_unfrozen_model_not_saved(tmp_path):
+    model = BondgraphModel(URIRef('http://example.org/model#model'), NS_MAP.copy())
+    with pytest.raises(ValueError):
+        save_snapshot(model, tmp_path / 'model.snap')
+
+#===============================================================================
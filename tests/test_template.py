@@ -0,0 +1,92 @@
+#===============================================================================
+#
+#  CellDL and bondgraph tools
+#
+#  Copyright (c) 2020 - 2025 David Brooks
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#===============================================================================
+
+
+import json
+import shutil
+
+#===============================================================================
+
+import pytest
+
+#===============================================================================
+
+from bondgraph.bondgraph.definitions import NS_MAP
+from bondgraph.bondgraph.template import TemplateRegistry
+
+from conftest import TEMPLATE_FILE
+
+#===============================================================================
+
+SEGMENT_TEMPLATE = NS_MAP.uri('lib:segment-template')
+
+@pytest.fixture
+def template_file(tmp_path) -> str:
+    template_file = tmp_path / 'templates.ttl'
+    shutil.copyfile(TEMPLATE_FILE, template_file)
+    return str(template_file)
+
+def segment_label(template_file: str, cache_dir) -> str:
+    template = TemplateRegistry(template_file, cache_dir=cache_dir).get_template(SEGMENT_TEMPLATE)
+    assert template is not None
+    return template.label()
+
+#===============================================================================
+
+def test_changed_template_file(template_file, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    assert segment_label(template_file, cache_dir) == 'Vascular segment template'
+    cache_files = list(cache_dir.iterdir())
+    assert len(cache_files) == 1
+    # A cached library is used when the template file is unchanged
+    assert segment_label(template_file, cache_dir) == 'Vascular segment template'
+    assert list(cache_dir.iterdir()) == cache_files
+    # But is rebuilt when it changes
+    with open(template_file) as fp:
+        contents = fp.read()
+    with open(template_file, 'w') as fp:
+        fp.write(contents.replace('"Vascular segment template"', '"Changed template"'))
+    assert segment_label(template_file, cache_dir) == 'Changed template'
+    assert len(list(cache_dir.iterdir())) == 2
+
+@pytest.mark.parametrize('corruption', ['truncated', 'empty', 'not-tables', 'missing-table', 'short-rows'])
+def test_corrupt_cache(template_file, tmp_path, corruption):
+    cache_dir = tmp_path / 'cache'
+    segment_label(template_file, cache_dir)
+    (cache_file,) = cache_dir.iterdir()
+    contents = cache_file.read_text()
+    cached = json.loads(contents)
+    if corruption == 'truncated':
+        cache_file.write_text(contents[:len(contents)//2])
+    elif corruption == 'empty':
+        cache_file.write_text('')
+    elif corruption == 'not-tables':
+        cache_file.write_text(json.dumps([]))
+    elif corruption == 'missing-table':
+        del cached['ports']
+        cache_file.write_text(json.dumps(cached))
+    elif corruption == 'short-rows':
+        cached['nodes'] = [row[:-1] for row in cached['nodes']]
+        cache_file.write_text(json.dumps(cached))
+    # Templates are compiled again, and the cache rewritten
+    assert segment_label(template_file, cache_dir) == 'Vascular segment template'
+    assert cache_file.read_text() == contents
+
+#===============================================================================